@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Asyncio crawl engine for DeepCrawler
+Crawls every domain at once with politeness delay and connection cap per host
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from crawl_frontier import CrawlFrontier, canonicalize_url
+from bounded_fetch import MAX_BYTES
+from deep_crawler import DeepCrawler
+from host_control import HostUnavailable
+
+
+class HostLimiter:
+    """Connection cap and politeness delay for a single host"""
+
+    def __init__(self, max_connections: int, delay: float):
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.delay = delay
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def wait_turn(self) -> None:
+        """Space out request starts on this host by `delay` seconds"""
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_slot > now:
+                await asyncio.sleep(self.next_slot - now)
+            self.next_slot = max(now, self.next_slot) + self.delay
+
+
+class AsyncDeepCrawler:
+    def __init__(self, per_host_connections=2, delay=1.0, max_workers=32, validators=None, parser=None,
+                 main_content=False, archive=None, sitemaps=None, host_control=None, max_bytes=MAX_BYTES):
+        self.per_host_connections = per_host_connections
+        self.archive = archive  # Optional HttpArchive, mounted on every worker session
+        self.delay = 0 if archive is not None and archive.replaying else delay
+        self.max_workers = max_workers
+        # Optional HostController: replaces the fixed per-host delay with adaptive pacing and a circuit breaker
+        self.host_control = host_control
+        # Parsing helpers are shared with the blocking crawler so output stays identical
+        self.crawler = DeepCrawler(delay=0, validators=validators, parser=parser, main_content=main_content,
+                                   sitemaps=sitemaps, host_control=host_control, max_bytes=max_bytes)
+        self.hosts: Dict[str, HostLimiter] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        """One requests.Session per worker thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.crawler.session.headers)
+            if self.archive is not None:
+                self.archive.mount(session)
+            self._local.session = session
+        return session
+
+    def _get(self, url: str, headers: dict) -> requests.Response:
+        """Page fetch on a worker thread: bounded HTML download, reported to the HostController"""
+        if self.host_control is not None:
+            return self.host_control.get(self._session(), url, headers, self.crawler.fetch_html)
+        return self.crawler.fetch_html(self._session(), url, headers)
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(self.per_host_connections, self.delay)
+        return self.hosts[host]
+
+    async def fetch(self, url: str, headers: Optional[dict] = None) -> requests.Response:
+        """Fetch a URL in the worker pool, respecting the host's limits"""
+        limiter = self._limiter(url)
+        async with limiter.semaphore:
+            if self.host_control is not None:
+                await asyncio.sleep(self.host_control.acquire(url))
+            else:
+                await limiter.wait_turn()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._get, url, headers or {})
+
+    async def fetch_page(self, url: str) -> dict:
+        """Fetch and parse once per run, sharing DeepCrawler's page cache"""
+        key = canonicalize_url(url)
+        cache = self.crawler.page_cache
+        if key in cache:
+            return cache[key]
+
+        validators = self.crawler.validators
+        response = await self.fetch(url, validators.conditional_headers(url) if validators else None)
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(self.executor, self.crawler.page_from_response, url, response)
+        cache[key] = page
+        return page
+
+    async def crawl_domain(self, start_url: str, domain: str, max_pages=20, max_depth=2, on_page=None,
+                           stop=None) -> dict:
+        """Same frontier walk as DeepCrawler.crawl_domain, with several fetches in flight per host"""
+        print(f"🔍 DEEP CRAWLING: {domain} ({start_url})")
+
+        frontier = CrawlFrontier(domain, max_depth=max_depth)
+        loop = asyncio.get_running_loop()
+        discovered = None
+        if self.host_control is not None and self.host_control.blocked(start_url):
+            print(f"   ⛔ {domain}: circuit open after repeated failures, skipping until the next probe")
+        else:
+            # Worker thread: DeepCrawler.get may block for the host's next slot
+            try:
+                discovered = await loop.run_in_executor(self.executor, self.crawler.seed_frontier, frontier, start_url,
+                                                        domain, lambda url: self.crawler.get(url, {}, self._session()))
+            except HostUnavailable as e:  # Opened during robots.txt/sitemap discovery
+                print(f"   ⛔ {domain}: {str(e)}, skipping until the next probe")
+        robots = discovered['robots'] if discovered else None
+        if discovered and discovered['crawl_delay'] and self.delay:
+            for url in [start_url] + discovered['urls']:  # robots.txt Crawl-delay, per host
+                limiter = self._limiter(url)
+                limiter.delay = max(limiter.delay, discovered['crawl_delay'])
+                if self.host_control is not None:
+                    self.host_control.set_crawl_delay(url, discovered['crawl_delay'])
+
+        scraped_pages = []
+        in_flight: Dict[asyncio.Task, Tuple[str, int]] = {}
+        fetches = 0
+        halted = False  # Circuit opened mid-crawl: let in-flight fetches finish, start no more
+        while (len(frontier) or in_flight) and len(scraped_pages) < max_pages:
+            while (len(frontier) and len(in_flight) < self.per_host_connections
+                   and fetches < max_pages * 3 and len(scraped_pages) + len(in_flight) < max_pages
+                   and not halted and not (stop and stop.is_set())):
+                url, depth = frontier.pop()
+                if robots and not robots.can_fetch(self.crawler.discovery.user_agent, url):
+                    continue
+                in_flight[asyncio.ensure_future(self.fetch_page(url))] = (url, depth)
+                fetches += 1
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, depth = in_flight.pop(task)
+                try:
+                    page_data = self.crawler.expand(frontier, url, depth, task.result())
+                    if self.crawler.discovery:
+                        self.crawler.discovery.crawled(domain, url)
+                    if len(scraped_pages) < max_pages:
+                        scraped_pages.append(page_data)
+                        if on_page:
+                            on_page(domain, page_data)
+                except HostUnavailable as e:
+                    print(f"  ⛔ Stopping {domain}: {str(e)}")
+                    halted = True
+                except Exception as e:
+                    print(f"  ✗ Error scraping {url}: {str(e)}")
+
+        for task in in_flight:
+            task.cancel()
+
+        pages_fresh = sum(1 for p in scraped_pages if p['fresh'])
+        print(f"   ✅ {domain}: {len(scraped_pages)} pages scraped "
+              f"({pages_fresh} fresh, {len(scraped_pages) - pages_fresh} reused)")
+
+        return {
+            'domain': domain,
+            'start_url': start_url,
+            'total_links_found': len(frontier.seen),
+            'article_links_found': frontier.article_count(),
+            'pages_scraped': len(scraped_pages),
+            'pages_fresh': pages_fresh,
+            'pages_reused': len(scraped_pages) - pages_fresh,
+            'discovery': 'sitemap' if discovered and discovered['found'] else 'links',
+            'pages': scraped_pages,
+            'scraped_at': datetime.now().isoformat()
+        }
+
+    async def crawl_all(self, domains: List[Tuple[str, str]], max_pages=20, on_page=None,
+                        on_domain=None, stop=None) -> List[dict]:
+        """Crawl all (domain, start_url) pairs at once, results in input order; on_domain(result) as each finishes"""
+        async def crawl_one(domain, url):
+            result = await self.crawl_domain(url, domain, max_pages, on_page=on_page, stop=stop)
+            if on_domain:
+                on_domain(result)
+            return result
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            results = await asyncio.gather(
+                *(crawl_one(domain, url) for domain, url in domains),
+                return_exceptions=True
+            )
+        finally:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            if self.crawler.validators:
+                self.crawler.validators.save()
+            if self.crawler.discovery:
+                self.crawler.discovery.save()
+            if self.host_control is not None:
+                self.host_control.save()
+
+        all_results = []
+        for (domain, _), result in zip(domains, results):
+            if isinstance(result, Exception):
+                print(f"      ⚠️  {domain} failed: {str(result)}")
+            else:
+                all_results.append(result)
+        return all_results
+
+    def run(self, domains: List[Tuple[str, str]], max_pages=20, on_page=None, on_domain=None,
+            stop=None) -> List[dict]:
+        """Blocking entry point; setting the optional stop Event ends every domain after its in-flight fetches"""
+        self.hosts = {}
+        self.crawler.page_cache = {}
+        return asyncio.run(self.crawl_all(domains, max_pages, on_page=on_page, on_domain=on_domain, stop=stop))
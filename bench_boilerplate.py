@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Measure per-domain boilerplate stripping on a crawl file
+Reports sentences per page and Q&A pairs before/after, plus the most common dropped lines
+so they can be checked by eye for real content
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+from collections import Counter
+
+from boilerplate import BoilerplateStore
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+
+
+def learn(crawl_file: str, path: str) -> BoilerplateStore:
+    """Build the store the way deep_crawl_all.py does during a crawl"""
+    store = BoilerplateStore(path)
+    for domain, page in iter_crawl_pages(crawl_file):
+        store.observe(domain, page['content'])
+    return store
+
+
+def extract(crawl_file: str, store) -> list:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DeepCrawlQAExtractor(boilerplate=store).process_crawl_results(crawl_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Boilerplate stripping before/after")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--show', type=int, default=15, help="Most common dropped lines to print")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = learn(args.crawl_file, os.path.join(tmp, 'boilerplate.json'))
+
+    extractor = DeepCrawlQAExtractor()
+    pages = lines_before = lines_after = sentences_before = sentences_after = 0
+    dropped = Counter()
+    for domain, page in iter_crawl_pages(args.crawl_file):
+        stripped = store.strip(domain, page['content'])
+        kept = set(stripped.split('\n'))
+        pages += 1
+        lines_before += page['content'].count('\n') + 1
+        lines_after += stripped.count('\n') + 1 if stripped else 0
+        sentences_before += len(extractor.extract_sentences(page['content']))
+        sentences_after += len(extractor.extract_sentences(stripped))
+        dropped.update(line for line in page['content'].split('\n') if line not in kept)
+
+    pairs_before, pairs_after = extract(args.crawl_file, None), extract(args.crawl_file, store)
+
+    print(f"📄 {pages} pages, {len(store.domains)} domains\n")
+    print(f"{'':<20}{'before':>10}{'after':>10}{'change':>10}")
+    for label, before, after in [('lines/page', lines_before / pages, lines_after / pages),
+                                 ('sentences/page', sentences_before / pages, sentences_after / pages),
+                                 ('Q&A pairs', len(pairs_before), len(pairs_after))]:
+        print(f"{label:<20}{before:>10.1f}{after:>10.1f}{(after - before) / before:>+10.0%}")
+
+    print("\n🧹 Most common dropped lines:")
+    for line, count in dropped.most_common(args.show):
+        print(f"   {count:>4}x  {line[:90]}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs process-pool Q&A extraction
+Checks that every worker count produces output identical to the serial path
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from crawl_jsonl import CrawlWriter, iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from extract_qa import QAExtractor
+from parallel_extract import default_workers
+
+
+def build_corpus(crawl_file: str, repeat: int, path: str) -> int:
+    """Replicate the crawl `repeat` times into a JSONL file; returns page count"""
+    pages = list(iter_crawl_pages(crawl_file))
+    with CrawlWriter(path, durable=False) as writer:
+        for _ in range(repeat):
+            for domain, page in pages:
+                writer.write_page(domain, page)
+    return len(pages) * repeat
+
+
+def run_deep(path: str, workers: int) -> tuple:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pairs = DeepCrawlQAExtractor(workers=workers).process_crawl_results(path)
+    return time.perf_counter() - start, pairs
+
+
+def run_scraped(path: str, workers: int) -> tuple:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pairs = QAExtractor(input_file=path, workers=workers).process_content()
+    # created_at is a wall-clock timestamp, not extraction output
+    return time.perf_counter() - start, [{k: v for k, v in p.to_dict().items() if k != 'created_at'} for p in pairs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serial vs parallel extraction")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--scraped-file', default='scraped_content.json')
+    parser.add_argument('--repeat', type=int, default=4, help="Replicate the corpus to simulate a bigger crawl")
+    args = parser.parse_args()
+
+    worker_counts = sorted({1, 2, 4, default_workers()})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'crawl.jsonl')
+        pages = build_corpus(args.crawl_file, args.repeat, corpus)
+
+        with open(args.scraped_file, 'r') as f:
+            sources = json.load(f) * args.repeat
+        scraped = os.path.join(tmp, 'scraped.json')
+        with open(scraped, 'w') as f:
+            json.dump(sources, f)
+
+        for name, runner, path, units in [
+            ('DeepCrawlQAExtractor', run_deep, corpus, pages),
+            ('QAExtractor', run_scraped, scraped, len(sources)),
+        ]:
+            print(f"\n📊 {name} ({units} pages)")
+            serial_time, serial_pairs = runner(path, 1)
+            for workers in worker_counts:
+                elapsed, pairs = (serial_time, serial_pairs) if workers == 1 else runner(path, workers)
+                identical = '✅' if pairs == serial_pairs else '❌ differs'
+                print(f"   workers={workers:<3} {elapsed:6.2f}s  {units / elapsed:8.1f} pages/s  "
+                      f"{serial_time / elapsed:4.1f}x  {len(pairs)} pairs  {identical}")
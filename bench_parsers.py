@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML parsing backends (pages/s, MB/s)
+The crawl files store extracted text, not raw HTML, so each page is rebuilt
+into an HTML document (head, nav of links, one <p> per line, script/style)
+"""
+
+import argparse
+import json
+import time
+from html import escape
+from typing import List
+
+from html_parsing import available_backends, parse_html
+
+
+def build_corpus(crawl_file: str) -> List[tuple]:
+    """[(url, html_bytes), ...] from a crawl results file"""
+    with open(crawl_file, 'r') as f:
+        results = json.load(f)
+
+    corpus = []
+    for domain_result in results:
+        urls = [p['url'] for p in domain_result['pages']]
+        nav = ''.join(f'<li><a href="{escape(u)}">{escape(u)}</a></li>' for u in urls)
+        for page in domain_result['pages']:
+            body = ''.join(f'<p>{escape(line)}</p>' for line in page['content'].split('\n'))
+            html = (
+                f'<html><head><title>{escape(page.get("title") or "")}</title>'
+                f'<style>body {{ margin: 0 }}</style></head><body>'
+                f'<nav><ul>{nav}</ul></nav><main><h1>{escape(page.get("title") or "")}</h1>{body}</main>'
+                f'<script>window.dataLayer = [];</script></body></html>'
+            )
+            corpus.append((page['url'], html.encode()))
+    return corpus
+
+
+def bench_backend(backend: str, corpus: List[tuple], rounds: int) -> dict:
+    total_bytes = sum(len(html) for _, html in corpus) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url, html in corpus:
+            parse_html(html, url, backend=backend, max_lines=2000)
+    elapsed = time.perf_counter() - start
+
+    pages = len(corpus) * rounds
+    return {
+        'backend': backend,
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'mb_per_sec': round(total_bytes / elapsed / 1e6, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HTML parser throughput")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.crawl_file)
+    size_mb = sum(len(html) for _, html in corpus) / 1e6
+    print(f"📄 Corpus: {len(corpus)} pages, {size_mb:.1f} MB of HTML\n")
+
+    results = [bench_backend(backend, corpus, args.rounds) for backend in available_backends()]
+    baseline = next(r for r in results if r['backend'] == 'html.parser')
+
+    print(f"{'Backend':<14}{'pages/s':>10}{'MB/s':>10}{'speedup':>10}")
+    for r in results:
+        speedup = r['pages_per_sec'] / baseline['pages_per_sec']
+        print(f"{r['backend']:<14}{r['pages_per_sec']:>10}{r['mb_per_sec']:>10}{speedup:>9.1f}x")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory per Q&A pair, plain dicts vs QARecord, at 100k+ pairs
+Pairs are synthesized from the crawl corpus's real candidate Q&A text (each page's URL shared
+by its pairs, like extraction output). Measured two ways: as the deep extractor builds them
+(question/answer strings already alive) and as the importer loads them from the JSON file.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from typing import Callable, List
+
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from qa_record import QARecord, load_records, to_json
+
+
+def synthesize_candidates(crawl_file: str, count: int) -> List[tuple]:
+    """count (question, answer, url, domain) candidates; the corpus is repeated under new URLs"""
+    extractor = DeepCrawlQAExtractor()
+    corpus = [(question, answer, page['url'], domain)
+              for domain, page in iter_crawl_pages(crawl_file)
+              for question, answer in extractor.candidate_pairs(extractor.extract_sentences(page['content']))]
+    candidates, urls = [], {}
+    for i in range(count):
+        question, answer, url, domain = corpus[i % len(corpus)]
+        copy = i // len(corpus)
+        # One string per (page, copy), shared by that page's pairs as in dedup_pairs
+        url = urls.setdefault((url, copy), f"{url}?copy={copy}" if copy else url)
+        candidates.append((question, answer, url, domain))
+    return candidates
+
+
+def as_dicts(candidates) -> list:
+    """The previous pair shape: a dict with a fresh tags list per pair"""
+    return [{'question': question, 'answer': answer, 'source_url': url, 'domain': domain,
+             'confidence': 0.75, 'tags': ['insurance', 'marine', domain.split('.')[0]]}
+            for question, answer, url, domain in candidates]
+
+
+def as_records(candidates) -> list:
+    return [QARecord(question, answer, url, domain, 0.75, ('insurance', 'marine', domain.split('.')[0]))
+            for question, answer, url, domain in candidates]
+
+
+def load_dicts(path: str) -> list:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def retained_bytes(build: Callable[[], list]) -> tuple:
+    """(pairs, bytes still allocated once build() has returned, kept alive by its result)"""
+    gc.collect()
+    tracemalloc.start()
+    pairs = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return pairs, retained
+
+
+def text_bytes(pairs) -> int:
+    return sum(sys.getsizeof(pair['question']) + sys.getsizeof(pair['answer']) for pair in pairs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per Q&A pair, dict vs QARecord")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 300_000])
+    args = parser.parse_args()
+
+    all_candidates = synthesize_candidates(args.crawl_file, max(args.sizes))
+    print(f"{'pairs':>8}  {'path':<10}{'dict B/pair':>13}{'record B/pair':>15}{'saved':>8}"
+          f"{'dict MB':>10}{'record MB':>11}")
+    for size in args.sizes:
+        candidates = all_candidates[:size]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'qa.json')
+            with open(path, 'w') as f:
+                json.dump(as_records(candidates), f, default=to_json)
+
+            rows = [('extract', lambda: as_dicts(candidates), lambda: as_records(candidates)),
+                    ('import', lambda: load_dicts(path), lambda: load_records(path))]
+            for label, build_dicts, build_records in rows:
+                dicts, dict_bytes = retained_bytes(build_dicts)
+                del dicts
+                records, record_bytes = retained_bytes(build_records)
+                if label == 'import':
+                    # Loaded text is allocated per pair either way; show it so the per-pair overhead is clear
+                    text = text_bytes(records)
+                    assert json.dumps(records, default=to_json) == json.dumps(load_dicts(path))
+                del records
+                print(f"{size:>8,}  {label:<10}{dict_bytes / size:>13,.0f}{record_bytes / size:>15,.0f}"
+                      f"{1 - record_bytes / dict_bytes:>8.0%}{dict_bytes / 1e6:>10,.1f}{record_bytes / 1e6:>11,.1f}")
+            print(f"{'':>8}  {'':<10}question + answer text loaded: {text / size:,.0f} B/pair")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: sentences/s of question generation, before and after the compiled rule engine
+The "before" functions are the original per-sentence implementations, kept here as the reference
+"""
+
+import argparse
+import re
+import time
+from typing import List
+
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from extract_qa import QAExtractor
+from qa_rules import RELEVANCE_KEYWORDS, KeywordMatcher
+
+
+def legacy_deep_questions(sentence: str) -> List[tuple]:
+    """DeepCrawlQAExtractor.generate_questions before the rule engine"""
+    pairs = []
+    match = re.search(r'(.+?)\s+(?:is|means?|refers to|defined as)\s+(.+)', sentence, re.IGNORECASE)
+    if match:
+        subj, defn = match.groups()
+        pairs.append((f"What is {subj.strip()}?", sentence))
+    if re.search(r'(Insurance|Coverage|Policy|Yacht|Boat|Marine).+?covers?(.+)', sentence, re.IGNORECASE):
+        pairs.append(("What does coverage include?", sentence))
+    if re.search(r'(?:You should|You must|Required|Important|Essential).+', sentence, re.IGNORECASE):
+        pairs.append(("What are the requirements?", sentence))
+    if re.search(r'\$\d+|£\d+|€\d+|\d+%', sentence):
+        if any(x in sentence.lower() for x in ['cost', 'premium', 'price', 'fee', 'deductible']):
+            pairs.append(("What is the cost?", sentence))
+    keywords = ['liability', 'deductible', 'premium', 'claim', 'coverage', 'policy', 'insured', 'exclude', 'condition']
+    for keyword in keywords:
+        if keyword.lower() in sentence.lower():
+            pairs.append((f"What about {keyword}?", sentence))
+            break
+    if sentence.startswith(('How', 'Why', 'When', 'Where', 'What')):
+        pairs.append((sentence.rstrip('?') + '?', sentence))
+    return pairs
+
+
+LEGACY_KEYWORDS = [
+    'insurance', 'coverage', 'policy', 'premium', 'claim', 'deductible',
+    'liability', 'hull', 'yacht', 'boat', 'marine', 'vessel', 'protection',
+    'damage', 'loss', 'risk', 'protect', 'insure', 'broker', 'underwriter'
+]
+
+
+def legacy_is_relevant(text: str) -> bool:
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in LEGACY_KEYWORDS)
+
+
+def legacy_qa_questions(sentence: str) -> List[str]:
+    """QAExtractor.generate_questions before the rule engine"""
+    questions = []
+    match = re.search(r'([\w\s]+)\s+(?:is|means|refers to|represents)\s+(.+)', sentence)
+    if match:
+        term = match.group(1).strip()
+        if len(term.split()) <= 3:
+            questions.append(f"What is {term}?")
+            questions.append(f"What does {term} mean in yacht insurance?")
+    match = re.search(r'([A-Za-z\s]+)\s+(?:covers|includes|provides)\s+(.+)', sentence)
+    if match:
+        entity = match.group(1).strip()
+        if 'insurance' in entity.lower():
+            questions.append(f"What does {entity} cover?")
+    match = re.search(r'You\s+(?:should|must|need to)\s+(.+)', sentence)
+    if match:
+        questions.append(f"Should I {match.group(1).strip()}?")
+    match = re.search(r'(?:cost|price|expense)\s+(?:of|for)\s+([A-Za-z\s]+)\s+is\s+(.+)', sentence)
+    if match:
+        questions.append(f"How much does {match.group(1).strip()} cost?")
+    if 'deductible' in sentence.lower():
+        questions.append("What is a deductible?")
+    if 'premium' in sentence.lower():
+        questions.append("What is an insurance premium?")
+    if 'liability' in sentence.lower():
+        questions.append("What is liability coverage?")
+    return [q for q in questions if 5 <= len(q.split()) <= 15]
+
+
+def timed(fn, sentences: List[str], rounds: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        out = [fn(s) for s in sentences]
+    elapsed = time.perf_counter() - start
+    return len(sentences) * rounds / elapsed, out
+
+
+def report(name: str, before, after, sentences: List[str], rounds: int) -> None:
+    before_rate, before_out = timed(before, sentences, rounds)
+    after_rate, after_out = timed(after, sentences, rounds)
+    same = '✅ identical' if before_out == after_out else '❌ differs'
+    print(f"{name:<28}{before_rate:>12,.0f}{after_rate:>12,.0f}{after_rate / before_rate:>9.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Question generation sentences/s")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    deep = DeepCrawlQAExtractor()
+    qa = QAExtractor()
+    sentences = []
+    for _, page in iter_crawl_pages(args.crawl_file):
+        sentences.extend(deep.extract_sentences(page['content']))
+
+    print(f"📄 {len(sentences):,} sentences x {args.rounds} rounds\n")
+    print(f"{'':<28}{'before/s':>12}{'after/s':>12}{'speedup':>10}")
+    report('DeepCrawl generate_questions', legacy_deep_questions, deep.generate_questions, sentences, args.rounds)
+    report('QAExtractor generate_questions', legacy_qa_questions, qa.generate_questions, sentences, args.rounds)
+    relevance = KeywordMatcher(RELEVANCE_KEYWORDS)
+    report('KeywordMatcher relevance', legacy_is_relevant, lambda s: relevance.any(s.lower()), sentences, args.rounds)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Q&A search latency, FTS5 index vs linear scan of the JSON output
+Synthesizes 10k-100k pairs from the crawl corpus's real candidate Q&A text and times
+ranked queries (text only, + domain, + tag) plus a keyword scan over the same list
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from qa_search import QASearchIndex, TERM
+from telemetry import percentile
+
+
+def synthesize_pairs(crawl_file: str, count: int) -> List[Dict]:
+    """count pairs recombining the corpus's candidate questions and answers"""
+    extractor = DeepCrawlQAExtractor()
+    candidates = []
+    for domain, page in iter_crawl_pages(crawl_file):
+        for question, answer in extractor.candidate_pairs(extractor.extract_sentences(page['content'])):
+            candidates.append((question, answer, page['url'], domain))
+    pairs = []
+    for i in range(count):
+        question, _, url, domain = candidates[i % len(candidates)]
+        answer = candidates[(i * 7919) % len(candidates)][1]
+        pairs.append({'question': question, 'answer': answer, 'source_url': f"{url}#{i}", 'domain': domain,
+                      'confidence': 0.75, 'tags': ['insurance', 'marine', domain.split('.')[0]]})
+    return pairs
+
+
+def scan(pairs: List[Dict], text: str, limit=10) -> List[Dict]:
+    """Baseline: term hits in question + answer for every pair"""
+    terms = set(TERM.findall(text.lower()))
+    scored = []
+    for pair in pairs:
+        words = TERM.findall(f"{pair['question']} {pair['answer']}".lower())
+        hits = sum(1 for w in words if w in terms)
+        if hits:
+            scored.append((hits, pair))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [pair for _, pair in scored[:limit]]
+
+
+def time_queries(run, queries) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {f'p{int(q * 100)}': percentile(timings, q) * 1000 for q in (0.5, 0.9, 0.99)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Q&A search latency at 10k-100k pairs")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 30_000, 100_000])
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(1)
+    all_pairs = synthesize_pairs(args.crawl_file, max(args.sizes))
+    # Queries: 2-4 words of real questions, the way someone checks "do we have this already?"
+    queries = []
+    for pair in random.sample(all_pairs, args.queries):
+        words = [w for w in TERM.findall(pair['question'].lower()) if len(w) > 3] or ['insurance']
+        queries.append((' '.join(random.sample(words, min(len(words), random.randint(2, 4)))), pair['domain']))
+
+    print(f"{'pairs':>8}{'build':>9}{'size':>9}   {'p50/p90/p99 ms':<20}{'+domain':<20}{'+tag':<20}{'scan':<20}")
+    for size in args.sizes:
+        pairs = all_pairs[:size]
+        with tempfile.TemporaryDirectory() as tmp:
+            index = QASearchIndex(os.path.join(tmp, 'qa.sqlite'))
+            start = time.perf_counter()
+            index.add(pairs)
+            build = time.perf_counter() - start
+            db_size = os.path.getsize(index.path)
+
+            rows = [
+                time_queries(lambda q: index.search(q[0]), queries),
+                time_queries(lambda q: index.search(q[0], domain=q[1]), queries),
+                time_queries(lambda q: index.search(q[0], tag='marine'), queries),
+                time_queries(lambda q: scan(pairs, q[0]), queries[:20]),
+            ]
+            index.close()
+        cells = ''.join(f"{r['p50']:>5.1f}/{r['p90']:.1f}/{r['p99']:<9.1f}"[:20].ljust(20) for r in rows)
+        print(f"{size:>8,}{build:>8.1f}s{db_size / 1e6:>7.1f}MB   {cells}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: TF-IDF sentence ranking throughput (sentences/s) per backend, and how much of
+the deep-crawl extraction work the top-k cut leaves (sentences, candidates, rule time)
+"""
+
+import argparse
+import time
+
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import MAX_SENTENCES_PER_PAGE, DeepCrawlQAExtractor
+from sentence_ranking import SentenceRanker, available_backends
+
+
+def throughput(backend: str, sentences, rounds: int) -> float:
+    ranker = SentenceRanker(backend=backend)
+    ranker.scores(sentences[:1000])  # Warm the profile-term memo
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ranker.scores(sentences)
+    return len(sentences) * rounds / (time.perf_counter() - start)
+
+
+def rule_work(extractor: DeepCrawlQAExtractor, pages) -> tuple:
+    """(sentences, candidates, seconds) running the rules over the given sentence lists"""
+    start = time.perf_counter()
+    candidates = sum(len(extractor.generate_questions(s)) for sentences in pages for s in sentences)
+    return sum(map(len, pages)), candidates, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TF-IDF sentence ranking throughput and top-k effect")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 50_000, 100_000])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = DeepCrawlQAExtractor()
+    pages = [extractor.extract_sentences(page['content']) for _, page in iter_crawl_pages(args.crawl_file)]
+    corpus = [sentence for sentences in pages for sentence in sentences]
+    print(f"📄 {len(pages)} pages, {len(corpus):,} sentences\n")
+
+    print(f"{'sentences':>10}" + ''.join(f"{backend + ' /s':>16}" for backend in available_backends()))
+    for size in args.sizes:
+        sentences = (corpus * (size // len(corpus) + 1))[:size]
+        print(f"{size:>10,}" + ''.join(f"{throughput(b, sentences, args.rounds):>16,.0f}"
+                                       for b in available_backends()))
+
+    start = time.perf_counter()
+    top = [extractor.top_sentences(sentences) for sentences in pages]
+    ranking = time.perf_counter() - start
+    print(f"\nTop {MAX_SENTENCES_PER_PAGE} per page (ranked in {ranking:.2f}s):")
+    print(f"{'':<10}{'sentences':>11}{'candidates':>12}{'rules s':>9}")
+    for label, selected in (('all', pages), ('top-k', top)):
+        sentences, candidates, seconds = rule_work(extractor, selected)
+        print(f"{label:<10}{sentences:>11,}{candidates:>12,}{seconds:>9.2f}")
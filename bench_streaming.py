@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Sequential vs streaming crawl → extract → import, fully offline
+Replays a crawl file as a simulated crawl (fixed delay per page) and imports into the
+stub server; reports when the first batch was confirmed and the end-to-end time
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from bulk_importer import BulkImporter
+from crawl_jsonl import CrawlWriter, iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from streaming_pipeline import StreamingPipeline
+from stub_import_server import serve_stub
+
+
+def replay_crawl(pages, delay: float, on_page, stop=None) -> None:
+    """Stand-in for crawl_all: one page per `delay` seconds"""
+    for domain, page in pages:
+        if stop and stop.is_set():
+            return
+        time.sleep(delay)
+        on_page(domain, page)
+
+
+def make_importer(url: str, tmp: str) -> BulkImporter:
+    return BulkImporter(url, 'stub-key', backoff_base=0.05, log=lambda message: None,
+                        dead_letter_file=os.path.join(tmp, 'dead_letter.jsonl'))
+
+
+def run_sequential(pages, delay: float, url: str, tmp: str) -> dict:
+    start = time.time()
+    first = []
+    crawl_file = os.path.join(tmp, 'crawl.jsonl')
+    with CrawlWriter(crawl_file, durable=False) as writer:
+        replay_crawl(pages, delay, writer.write_page)
+    pairs = DeepCrawlQAExtractor().process_crawl_results(crawl_file)
+    make_importer(url, tmp).import_entries(
+        pairs, on_batch=lambda result: first or first.append(time.time() - start))
+    return {'first_import_seconds': first[0], 'elapsed_seconds': time.time() - start, 'pairs': len(pairs)}
+
+
+def run_streaming(pages, delay: float, url: str, tmp: str) -> dict:
+    pipeline = StreamingPipeline(DeepCrawlQAExtractor(), make_importer(url, tmp), log=lambda message: None)
+    return pipeline.run(lambda emit_page, stop: replay_crawl(pages, delay, emit_page, stop))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential vs streaming pipeline, offline")
+    parser.add_argument('--crawl-file', default='all_domains_crawl.json')
+    parser.add_argument('--delay', type=float, default=0.05, help="Simulated crawl time per page (s)")
+    parser.add_argument('--entry-latency', type=float, default=0.005, help="Stub import latency per entry (s)")
+    args = parser.parse_args()
+
+    pages = list(iter_crawl_pages(args.crawl_file))
+    print(f"📄 {len(pages)} pages, {args.delay}s per page crawl, {args.entry_latency}s per imported entry\n")
+
+    results = {}
+    for label, run in [('sequential', run_sequential), ('streaming', run_streaming)]:
+        with tempfile.TemporaryDirectory() as tmp, serve_stub(per_entry_latency=args.entry_latency) as (url, state):
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[label] = run(pages, args.delay, url, tmp)
+
+    print(f"{'':<12}{'first import':>14}{'total':>10}{'pairs':>8}")
+    for label, result in results.items():
+        print(f"{label:<12}{result['first_import_seconds']:>13.1f}s{result['elapsed_seconds']:>9.1f}s"
+              f"{result['pairs']:>8}")
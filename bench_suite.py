@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: crawl → extract → import
+Replays the stored corpus through local HTTP servers, runs DeepCrawler (serial, async, and
+seeded from sitemaps: a first and an incremental cycle), both extractors and the importer against the stub endpoint, each stage in a fresh process
+so its peak RSS is its own. Results go to bench_results/ as JSON; --compare diffs two runs.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from corpus_server import load_corpus, serve_corpus
+from stub_import_server import serve_stub
+from telemetry import metrics, percentile
+
+RESULTS_DIR = "bench_results"
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1024  # bytes on macOS, KiB on Linux
+
+
+def latency(name: str) -> dict:
+    """p50/p90/p99 of one telemetry summary across all its labels"""
+    values = sorted(v for (metric, _), samples in metrics.samples.items() if metric == name for v in samples)
+    return {f'p{int(q * 100)}_ms': round(percentile(values, q) * 1000, 2) for q in (0.5, 0.9, 0.99)}
+
+
+def counter(name: str) -> float:
+    return sum(v for (metric, _), v in metrics.counters.items() if metric == name)
+
+
+def run_stage(fn, *args) -> dict:
+    """Run a stage in a fresh interpreter, quietly"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(_quiet, fn, *args).result()
+
+
+def _quiet(fn, *args) -> dict:
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = fn(*args)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def stage_crawl(domains, crawl_file: str, use_async: bool, sitemap_file: str = None) -> dict:
+    from async_crawler import AsyncDeepCrawler
+    from crawl_jsonl import CrawlWriter, iter_crawl_pages
+    from deep_crawler import DeepCrawler
+    from sitemap_discovery import SitemapState
+
+    sitemaps = SitemapState(sitemap_file) if sitemap_file else None
+    start = time.perf_counter()
+    with CrawlWriter(crawl_file, durable=False) as writer:
+        if use_async:
+            AsyncDeepCrawler(per_host_connections=2, delay=0, sitemaps=sitemaps).run(
+                domains, max_pages=20, on_page=writer.write_page)
+        else:
+            crawler = DeepCrawler(delay=0, sitemaps=sitemaps)
+            for domain, url in domains:
+                crawler.crawl_domain(url, domain, max_pages=20, on_page=writer.write_page)
+    seconds = time.perf_counter() - start
+
+    pages = sum(1 for _ in iter_crawl_pages(crawl_file))
+    return {'seconds': round(seconds, 3), 'requests': int(counter('crawl_requests_total')), 'pages': pages,
+            'pages_per_sec': round(pages / seconds, 1),
+            'mb_per_sec': round(counter('crawl_bytes_total') / seconds / 1e6, 2),
+            'request_latency': latency('crawl_request_seconds'), 'parse_latency': latency('parse_seconds')}
+
+
+def stage_extract_deep(crawl_file: str, pairs_file: str) -> dict:
+    from extract_from_deep_crawl import DeepCrawlQAExtractor
+    from qa_record import to_json
+
+    start = time.perf_counter()
+    pairs = DeepCrawlQAExtractor().process_crawl_results(crawl_file)
+    seconds = time.perf_counter() - start
+    with open(pairs_file, 'w') as f:
+        json.dump(pairs, f, default=to_json)
+
+    pages = int(sum(len(s) for (name, _), s in metrics.samples.items() if name == 'extract_page_seconds'))
+    return {'seconds': round(seconds, 3), 'pages': pages, 'pairs': len(pairs),
+            'pages_per_sec': round(pages / seconds, 1),
+            'sentences_per_sec': round(counter('extract_sentences_total') / seconds, 1),
+            'page_latency': latency('extract_page_seconds')}
+
+
+def stage_extract_scraped(crawl_file: str, tmp: str) -> dict:
+    from crawl_jsonl import iter_crawl_pages
+    from extract_qa import QAExtractor
+
+    sources = [{'url': page['url'], 'domain': domain, 'content': page['content']}
+               for domain, page in iter_crawl_pages(crawl_file)]
+    input_file = os.path.join(tmp, 'scraped.json')
+    with open(input_file, 'w') as f:
+        json.dump(sources, f)
+
+    start = time.perf_counter()
+    pairs = QAExtractor(input_file=input_file, output_file=os.path.join(tmp, 'qa.json')).process_content()
+    seconds = time.perf_counter() - start
+    return {'seconds': round(seconds, 3), 'sources': len(sources), 'pairs': len(pairs),
+            'sources_per_sec': round(len(sources) / seconds, 1)}
+
+
+def stage_import(pairs_file: str, url: str, tmp: str) -> dict:
+    from bulk_importer import BulkImporter
+    from qa_record import load_records
+
+    pairs = load_records(pairs_file)
+    importer = BulkImporter(url, 'bench-key', backoff_base=0.05, log=lambda message: None,
+                            dead_letter_file=os.path.join(tmp, 'dead_letter.jsonl'))
+    start = time.perf_counter()
+    stats = importer.import_entries(pairs)
+    seconds = time.perf_counter() - start
+    return {'seconds': round(seconds, 3), 'entries': len(pairs), 'imported': stats['imported'],
+            'failed': stats['failed'], 'retries': stats['retries'], 'batches': stats['batches'],
+            'entries_per_sec': round(len(pairs) / seconds, 1), 'batch_latency': latency('import_batch_seconds')}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(args) -> dict:
+    corpus = load_corpus(args.corpus)
+    if args.domains:
+        corpus = dict(list(corpus.items())[:args.domains])
+    results = {
+        'commit': git_commit(), 'run_at': datetime.now().isoformat(), 'python': platform.python_version(),
+        'platform': platform.platform(), 'cpus': os.cpu_count(), 'corpus': args.corpus,
+        'corpus_domains': len(corpus), 'corpus_pages': sum(len(pages) for pages in corpus.values()),
+        'stages': {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp, serve_corpus(corpus) as domains, \
+            serve_stub(latency=args.import_latency, per_entry_latency=args.entry_latency) as (url, _):
+        crawl_file = os.path.join(tmp, 'crawl.jsonl')
+        pairs_file = os.path.join(tmp, 'pairs.json')
+        sitemap_crawl_file = os.path.join(tmp, 'crawl_sitemaps.jsonl')
+        sitemap_file = os.path.join(tmp, 'sitemaps.json')
+        stages = [
+            ('crawl_serial', stage_crawl, domains, crawl_file, False),
+            ('crawl_async', stage_crawl, domains, crawl_file, True),
+            ('crawl_sitemaps', stage_crawl, domains, sitemap_crawl_file, False, sitemap_file),
+            ('crawl_sitemaps_recrawl', stage_crawl, domains, sitemap_crawl_file, False, sitemap_file),
+            ('extract_deep', stage_extract_deep, crawl_file, pairs_file),
+            ('extract_scraped', stage_extract_scraped, crawl_file, tmp),
+            ('import', stage_import, pairs_file, url, tmp),
+        ]
+        for name, fn, *stage_args in stages:
+            print(f"⏱️  {name}...", end=' ', flush=True)
+            results['stages'][name] = result = run_stage(fn, *stage_args)
+            print(f"{result['seconds']:.2f}s, peak RSS {result['peak_rss_mb']} MB")
+    return results
+
+
+THROUGHPUT_KEYS = ('pages_per_sec', 'mb_per_sec', 'sentences_per_sec', 'sources_per_sec', 'entries_per_sec')
+
+
+def compare(old: dict, new: dict) -> None:
+    """Per-stage throughput, time and peak RSS change between two result files"""
+    print(f"{old['commit']} → {new['commit']}\n")
+    print(f"{'stage':<18}{'metric':<20}{'old':>12}{'new':>12}{'change':>10}")
+    for stage, result in new['stages'].items():
+        before = old['stages'].get(stage, {})
+        for key in ('seconds', 'peak_rss_mb') + THROUGHPUT_KEYS:
+            if key in result and key in before and before[key]:
+                change = (result[key] - before[key]) / before[key]
+                print(f"{stage:<18}{key:<20}{before[key]:>12}{result[key]:>12}{change:>+10.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline crawl → extract → import benchmarks")
+    parser.add_argument('--corpus', nargs='+', default=['all_domains_crawl.json', 'deep_crawl_results.json'])
+    parser.add_argument('--domains', type=int, default=0, help="Only the first N corpus domains (0 = all)")
+    parser.add_argument('--import-latency', type=float, default=0.02, help="Stub latency per request (s)")
+    parser.add_argument('--entry-latency', type=float, default=0.0005, help="Stub latency per entry (s)")
+    parser.add_argument('--output', help=f"Result file (default {RESULTS_DIR}/<timestamp>-<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            compare(json.load(f_old), json.load(f_new))
+        sys.exit(0)
+
+    results = run_suite(args)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n📊 {results['corpus_pages']} corpus pages over {results['corpus_domains']} domains")
+    for name, result in results['stages'].items():
+        rates = ', '.join(f"{result[key]:,} {key.replace('_per_sec', '/s')}" for key in THROUGHPUT_KEYS if key in result)
+        print(f"   {name:<16} {result['seconds']:>7.2f}s  {rates}")
+    print(f"\n✅ Results saved to {output}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Per-domain boilerplate line filter
+The crawler fingerprints every line of every page of a domain; lines that show up on
+most pages (menus, footers, cookie banners, sidebars) are dropped before extraction
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Set
+
+from http_cache import DEFAULT_CACHE_DIR
+
+DIGITS = re.compile(r'\d+')
+SPACES = re.compile(r'\s+')
+
+
+def line_fingerprint(line: str) -> str:
+    """Stable hash of a line, insensitive to case, spacing and numbers (dates, counters)"""
+    normalized = SPACES.sub(' ', DIGITS.sub('0', line.lower())).strip()
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+class BoilerplateStore:
+    def __init__(self, path=os.path.join(DEFAULT_CACHE_DIR, "boilerplate.json"), min_pages=5, max_ratio=0.5):
+        self.path = path
+        self.min_pages = min_pages  # Too few pages to tell boilerplate from content
+        self.max_ratio = max_ratio  # Lines on more than this share of a domain's pages are boilerplate
+        self.domains: Dict[str, dict] = {}
+        self.cache: Dict[str, Set[str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Line counts from the last crawl, with the hashes of the page bodies they count"""
+        try:
+            with open(self.path, 'r') as f:
+                self.domains = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.domains = {}
+        for stats in self.domains.values():
+            stats['bodies'] = set(stats.get('bodies', ()))
+        self.cache = {}
+
+    def save(self) -> None:
+        """Write atomically; lines seen on a single page are never boilerplate, so they are not kept"""
+        data = {domain: {'pages': stats['pages'],
+                         'lines': {fp: n for fp, n in stats['lines'].items() if n > 1},
+                         'bodies': sorted(stats['bodies'])}
+                for domain, stats in self.domains.items()}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def reset(self, domain: str) -> None:
+        """Start counting a domain afresh for a full crawl"""
+        self.domains[domain] = {'pages': 0, 'lines': {}, 'bodies': set()}
+        self.cache.pop(domain, None)
+
+    def observe(self, domain: str, content: str) -> None:
+        """
+        Count each distinct line of one page. A body counts once, whether it is served under
+        several URLs or fetched again in a later cycle, so incremental crawls (which never
+        reset a domain) only add pages with new content.
+        """
+        body_hash = hashlib.md5(content.encode()).hexdigest()
+        stats = self.domains.setdefault(domain, {'pages': 0, 'lines': {}, 'bodies': set()})
+        if body_hash in stats['bodies']:
+            return
+        stats['bodies'].add(body_hash)
+        stats['pages'] += 1
+        lines = stats['lines']
+        for fp in {line_fingerprint(line) for line in content.split('\n') if line.strip()}:
+            lines[fp] = lines.get(fp, 0) + 1
+        self.cache.pop(domain, None)
+
+    def boilerplate(self, domain: str) -> Set[str]:
+        """Fingerprints of a domain's boilerplate lines"""
+        if domain not in self.cache:
+            stats = self.domains.get(domain)
+            if not stats or stats['pages'] < self.min_pages:
+                self.cache[domain] = set()
+            else:
+                limit = stats['pages'] * self.max_ratio
+                self.cache[domain] = {fp for fp, n in stats['lines'].items() if n > limit}
+        return self.cache[domain]
+
+    def strip(self, domain: str, content: str) -> str:
+        """Page content without the domain's boilerplate lines"""
+        boilerplate = self.boilerplate(domain)
+        if not boilerplate:
+            return content
+        return '\n'.join(line for line in content.split('\n') if line_fingerprint(line) not in boilerplate)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bounded downloads for crawled pages
+The body is streamed: non-HTML responses are rejected from their headers before any of it
+is read, and a body over max_bytes (after decompression) is rejected as soon as it gets
+there, so no more than max_bytes is ever held in memory
+"""
+
+import io
+from typing import Iterable, Optional
+
+import requests
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+MAX_BYTES = 3 * 1024 * 1024  # Real article pages are well under 1 MB of HTML; a 3 MB DOM is ~80 MB
+CHUNK_BYTES = 64 * 1024
+
+
+class DownloadRejected(Exception):
+    """The response was dropped before (all of) its body was downloaded"""
+
+    def __init__(self, url: str, reason: str, detail: str):
+        super().__init__(f"{detail}: {url}")
+        self.url = url
+        self.reason = reason  # "content_type" or "too_large"
+
+
+def media_type(response: requests.Response) -> str:
+    return response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def check_headers(response: requests.Response, max_bytes: Optional[int],
+                  content_types: Optional[Iterable[str]]) -> None:
+    """Reject a successful response by Content-Type or declared Content-Length; errors and 304s pass"""
+    if not 200 <= response.status_code < 300:
+        return
+    kind = media_type(response)
+    if content_types and kind and kind not in content_types:
+        raise DownloadRejected(response.url, 'content_type', f"not HTML ({kind})")
+    declared = response.headers.get('Content-Length', '')
+    if max_bytes and declared.isdigit() and int(declared) > max_bytes:
+        raise DownloadRejected(response.url, 'too_large', f"too large ({int(declared) / 1e6:.1f} MB)")
+
+
+def read_body(response: requests.Response, max_bytes: int) -> bytes:
+    """Stream the (decoded) body; raises DownloadRejected, dropping the connection, once it passes max_bytes"""
+    chunks, size = [], 0
+    for chunk in response.iter_content(CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            response.close()  # Don't drain the rest into a pooled connection
+            raise DownloadRejected(response.url, 'too_large', f"too large (over {max_bytes / 1e6:.1f} MB)")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def with_body(response: requests.Response, body: bytes) -> requests.Response:
+    """A copy of a consumed streamed response whose .content is body"""
+    copy = requests.Response()
+    for name in ('status_code', 'headers', 'url', 'history', 'encoding', 'reason', 'cookies', 'elapsed', 'request'):
+        setattr(copy, name, getattr(response, name))
+    copy.raw = io.BytesIO(body)
+    return copy
+
+
+def bounded_get(session: requests.Session, url: str, headers: dict, timeout=10, max_bytes: Optional[int] = MAX_BYTES,
+                content_types: Optional[Iterable[str]] = HTML_TYPES) -> requests.Response:
+    """session.get with the whole body read; raises DownloadRejected for non-HTML or a body over max_bytes"""
+    if not max_bytes and not content_types:
+        return session.get(url, headers=headers, timeout=timeout)
+    response = session.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        check_headers(response, max_bytes, content_types)
+    except DownloadRejected:
+        response.close()
+        raise
+    if not max_bytes:
+        return response
+    return with_body(response, read_body(response, max_bytes))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Concurrent, retrying client for /api/v1/bulk-import
+Pooled connections, bounded in-flight batches, exponential backoff on 429/5xx,
+latency/payload-adaptive batch sizes and a dead-letter file for permanent failures
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from qa_record import as_dict
+from telemetry import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BulkImporter:
+    def __init__(self, api_url: str, api_key: str, max_in_flight=4, batch_size=100,
+                 min_batch_size=10, max_batch_size=500, max_payload_bytes=1_000_000,
+                 target_latency=10.0, max_retries=5, backoff_base=1.0, timeout=60,
+                 dead_letter_file="import_dead_letter.jsonl", log=print):
+        self.api_url = api_url
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_payload_bytes = max_payload_bytes
+        self.target_latency = target_latency  # Seconds per batch before we shrink batches
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.dead_letter_file = dead_letter_file
+        self.log = log
+
+        self.session = requests.Session()
+        self.session.headers.update({"x-api-key": api_key, "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+    def _empty_stats(self) -> Dict:
+        return {"imported": 0, "duplicates": 0, "failed": 0, "dead_lettered": 0,
+                "batches": 0, "retries": 0, "splits": 0}
+
+    def _payload_size(self, entry: Dict) -> int:
+        return len(json.dumps(as_dict(entry))) + 1
+
+    def _batches(self, entries: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """Cut batches at the current adaptive size or the payload byte limit, whichever comes first"""
+        batch, size = [], 0
+        for entry in entries:
+            entry_size = self._payload_size(entry)
+            if batch and (len(batch) >= self.batch_size or size + entry_size > self.max_payload_bytes):
+                yield batch
+                batch, size = [], 0
+            batch.append(entry)
+            size += entry_size
+        if batch:
+            yield batch
+
+    def _adapt(self, latency: float) -> None:
+        """AIMD on batch size: grow while fast, halve when slow"""
+        with self.lock:
+            if latency > self.target_latency:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            elif latency < self.target_latency / 2:
+                self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 4))
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return float(response.headers["Retry-After"])
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+
+    def _dead_letter(self, batch: List[Dict], reason: str) -> None:
+        metrics.inc("import_entries_total", len(batch), outcome="failed")
+        with self.lock:
+            with open(self.dead_letter_file, "a") as f:
+                f.write(json.dumps({
+                    "failed_at": datetime.now().isoformat(),
+                    "reason": reason,
+                    "entries": [as_dict(entry) for entry in batch]
+                }) + "\n")
+            self.stats["failed"] += len(batch)
+            self.stats["dead_lettered"] += 1
+
+    def _record(self, key: str, count: int) -> None:
+        with self.lock:
+            self.stats[key] += count
+
+    def send_batch(self, batch: List[Dict]) -> Dict:
+        """
+        POST one batch with retries; splits on 413. A batch is confirmed (returned as 'entries')
+        only on a 200 whose JSON body has no errors and whose inserted + updated covers every
+        entry; anything else is retried and finally dead-lettered.
+        """
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._record("retries", 1)
+                time.sleep(self._backoff(attempt - 1, response))
+
+            start = time.time()
+            try:
+                response = self.session.post(self.api_url, json={"entries": [as_dict(entry) for entry in batch],
+                                                                 "dryRun": False},
+                                             timeout=self.timeout)
+            except requests.RequestException as e:
+                response = None
+                reason = f"Error: {str(e)}"
+                metrics.inc("import_requests_total", status="error")
+                continue
+            latency = time.time() - start
+            metrics.inc("import_requests_total", status=response.status_code)
+            metrics.observe("import_request_seconds", latency)
+
+            if response.status_code == 200:
+                self._adapt(latency)
+                try:
+                    result = response.json()
+                except ValueError:
+                    result = None
+                if not isinstance(result, dict):
+                    # e.g. a proxy's HTML error page: nothing is confirmed, so retry like a 5xx
+                    reason = f"Invalid 200 response: {response.text[:200]}"
+                    metrics.inc("import_invalid_responses_total")
+                    continue
+                # Server reports inserted/updated; older builds reported imported/duplicates
+                imported = result.get("inserted", result.get("imported", 0))
+                duplicates = result.get("updated", result.get("duplicates", 0))
+                errors = result.get("errors") or []
+                if errors or imported + duplicates != len(batch):
+                    # The route answers 200 even when insert chunks or updates failed (a failed chunk
+                    # stores none of its rows), so nothing here is confirmed. Re-sending is safe:
+                    # rows that did land are matched as updates next time.
+                    reason = (f"Partial import: {imported + duplicates}/{len(batch)} stored"
+                              + (f"; {'; '.join(map(str, errors[:3]))}" if errors else ""))
+                    metrics.inc("import_partial_batches_total")
+                    continue
+                self._record("imported", imported)
+                self._record("duplicates", duplicates)
+                self._record("batches", 1)
+                metrics.observe("import_batch_seconds", latency)
+                metrics.observe("import_batch_entries", len(batch))
+                return {"imported": imported, "duplicates": duplicates, "entries": batch}
+
+            if response.status_code == 413 and len(batch) > 1:
+                # Payload too large: shrink future batches and split this one
+                with self.lock:
+                    self.max_payload_bytes = max(1, self.max_payload_bytes // 2)
+                    self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                self._record("splits", 1)
+                half = len(batch) // 2
+                first, second = self.send_batch(batch[:half]), self.send_batch(batch[half:])
+                return {"imported": first["imported"] + second["imported"],
+                        "duplicates": first["duplicates"] + second["duplicates"],
+                        "entries": first["entries"] + second["entries"]}
+
+            reason = f"Status {response.status_code}: {response.text[:200]}"
+            if response.status_code not in RETRY_STATUSES:
+                break
+
+        self._dead_letter(batch, reason)
+        return {"imported": 0, "duplicates": 0, "entries": [], "error": reason}
+
+    def import_entries(self, entries: Iterable[Dict], on_batch=None) -> Dict:
+        """
+        Import entries (pair dicts or QARecords) with up to max_in_flight concurrent batches.
+        on_batch(result) is called for each finished batch; result['entries'] lists
+        the entries the server confirmed.
+        """
+        self.stats = self._empty_stats()
+        batch_num = 0
+
+        def finish(future):
+            result = future.result()
+            metrics.inc("import_entries_total", result["imported"], outcome="imported")
+            metrics.inc("import_entries_total", result["duplicates"], outcome="duplicate")
+            num, size = pending[future]
+            label = f"[Batch {num}] ({size} entries)"
+            if "error" in result:
+                self.log(f"   {label} ❌ {result['error']} (dead-lettered)")
+            else:
+                self.log(f"   {label} ✅ {result['imported']} imported, {result['duplicates']} duplicates")
+            if on_batch:
+                on_batch(result)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            pending = {}
+            for batch in self._batches(entries):
+                batch_num += 1
+                pending[pool.submit(self.send_batch, batch)] = (batch_num, len(batch))
+                if len(pending) >= self.max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future)
+                        del pending[future]
+            for future in list(pending):
+                future.result()
+                finish(future)
+                del pending[future]
+
+        return dict(self.stats)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Local HTTP replay of a stored crawl corpus
+Each domain of all_domains_crawl.json / deep_crawl_results.json is served on its own
+127.0.0.1 port, at its original paths, so crawls can be benchmarked without the internet.
+Each server also has a robots.txt and a sitemap index pointing at a gzipped urlset
+"""
+
+import gzip
+import hashlib
+import threading
+from contextlib import contextmanager
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+from crawl_frontier import canonicalize_url
+from crawl_jsonl import iter_crawl_pages
+
+
+def load_corpus(crawl_files: Iterable[str]) -> Dict[str, Dict[str, dict]]:
+    """{domain: {path: page}}, paths as the crawler requests them (canonical); the first file to hold a path wins"""
+    corpus: Dict[str, Dict[str, dict]] = {}
+    for crawl_file in crawl_files:
+        for domain, page in iter_crawl_pages(crawl_file):
+            parsed = urlparse(canonicalize_url(page['url']))
+            path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+            corpus.setdefault(domain, {}).setdefault(path, page)
+    return corpus
+
+
+def render_page(page: dict, nav_paths: List[str]) -> bytes:
+    """Stored text back into HTML: nav of the domain's pages, one <p> per line (as bench_parsers.py)"""
+    title = escape(page.get('title') or '')
+    nav = ''.join(f'<li><a href="{escape(p)}">{escape(p)}</a></li>' for p in nav_paths)
+    body = ''.join(f'<p>{escape(line)}</p>' for line in page['content'].split('\n'))
+    return (
+        f'<html><head><title>{title}</title><style>body {{ margin: 0 }}</style></head><body>'
+        f'<nav><ul>{nav}</ul></nav><main><h1>{title}</h1>{body}</main>'
+        f'<script>window.dataLayer = [];</script></body></html>'
+    ).encode()
+
+
+SITEMAP_TYPES = {'/robots.txt': 'text/plain', '/sitemap.xml': 'application/xml',
+                 '/sitemap-pages.xml.gz': 'application/x-gzip'}
+
+
+def render_sitemaps(pages: Dict[str, dict], base: str) -> Dict[str, bytes]:
+    """robots.txt, /sitemap.xml (an index) and the gzipped urlset it lists; lastmod = scrape date"""
+    urls = ''.join(f"<url><loc>{base}{escape(path)}</loc><lastmod>{page['scraped_at'][:10]}</lastmod></url>"
+                   for path, page in sorted(pages.items()) if page.get('scraped_at'))
+    return {
+        '/robots.txt': f'User-agent: *\nDisallow: /wp-admin/\nSitemap: {base}/sitemap.xml\n'.encode(),
+        '/sitemap.xml': ('<?xml version="1.0" encoding="UTF-8"?>'
+                         '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                         f'<sitemap><loc>{base}/sitemap-pages.xml.gz</loc></sitemap></sitemapindex>').encode(),
+        '/sitemap-pages.xml.gz': gzip.compress(
+            ('<?xml version="1.0" encoding="UTF-8"?>'
+             f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>').encode()),
+    }
+
+
+def make_handler(pages: Dict[str, dict]):
+    paths = sorted(pages)
+    index = {'title': 'Index', 'content': 'Index'}
+    rendered = {path: render_page(page, paths) for path, page in pages.items()}
+    rendered.setdefault('/', render_page(index, paths))
+    sitemaps: Dict[str, bytes] = {}  # Rendered on first request, once the server's port is known
+
+    class CorpusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path in SITEMAP_TYPES:
+                if not sitemaps:
+                    sitemaps.update(render_sitemaps(pages, "http://%s:%d" % self.server.server_address[:2]))
+                self.send_response(200)
+                self.send_header('Content-Type', SITEMAP_TYPES[self.path])
+                self.send_header('Content-Length', str(len(sitemaps[self.path])))
+                self.end_headers()
+                self.wfile.write(sitemaps[self.path])
+                return
+            body = rendered.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CorpusHandler
+
+
+@contextmanager
+def serve_corpus(corpus: Dict[str, Dict[str, dict]]):
+    """Start one local server per corpus domain; yields [(local_domain, start_url), ...]"""
+    servers = []
+    try:
+        for domain, pages in corpus.items():
+            server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(pages))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+
+        domains: List[Tuple[str, str]] = []
+        for server in servers:
+            local = f"127.0.0.1:{server.server_address[1]}"
+            domains.append((local, f"http://{local}/"))
+        yield domains
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Local HTTP test server for offline crawl benchmarks
+Serves synthetic yacht-insurance sites, one port per "domain", with artificial latency
+"""
+
+import argparse
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+SENTENCES = [
+    "Yacht insurance is a policy that protects the hull, machinery and liability of a vessel.",
+    "Agreed value coverage pays the insured amount without deduction for depreciation.",
+    "You should review the navigation limits in your policy before a long passage.",
+    "The premium for a 40 foot sailboat is often around 1.5% of hull value.",
+    "Most underwriters require a recent marine survey for boats over 20 years old.",
+    "A named storm deductible can be 10% of the hull value in hurricane zones.",
+]
+
+
+def render_page(host: str, path: str, pages_per_site: int) -> bytes:
+    """Build an HTML page with nav links and article body"""
+    nav = ''.join(f'<li><a href="/blog/post-{i}/">Post {i}</a></li>' for i in range(pages_per_site))
+    body = ''.join(f'<p>{SENTENCES[(len(path) + i) % len(SENTENCES)]}</p>' for i in range(12))
+    html = (
+        f'<html><head><title>{host}{path}</title><style>p {{}}</style></head>'
+        f'<body><nav><ul>{nav}</ul></nav><article><h1>{path}</h1>{body}</article>'
+        f'<script>var x = 1;</script></body></html>'
+    )
+    return html.encode()
+
+
+def make_handler(latency: float, pages_per_site: int):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)  # Simulated network round trip
+            body = render_page(self.headers.get('Host', ''), self.path, pages_per_site)
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+@contextmanager
+def serve_fixture(sites=4, pages_per_site=10, latency=0.05):
+    """Start one local server per site; yields [(domain, start_url), ...]"""
+    servers = []
+    try:
+        for _ in range(sites):
+            server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency, pages_per_site))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+
+        domains: List[Tuple[str, str]] = []
+        for server in servers:
+            domain = f"127.0.0.1:{server.server_address[1]}"
+            domains.append((domain, f"http://{domain}/blog/"))
+        yield domains
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    from async_crawler import AsyncDeepCrawler
+    from deep_crawler import DeepCrawler
+
+    parser = argparse.ArgumentParser(description="Serial vs async crawl on a local fixture")
+    parser.add_argument('--sites', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--delay', type=float, default=0.2, help="Per-host politeness delay")
+    parser.add_argument('--connections', type=int, default=2, help="Per-host connection cap")
+    args = parser.parse_args()
+
+    with serve_fixture(args.sites, args.pages, args.latency) as domains:
+        start = time.time()
+        crawler = DeepCrawler(delay=args.delay)
+        serial = [crawler.crawl_domain(url, domain, max_pages=args.pages) for domain, url in domains]
+        serial_time = time.time() - start
+
+        start = time.time()
+        async_crawler = AsyncDeepCrawler(per_host_connections=args.connections, delay=args.delay)
+        concurrent = async_crawler.run(domains, max_pages=args.pages)
+        async_time = time.time() - start
+
+    serial_pages = sum(r['pages_scraped'] for r in serial)
+    async_pages = sum(r['pages_scraped'] for r in concurrent)
+    print(f"\n{'='*60}")
+    print(f"Serial: {serial_pages} pages in {serial_time:.2f}s")
+    print(f"Async:  {async_pages} pages in {async_time:.2f}s")
+    print(f"Speedup: {serial_time / async_time:.1f}x")
+    print(f"{'='*60}")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Crawl frontier: priority queue of URLs with link depth tracking
+Canonicalizes URLs so fragments, tracking params and case variants are fetched once
+"""
+
+import heapq
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+# Real content first, then listings that lead to it, then everything else
+ARTICLE_PATTERNS = ['/blog/', '/post/', '/article/', '/news/', '/guide/']
+LISTING_PATTERNS = ['/page/', '/category/']
+
+TRACKING_PARAMS = {
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'replytocom', 'share', 'amp'
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Links that are never pages: skipped without a request (other types are caught by Content-Type)
+NON_HTML_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.css', '.js', '.json', '.xml', '.rss',
+    '.zip', '.gz', '.mp3', '.mp4', '.mov', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+)
+
+
+def canonicalize_url(url: str) -> str:
+    """Lowercase scheme/host, drop default port, fragment and tracking params, sort query"""
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS)
+
+    return parts._replace(
+        scheme=scheme,
+        netloc=host,
+        path=parts.path or '/',
+        params='',
+        query=urlencode(query),
+        fragment=''
+    ).geturl()
+
+
+def same_site(url: str, base_domain: str) -> bool:
+    """True if url's host is base_domain or one of its subdomains (an explicit default port is ignored)"""
+    parts = urlparse(url)
+    if parts.scheme not in ('http', 'https'):
+        return False
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS[parts.scheme]:
+        host = f"{host}:{parts.port}"
+    base = base_domain.lower()
+    return host == base or host.endswith('.' + base)
+
+
+def url_priority(url: str) -> int:
+    """0 = article-like, 1 = listing/archive, 2 = other (nav, about, contact...)"""
+    path = urlparse(url).path.lower()
+    if any(p in path for p in ARTICLE_PATTERNS):
+        return 0
+    if any(p in path for p in LISTING_PATTERNS):
+        return 1
+    return 2
+
+
+def is_article_url(url: str) -> bool:
+    return url_priority(url) < 2
+
+
+class CrawlFrontier:
+    """Heap-ordered frontier: best priority first, then shallowest depth, then discovery order"""
+
+    def __init__(self, base_domain: str, max_depth=2, max_size=500):
+        self.base_domain = base_domain
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.heap: List[Tuple[int, int, int, str]] = []
+        self.seen = set()
+        self.counter = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue a URL if it is on-site, within depth, not a file download and not seen before"""
+        if depth > self.max_depth or not same_site(url, self.base_domain):
+            return False
+        if urlparse(url).path.lower().endswith(NON_HTML_EXTENSIONS):
+            return False
+
+        url = canonicalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+
+        if len(self.heap) >= self.max_size:
+            return False
+
+        heapq.heappush(self.heap, (url_priority(url), depth, self.counter, url))
+        self.counter += 1
+        return True
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Next (url, depth), or None when empty"""
+        if not self.heap:
+            return None
+        _, depth, _, url = heapq.heappop(self.heap)
+        return url, depth
+
+    def article_count(self) -> int:
+        return sum(1 for url in self.seen if is_article_url(url))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL crawl output
+One page per line, flushed as each page finishes, plus one summary line per domain.
+With a PageStore, page text goes to the store and the line keeps only its content_hash
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+
+class CrawlWriter:
+    def __init__(self, path: str, mode='w', durable=True, store=None):
+        self.path = path
+        self.durable = durable  # fsync after every line: a crash loses at most the page being written
+        self.store = store  # Optional PageStore holding the page text
+        self.file = open(path, mode)
+
+    def _write(self, record: dict) -> None:
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        if self.durable:
+            os.fsync(self.file.fileno())
+
+    def write_page(self, domain: str, page: dict) -> None:
+        if self.store is not None:
+            record = {k: v for k, v in page.items() if k != 'content'}
+            record['content_hash'] = self.store.record(page['url'], page['content'], page.get('scraped_at'))
+            page = record
+        self._write(dict(page, type='page', domain=domain))
+
+    def write_domain(self, result: dict) -> None:
+        """Domain summary (counts only; the pages are already on disk)"""
+        summary = {k: v for k, v in result.items() if k != 'pages'}
+        self._write(dict(summary, type='domain'))
+        if self.store is not None:
+            self.store.save()
+
+    def close(self) -> None:
+        self.file.close()
+        if self.store is not None:
+            self.store.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _iter_jsonl(path: str) -> Iterator[dict]:
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Torn final line from a crash mid-write
+                continue
+
+
+def iter_crawl_pages(path: str, store=None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (domain, page) from a .jsonl crawl file, or from a legacy .json dump.
+    Pages kept in a PageStore carry only content_hash; passing the store loads their
+    content here, otherwise the consumer reads it when (and if) it needs it
+    """
+    if not path.endswith('.jsonl'):
+        with open(path, 'r') as f:
+            results = json.load(f)
+        for domain_result in results:
+            for page in domain_result['pages']:
+                yield domain_result['domain'], page
+        return
+
+    for record in _iter_jsonl(path):
+        if record.get('type') == 'page':
+            page = {k: v for k, v in record.items() if k not in ('type', 'domain')}
+            if store is not None and 'content' not in page:
+                page['content'] = store.get(page['content_hash'])
+            yield record['domain'], page
+
+
+def load_domain_summaries(path: str) -> List[dict]:
+    """Per-domain summary lines of a .jsonl crawl file"""
+    return [r for r in _iter_jsonl(path) if r.get('type') == 'domain']
+
+
+def keep_domains(path: str, domains) -> None:
+    """Rewrite a .jsonl crawl file keeping only the lines of the given domains"""
+    if not os.path.exists(path):
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        for record in _iter_jsonl(path):
+            if record.get('domain') in domains:
+                f.write(json.dumps(record) + '\n')
+    os.replace(tmp_path, path)
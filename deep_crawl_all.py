@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 """Scale deep crawl to all 16 domains"""
 
-import json
+import sys
 from deep_crawler import DeepCrawler
+from async_crawler import AsyncDeepCrawler
+from http_cache import ValidatorStore
+from http_archive import HttpArchive
+from host_control import HostController
+from sitemap_discovery import SitemapState
+from boilerplate import BoilerplateStore
+from page_store import PageStore
+from crawl_jsonl import CrawlWriter, iter_crawl_pages, keep_domains, load_domain_summaries
 
-domains = [
+DOMAINS = [
     ("investopedia.com", "https://www.investopedia.com/terms/y/yacht-insurance.asp"),
     ("boatus.com", "https://www.boatus.com/expert-advice/"),
     ("superyachtinsurancebrokers.com", "https://superyachtinsurancebrokers.com/news/"),
@@ -23,33 +31,122 @@ domains = [
     ("seatalk.com", "https://www.seatalk.com/"),
 ]
 
-print("╔════════════════════════════════════════════════════════════════╗")
-print("║       DEEP CRAWL ALL 16 DOMAINS - FULL EXTRACTION             ║")
-print("╚════════════════════════════════════════════════════════════════╝\n")
+CRAWL_FILE = 'all_domains_crawl.jsonl'
 
-crawler = DeepCrawler()
-all_results = []
 
-for i, (domain, url) in enumerate(domains, 1):
-    print(f"[{i}/16] Crawling {domain}...")
+def crawl_all(domains=DOMAINS, crawl_file=CRAWL_FILE, use_async=False, main_content=False,
+              resume_domains=(), on_domain=None, on_page=None, stop=None, archive=None, sitemaps=False,
+              store=None) -> dict:
+    """
+    Crawl every (domain, start_url), streaming pages to crawl_file; page text goes to the
+    PageStore (default .crawl_cache/pages) and crawl_file keeps each page's content_hash.
+    Domains in resume_domains were finished by an interrupted run: their pages are kept
+    and they are not recrawled; anything else already in the file is dropped.
+    on_domain(summary) is called as each domain finishes, on_page(domain, page) after
+    each page is on disk. Setting the optional stop Event ends the crawl early; domains
+    cut short are not reported to on_domain, so a resumed run crawls them again.
+    An optional HttpArchive records every response, or replays a recorded crawl offline
+    (without validators, so full bodies are stored and served).
+    With sitemaps, each domain is seeded from robots.txt and its sitemaps, fetching only
+    URLs new or changed since the last cycle; sites without a sitemap fall back to links.
+    Live crawls pace each host adaptively (.crawl_cache/host_state.json); hosts that keep
+    failing are skipped until their circuit breaker's next probe, across cycles.
+    Returns run totals.
+    """
+    resume_domains = set(resume_domains)
+    store = store if store is not None else PageStore()
+    summaries = []
+    totals = {'pages': 0, 'words': 0}
+    if resume_domains:
+        keep_domains(crawl_file, resume_domains)
+        summaries = load_domain_summaries(crawl_file)
+        for _, page in iter_crawl_pages(crawl_file, store):
+            totals['pages'] += 1
+            totals['words'] += len(page['content'].split())
+
+    # ETag/Last-Modified from the previous cycle; the page text a 304 reuses is read from the store
+    validators = None if archive is not None else ValidatorStore(store=store)
+    sitemap_state = SitemapState() if sitemaps else None  # Sitemap <lastmod> per URL from the last cycle
+    replaying = archive is not None and archive.replaying
+    host_control = None if replaying else HostController(delay=1.0)  # Per-host pacing, breakers from the last cycle
+    boilerplate = BoilerplateStore()  # Per-domain line counts, used by the extractor to drop repeated lines
+    todo = [(domain, url) for domain, url in domains if domain not in resume_domains]
+    if not sitemaps:
+        # A full crawl recounts each domain; an incremental (sitemap) cycle fetches only new or
+        # changed pages, often fewer than min_pages, so it adds them to the saved counts instead
+        # (a body already counted in an earlier cycle is not counted again)
+        for domain, _ in todo:
+            boilerplate.reset(domain)
+    writer = CrawlWriter(crawl_file, mode='a' if resume_domains else 'w', store=store)
+
+    def write_page(domain, page):
+        """Stream each finished page to disk so a crash loses at most one page"""
+        writer.write_page(domain, page)
+        boilerplate.observe(domain, page['content'])
+        totals['pages'] += 1
+        totals['words'] += len(page['content'].split())
+        if on_page:
+            on_page(domain, page)
+
+    def record_domain(result):
+        """Write the domain summary and keep only its counts in memory"""
+        writer.write_domain(result)
+        boilerplate.save()
+        summary = {k: v for k, v in result.items() if k != 'pages'}
+        summaries.append(summary)
+        if on_domain and not (stop and stop.is_set()):
+            on_domain(summary)
+
     try:
-        result = crawler.crawl_domain(url, domain, max_pages=20)
-        all_results.append(result)
-        print(f"      ✅ {result['pages_scraped']} pages, {sum(len(p['content'].split()) for p in result['pages']):,} words\n")
-    except Exception as e:
-        print(f"      ⚠️  Failed: {str(e)}\n")
-
-# Save results
-with open('all_domains_crawl.json', 'w') as f:
-    json.dump(all_results, f, indent=2)
-
-# Summary
-total_pages = sum(len(r['pages']) for r in all_results)
-total_words = sum(sum(len(p['content'].split()) for p in r['pages']) for r in all_results)
-
-print("="*60)
-print(f"TOTAL PAGES SCRAPED: {total_pages}")
-print(f"TOTAL WORDS: {total_words:,}")
-print(f"DOMAINS CRAWLED: {len(all_results)}")
-print("="*60)
-print("\n✅ Results saved to all_domains_crawl.json")
+        if use_async:
+            # Crawl all domains at once; pacing and connection cap apply per host
+            crawler = AsyncDeepCrawler(per_host_connections=2, delay=1.0, validators=validators,
+                                       main_content=main_content, archive=archive, sitemaps=sitemap_state,
+                                       host_control=host_control)
+            crawler.run(todo, max_pages=20, on_page=write_page, on_domain=record_domain, stop=stop)
+        else:
+            crawler = DeepCrawler(validators=validators, main_content=main_content, archive=archive,
+                                  sitemaps=sitemap_state, host_control=host_control)
+            for i, (domain, url) in enumerate(todo, 1):
+                if stop and stop.is_set():
+                    break
+                print(f"[{i}/{len(todo)}] Crawling {domain}...")
+                try:
+                    result = crawler.crawl_domain(url, domain, max_pages=20, on_page=write_page, stop=stop)
+                    record_domain(result)
+                    print(f"      ✅ {result['pages_scraped']} pages, {sum(len(p['content'].split()) for p in result['pages']):,} words\n")
+                except Exception as e:
+                    print(f"      ⚠️  Failed: {str(e)}\n")
+    finally:
+        writer.close()
+        boilerplate.save()
+
+    return {
+        'pages': totals['pages'],
+        'fresh': sum(r['pages_fresh'] for r in summaries),
+        'words': totals['words'],
+        'domains': len(summaries),
+    }
+
+
+if __name__ == "__main__":
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║       DEEP CRAWL ALL 16 DOMAINS - FULL EXTRACTION             ║")
+    print("╚════════════════════════════════════════════════════════════════╝\n")
+
+    # --record-http saves every response to the HTTP archive, --replay-http crawls from it offline
+    archive = None
+    if '--record-http' in sys.argv or '--replay-http' in sys.argv:
+        archive = HttpArchive(mode='record' if '--record-http' in sys.argv else 'replay')
+
+    totals = crawl_all(use_async='--async' in sys.argv, main_content='--main-content' in sys.argv,
+                       archive=archive, sitemaps='--sitemaps' in sys.argv)
+
+    print("="*60)
+    print(f"TOTAL PAGES SCRAPED: {totals['pages']}")
+    print(f"PAGES FRESH: {totals['fresh']}")
+    print(f"PAGES REUSED: {totals['pages'] - totals['fresh']}")
+    print(f"TOTAL WORDS: {totals['words']:,}")
+    print(f"DOMAINS CRAWLED: {totals['domains']}")
+    print("="*60)
+    print(f"\n✅ Results saved to {CRAWL_FILE}")
@@ -7,120 +7,262 @@ Handles pagination, archives, categories, internal links
 import json
 import time
 from datetime import datetime
-from typing import List, Set
+from typing import List, Optional, Set
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import hashlib
+from crawl_frontier import CrawlFrontier, canonicalize_url
+from bounded_fetch import HTML_TYPES, MAX_BYTES, DownloadRejected, bounded_get
+from host_control import HostUnavailable
+from html_parsing import parse_html, default_backend
+from sitemap_discovery import FETCH_BYTES, SitemapDiscovery
+from telemetry import metrics
+
+def timed_get(session: requests.Session, url: str, headers: dict, timeout=10, max_bytes=None,
+              content_types=None) -> requests.Response:
+    """GET with per-host latency, status and bytes telemetry; optionally bounded (see bounded_fetch)"""
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+    try:
+        response = bounded_get(session, url, headers, timeout, max_bytes, content_types)
+    except requests.RequestException:
+        metrics.inc('crawl_requests_total', host=host, status='error')
+        raise
+    except DownloadRejected as e:
+        metrics.inc('crawl_requests_total', host=host, status='rejected')
+        metrics.inc('crawl_rejected_total', host=host, reason=e.reason)
+        raise
+    metrics.observe('crawl_request_seconds', time.perf_counter() - start, host=host)
+    metrics.inc('crawl_requests_total', host=host, status=response.status_code)
+    metrics.inc('crawl_bytes_total', len(response.content), host=host)
+    return response
 
 class DeepCrawler:
-    def __init__(self):
+    def __init__(self, delay=1.0, validators=None, parser=None, main_content=False, archive=None, sitemaps=None,
+                 host_control=None, max_bytes=MAX_BYTES):
+        self.delay = delay  # Politeness delay between page scrapes
+        self.max_bytes = max_bytes  # Page bodies are streamed and rejected past this size; non-HTML is never downloaded
+        # Optional HostController: adaptive per-host pacing and timeouts, circuit breaker (replaces the fixed delay)
+        self.host_control = host_control
+        self.validators = validators  # Optional ValidatorStore for conditional GETs
+        self.parser = parser or default_backend()  # HTML parsing backend
+        self.main_content = main_content  # Keep only <main>/<article> text when the page has one
+        # Optional SitemapState: seed crawls with new or changed sitemap URLs, links as fallback
+        self.discovery = SitemapDiscovery(sitemaps) if sitemaps is not None else None
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        if archive is not None:  # Optional HttpArchive: record every response, or replay them offline
+            archive.mount(self.session)
+            if archive.replaying:
+                self.delay = 0
         self.visited_urls = set()
         self.all_content = {}
+        self.page_cache = {}  # canonical URL -> parsed page, for this run
         
-    def discover_links(self, url: str, base_domain: str, max_depth=3) -> List[str]:
-        """Discover all accessible URLs under a domain"""
-        links = []
-        to_visit = [url]
-        visited = set()
-        depth = 0
+    def discover_links(self, url: str, base_domain: str, max_depth=3, max_fetches=50) -> List[str]:
+        """Discover accessible URLs under a domain, article-like paths first"""
+        frontier = CrawlFrontier(base_domain, max_depth=max_depth)
+        frontier.add(url, 0)
+        fetches = 0
         
-        while to_visit and depth < max_depth:
-            current = to_visit.pop(0)
-            if current in visited:
-                continue
-            
-            visited.add(current)
+        while len(frontier) and fetches < max_fetches:
+            current, depth = frontier.pop()
+            fetches += 1
             
             try:
-                response = self.session.get(current, timeout=10)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                for link in soup.find_all('a', href=True):
-                    href = link.get('href')
-                    full_url = urljoin(current, href)
-                    
-                    # Only follow links on same domain
-                    if base_domain in full_url and full_url not in visited:
-                        links.append(full_url)
-                        if len(to_visit) < 50:  # Limit queue
-                            to_visit.append(full_url)
-                
-                depth += 1
-                
+                page = self.fetch_page(current)
             except Exception as e:
                 print(f"  ⚠️  Error discovering links from {current}: {str(e)}")
                 continue
+            
+            for full_url in page['links']:
+                frontier.add(full_url, depth + 1)
+        
+        return sorted(frontier.seen)
+    
+    def fetch_page(self, url: str) -> dict:
+        """Fetch and parse a page once per run; discovery and scraping share the result"""
+        key = canonicalize_url(url)
+        if key in self.page_cache:
+            return self.page_cache[key]
+        
+        headers = self.validators.conditional_headers(url) if self.validators else {}
+        response = self.get(url, headers, html=True)
+        page = self.page_from_response(url, response)
+        self.page_cache[key] = page
+        return page
+    
+    def get(self, url: str, headers: Optional[dict] = None, session=None, html=False) -> requests.Response:
+        """
+        GET, waiting for the host's next slot and reporting the outcome when there is a HostController.
+        html: a page fetch, bounded to max_bytes of HTML; otherwise robots.txt or a sitemap,
+        bounded to the 50 MB sitemap limit
+        """
+        session = session or self.session
+        fetch = self.fetch_html if html else self.fetch_file
+        if self.host_control is None:
+            return fetch(session, url, headers or {})
+        time.sleep(self.host_control.acquire(url))
+        return self.host_control.get(session, url, headers or {}, fetch)
+    
+    def fetch_html(self, session: requests.Session, url: str, headers: dict, timeout=10) -> requests.Response:
+        return timed_get(session, url, headers, timeout, max_bytes=self.max_bytes, content_types=HTML_TYPES)
+    
+    def fetch_file(self, session: requests.Session, url: str, headers: dict, timeout=10) -> requests.Response:
+        return timed_get(session, url, headers, timeout, max_bytes=FETCH_BYTES)
+    
+    def page_from_response(self, url: str, response) -> dict:
+        """Parse a response, reusing the stored page for 304s and unchanged bodies"""
+        entry = self.validators.get(url) if self.validators else None
+        
+        if entry and self.validators.has_page(url):
+            body_hash = None
+            if response.status_code != 304:
+                body_hash = hashlib.md5(response.content).hexdigest()
+            if response.status_code == 304 or body_hash == entry.get('body_hash'):
+                self.validators.touch(url)
+                return dict(self.validators.page(url), url=url, scraped_at=datetime.now().isoformat(),
+                            status=200, fresh=False)
         
-        return list(set(links))
+        page = self.parse_page(url, response.content)
+        page['status'] = response.status_code
+        content_hash = hashlib.md5(page['content'].encode()).hexdigest()
+        # Body changed but visible text did not: no need to extract again
+        page['fresh'] = not (entry and entry.get('content_hash') == content_hash)
+        
+        if self.validators and response.ok:
+            self.validators.update(
+                url, response.headers, hashlib.md5(response.content).hexdigest(), content_hash,
+                {k: page[k] for k in ('content', 'title', 'links')}
+            )
+        return page
     
     def scrape_page(self, url: str) -> dict:
         """Scrape single page for content"""
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract content
-            text = soup.get_text(separator='\n', strip=True)
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            content = '\n'.join(lines[:2000])
-            
-            return {
-                'url': url,
-                'content': content,
-                'title': soup.title.string if soup.title else 'No title',
-                'scraped_at': datetime.now().isoformat()
-            }
+            return self.page_record(self.fetch_page(url))
             
         except Exception as e:
             print(f"  ✗ Error scraping {url}: {str(e)}")
             return None
     
-    def crawl_domain(self, start_url: str, domain: str, max_pages=20) -> dict:
-        """Deep crawl a domain"""
-        print(f"\n🔍 DEEP CRAWLING: {domain}")
-        print(f"   Start URL: {start_url}")
-        
-        # Step 1: Discover all accessible links
-        print(f"   [1] Discovering links...")
-        links = self.discover_links(start_url, domain, max_depth=2)
+    def page_record(self, page: dict) -> dict:
+        """Strip crawl-only fields from a cached page"""
+        if page['status'] >= 400:
+            raise requests.HTTPError(f"{page['status']} Error for url: {page['url']}")
+        return {k: page[k] for k in ('url', 'content', 'title', 'scraped_at', 'fresh')}
+    
+    def parse_page(self, url: str, html: bytes) -> dict:
+        """Single parse pass: outgoing links plus cleaned content"""
+        with metrics.timer('parse_seconds', backend=self.parser):
+            parsed = parse_html(html, url, backend=self.parser, max_lines=2000, main_content=self.main_content)
         
-        # Filter for article-like URLs (blogs, posts, etc)
-        article_links = [l for l in links if any(x in l for x in 
-            ['/blog/', '/post/', '/article/', '/news/', '/guide/', '/page/', '/category/'])]
+        return {
+            'url': url,
+            'content': '\n'.join(parsed['lines']),
+            'title': parsed['title'] or 'No title',
+            'scraped_at': datetime.now().isoformat(),
+            'links': parsed['links']
+        }
+    
+    def seed_frontier(self, frontier: CrawlFrontier, start_url: str, domain: str, get) -> Optional[dict]:
+        """
+        Queue a crawl's first URLs: with sitemap discovery, the new or changed sitemap URLs as
+        leaves (their links are not followed); the start page when there is no sitemap.
+        Returns the discovery result (robots rules, crawl-delay), or None without discovery
+        """
+        if not self.discovery:
+            frontier.add(start_url, 0)
+            return None
         
-        if not article_links:
-            article_links = links
+        discovered = self.discovery.discover(domain, start_url, get)
+        if discovered['found']:
+            for url in discovered['urls']:
+                frontier.add(url, frontier.max_depth)
+            print(f"   Sitemaps: {discovered['listed']} URLs listed, {len(discovered['urls'])} new or changed")
+        else:
+            frontier.add(start_url, 0)
+        return discovered
+    
+    def expand(self, frontier: CrawlFrontier, url: str, depth: int, page: dict) -> dict:
+        """Queue a fetched page's links; return its record (the start page is kept too)"""
+        for link in page['links']:
+            frontier.add(link, depth + 1)
+        return self.page_record(page)
+    
+    def crawl_domain(self, start_url: str, domain: str, max_pages=20, max_depth=2, on_page=None, stop=None) -> dict:
+        """Deep crawl a domain; on_page(domain, page) is called as each page finishes; stop is an optional Event"""
+        print(f"\n🔍 DEEP CRAWLING: {domain}")
+        print(f"   Start URL: {start_url}")
         
-        print(f"   [2] Found {len(article_links)} potential article links")
+        # Article-like URLs come off the frontier first; nav pages only when nothing better is queued
+        frontier = CrawlFrontier(domain, max_depth=max_depth)
+        discovered = None
+        if self.host_control is not None and self.host_control.blocked(start_url):
+            print("   ⛔ Circuit open after repeated failures, skipping until the next probe")
+        else:
+            try:
+                discovered = self.seed_frontier(frontier, start_url, domain, self.get)
+            except HostUnavailable as e:  # Opened during robots.txt/sitemap discovery
+                print(f"   ⛔ {str(e)}, skipping until the next probe")
+        robots = discovered['robots'] if discovered else None
+        delay = self.delay
+        if discovered and discovered['crawl_delay'] and delay:
+            delay = max(delay, discovered['crawl_delay'])  # robots.txt Crawl-delay
+            if self.host_control is not None:
+                for url in [start_url] + discovered['urls']:
+                    self.host_control.set_crawl_delay(url, discovered['crawl_delay'])
         
-        # Step 2: Scrape top pages
         scraped_pages = []
-        for i, url in enumerate(article_links[:max_pages]):
-            print(f"      Scraping {i+1}/{min(max_pages, len(article_links))}...", end='\r')
-            page_data = self.scrape_page(url)
-            if page_data:
+        fetches = 0
+        while (len(frontier) and len(scraped_pages) < max_pages and fetches < max_pages * 3
+               and not (stop and stop.is_set())):
+            url, depth = frontier.pop()
+            if robots and not robots.can_fetch(self.discovery.user_agent, url):
+                continue
+            fetches += 1
+            print(f"      Scraping {len(scraped_pages)+1}/{max_pages}...", end='\r')
+            
+            cached = canonicalize_url(url) in self.page_cache
+            try:
+                page_data = self.expand(frontier, url, depth, self.fetch_page(url))
+                if self.discovery:
+                    self.discovery.crawled(domain, url)
                 scraped_pages.append(page_data)
-            time.sleep(1)  # Rate limiting
+                if on_page:
+                    on_page(domain, page_data)
+            except HostUnavailable as e:
+                print(f"  ⛔ Stopping {domain}: {str(e)}")
+                break
+            except Exception as e:
+                print(f"  ✗ Error scraping {url}: {str(e)}")
+            
+            if not cached and self.host_control is None:
+                time.sleep(delay)  # Rate limiting
+        
+        pages_fresh = sum(1 for p in scraped_pages if p['fresh'])
+        print(f"   [1] Found {len(frontier.seen)} links, {frontier.article_count()} article-like")
+        print(f"   [2] Scraped {len(scraped_pages)} pages successfully "
+              f"({pages_fresh} fresh, {len(scraped_pages) - pages_fresh} reused)")
         
-        print(f"   [3] Scraped {len(scraped_pages)} pages successfully")
+        if self.validators:
+            self.validators.save()
+        if self.discovery:
+            self.discovery.save()
+        if self.host_control is not None:
+            self.host_control.save()
         
         return {
             'domain': domain,
             'start_url': start_url,
-            'total_links_found': len(links),
-            'article_links_found': len(article_links),
+            'total_links_found': len(frontier.seen),
+            'article_links_found': frontier.article_count(),
             'pages_scraped': len(scraped_pages),
+            'pages_fresh': pages_fresh,
+            'pages_reused': len(scraped_pages) - pages_fresh,
+            'discovery': 'sitemap' if discovered and discovered['found'] else 'links',
             'pages': scraped_pages,
             'scraped_at': datetime.now().isoformat()
         }
@@ -5,113 +5,256 @@ Extract Q&A from deep crawl results
 
 import json
 import re
-from typing import List, Dict
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from crawl_jsonl import iter_crawl_pages
+from extraction_cache import ExtractionCache
+from near_duplicates import MinHasher, NearDuplicateIndex, QAPairClusters
+from page_store import content_hash
+from parallel_extract import ordered_pool_map
+from qa_record import QARecord, to_json
+from qa_rules import DEEP_CRAWL_RULES, DOMAIN_PROFILE, QARuleEngine, rules_version
+from sentence_ranking import SentenceRanker
+from telemetry import metrics
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+SENTENCE_CHARS = (20, 500)  # Kept sentences are strictly between these lengths
+MAX_SENTENCES_PER_PAGE = 40  # Best-ranked relevant sentences the rules run on
+PAGE_HASHER = MinHasher()
+# Everything a cached page_extraction() depends on besides the page text
+EXTRACTION_VERSION = rules_version(DEEP_CRAWL_RULES, SENTENCE_SPLIT.pattern, SENTENCE_CHARS,
+                                   DOMAIN_PROFILE, MAX_SENTENCES_PER_PAGE,
+                                   PAGE_HASHER.num_perm, PAGE_HASHER.shingle_size, PAGE_HASHER.masks)
 
 class DeepCrawlQAExtractor:
-    def __init__(self):
+    def __init__(self, workers=1, pair_threshold=0.8, page_threshold=0.9, boilerplate=None, store=None, cache=None):
+        self.workers = workers  # >1 shards candidate generation across processes
+        self.boilerplate = boilerplate  # Optional BoilerplateStore from the crawl
+        self.store = store  # PageStore for crawls that keep only each page's content_hash
+        self.cache = cache  # Optional ExtractionCache: unchanged page text is not extracted again
         self.extracted = []
-        self.duplicates = set()
+        self.clusters = QAPairClusters(pair_threshold)  # Near-duplicate (question, answer) clusters
+        self.pages = NearDuplicateIndex(page_threshold)  # Near-duplicate page contents
+        self.rules = QARuleEngine(DEEP_CRAWL_RULES)
+        self.ranker = SentenceRanker()
     
     def extract_sentences(self, text: str) -> List[str]:
         """Split into meaningful sentences"""
-        sentences = re.split(r'[.!?]+', text)
+        sentences = SENTENCE_SPLIT.split(text)
         filtered = []
+        low, high = SENTENCE_CHARS
         for s in sentences:
             s = s.strip()
             # Keep sentences 20-500 chars
-            if 20 < len(s) < 500:
+            if low < len(s) < high:
                 filtered.append(s)
         return filtered
     
     def generate_questions(self, sentence: str) -> List[tuple]:
         """Generate Q&A pairs from sentences"""
+        return [(q, sentence) for q in self.rules.questions(sentence)]
+    
+    def top_sentences(self, sentences: List[str]) -> List[str]:
+        """
+        The page's MAX_SENTENCES_PER_PAGE most insurance-relevant sentences (TF-IDF over the
+        page itself, so the result depends on the page text alone), in page order
+        """
+        return self.ranker.top_k([sentences], MAX_SENTENCES_PER_PAGE)[0]
+    
+    def candidate_pairs(self, sentences: List[str]) -> List[tuple]:
+        """All (question, answer) candidates of one page's sentences (its top-ranked ones), before dedup"""
+        candidates = []
+        for sentence in self.top_sentences(sentences):
+            candidates.extend(self.generate_questions(sentence))
+        return candidates
+    
+    def page_extraction(self, content: str) -> Dict:
+        """
+        Everything dedup needs from one page's text: candidate pairs, the page signature and
+        one signature per distinct answer (in first-seen order). JSON-safe, so it can be cached.
+        """
+        sentences = self.extract_sentences(content)
+        candidates = self.candidate_pairs(sentences)
+        answers = dict.fromkeys(answer for _, answer in candidates)
+        return {
+            'candidates': candidates,
+            'signature': PAGE_HASHER.signature(content),
+            'answer_signatures': [self.clusters.hasher.signature(answer) for answer in answers],
+            'sentences': len(sentences),
+        }
+    
+    def cached_extraction(self, key: str) -> Optional[Dict]:
+        """A page_extraction() from the cache, with its tuples restored"""
+        value = self.cache.get(key)
+        if value is None:
+            return None
+        value['candidates'] = [tuple(pair) for pair in value['candidates']]
+        value['signature'] = tuple(value['signature'])
+        value['answer_signatures'] = [tuple(signature) for signature in value['answer_signatures']]
+        return value
+    
+    def dedup_pairs(self, domain: str, url: str, candidates: List[tuple],
+                    answer_signatures: Optional[List[tuple]] = None) -> List[QARecord]:
+        """Cluster candidates; returns those that started a new cluster (the best of each is kept)"""
         pairs = []
-        
-        # Pattern 1: "X is/means Y"
-        match = re.search(r'(.+?)\s+(?:is|means?|refers to|defined as)\s+(.+)', sentence, re.IGNORECASE)
-        if match:
-            subj, defn = match.groups()
-            q = f"What is {subj.strip()}?"
-            pairs.append((q, sentence))
-        
-        # Pattern 2: "Insurance/coverage covers X"
-        match = re.search(r'(Insurance|Coverage|Policy|Yacht|Boat|Marine).+?covers?(.+)', sentence, re.IGNORECASE)
-        if match:
-            q = "What does coverage include?"
-            pairs.append((q, sentence))
-        
-        # Pattern 3: "You should/must X"
-        match = re.search(r'(?:You should|You must|Required|Important|Essential).+', sentence, re.IGNORECASE)
-        if match:
-            q = "What are the requirements?"
-            pairs.append((q, sentence))
-        
-        # Pattern 4: Numbers with keywords
-        if re.search(r'\$\d+|£\d+|€\d+|\d+%', sentence):
-            if any(x in sentence.lower() for x in ['cost', 'premium', 'price', 'fee', 'deductible']):
-                q = "What is the cost?"
-                pairs.append((q, sentence))
-        
-        # Pattern 5: Insurance-specific keywords
-        keywords = ['liability', 'deductible', 'premium', 'claim', 'coverage', 'policy', 'insured', 'exclude', 'condition']
-        for keyword in keywords:
-            if keyword.lower() in sentence.lower():
-                q = f"What about {keyword}?"
-                pairs.append((q, sentence))
-                break
-        
-        # Pattern 6: How/Why questions
-        if sentence.startswith(('How', 'Why', 'When', 'Where', 'What')):
-            q = sentence.rstrip('?') + '?'
-            pairs.append((q, sentence))
-        
+        signatures = {}  # One sentence often answers several questions
+        if answer_signatures is not None:
+            signatures = dict(zip(dict.fromkeys(answer for _, answer in candidates), answer_signatures))
+        for question, answer in candidates:
+            if answer not in signatures:
+                signatures[answer] = self.clusters.hasher.signature(answer)
+            pair = QARecord(question, answer, url, domain, 0.75, ('insurance', 'marine', domain.split('.')[0]))
+            if self.clusters.add(pair, signatures[answer]):
+                pairs.append(pair)
         return pairs
     
-    def process_crawl_results(self, crawl_file: str) -> List[Dict]:
-        """Process deep crawl results"""
-        with open(crawl_file, 'r') as f:
-            results = json.load(f)
+    def page_content(self, domain: str, page: Dict) -> str:
+        """Page text (read from the page store only now, if the crawl kept just its hash) without the domain's boilerplate lines"""
+        content = page.get('content')
+        if content is None:
+            if self.store is None:
+                raise ValueError(f"{page['url']} has no inline content; pass the crawl's PageStore")
+            content = self.store.get(page['content_hash'])
+        if self.boilerplate is None:
+            return content
+        return self.boilerplate.strip(domain, content)
+    
+    def is_duplicate_page(self, url: str, signature: tuple) -> bool:
+        """True if an earlier page had near-identical content; otherwise index this one"""
+        if self.pages.query(signature) is not None:
+            return True
+        self.pages.add(url, signature)
+        return False
+    
+    def _iter_page_pairs(self, pages: Iterable[Tuple[str, Dict]]) -> Iterator[Tuple[str, Optional[List[QARecord]]]]:
+        """
+        (domain, pairs that started a new near-duplicate cluster) per page, as soon as it is
+        processed, and (domain, None) once the stream moves past the domain (before the next
+        domain's first page is deduplicated) and at its end
+        """
+        domain_counts = {}
+        unchanged = near_duplicate_pages = 0
         
-        qa_pairs = []
+        def extraction_inputs():
+            nonlocal unchanged
+            for domain, page in pages:
+                # Unchanged pages (304 / same content hash) still yield their pairs, so every cycle's
+                # output covers the whole crawl; with the cache they cost a lookup, not an extraction
+                if not page.get('fresh', True):
+                    unchanged += 1
+                content = self.page_content(domain, page)
+                if self.cache is None:
+                    yield domain, dict(page, content=content), None, None
+                    continue
+                # Keyed by the text extraction sees (boilerplate stripped), so a boilerplate change
+                # is never served stale; don't ship the text of a hit to a worker
+                key = content_hash(content)
+                cached = self.cached_extraction(key)
+                metrics.inc('extract_cache_total', domain=domain, result='miss' if cached is None else 'hit')
+                page = {'url': page['url']} if cached is not None else dict(page, content=content)
+                yield domain, page, key, cached
         
-        for domain_result in results:
-            domain = domain_result['domain']
-            print(f"\n📖 Processing {domain}...")
-            
-            domain_qa = []
+        # Extractions (candidates, signatures) are computed in parallel; dedup runs here,
+        # in page order, so the result is identical to the serial path
+        current_domain = None
+        results = ordered_pool_map(_page_extraction, extraction_inputs(), self.workers)
+        for domain, url, key, extraction, seconds in results:
+            if domain != current_domain:
+                if current_domain is not None:
+                    yield current_domain, None
+                print(f"\n📖 Processing {domain}...")
+                current_domain = domain
+                domain_counts.setdefault(domain, 0)
             
-            for page in domain_result['pages']:
-                content = page['content']
-                url = page['url']
-                
-                sentences = self.extract_sentences(content)
-                
-                for sentence in sentences:
-                    questions = self.generate_questions(sentence)
-                    
-                    for question, answer in questions:
-                        # Dedup by question
-                        q_hash = hash(question)
-                        if q_hash not in self.duplicates:
-                            self.duplicates.add(q_hash)
-                            pair = {
-                                'question': question,
-                                'answer': answer,
-                                'source_url': url,
-                                'domain': domain,
-                                'confidence': 0.75,
-                                'tags': ['insurance', 'marine', domain.split('.')[0]]
-                            }
-                            qa_pairs.append(pair)
-                            domain_qa.append(pair)
-            
-            print(f"   ✅ Extracted {len(domain_qa)} unique Q&A pairs")
+            if seconds is not None:  # Extracted now, not a cache hit
+                metrics.inc('extract_sentences_total', extraction['sentences'], domain=domain)
+                metrics.observe('extract_page_seconds', seconds, domain=domain)
+                if key:
+                    self.cache.put(key, extraction)
+            if self.is_duplicate_page(url, extraction['signature']):
+                near_duplicate_pages += 1
+                metrics.inc('extract_pages_total', domain=domain, outcome='near_duplicate')
+                yield domain, []
+                continue
+            new_pairs = self.dedup_pairs(domain, url, extraction['candidates'], extraction['answer_signatures'])
+            metrics.inc('extract_pages_total', domain=domain, outcome='extracted')
+            metrics.inc('extract_pairs_total', len(new_pairs), domain=domain)
+            domain_counts[domain] += len(new_pairs)
+            yield domain, new_pairs
+        if current_domain is not None:
+            yield current_domain, None
+        
+        print()
+        for domain, count in domain_counts.items():
+            print(f"   ✅ {domain}: {count} unique Q&A pairs")
         
-        return qa_pairs
+        if unchanged:
+            print(f"\n♻️  {unchanged} unchanged pages")
+        if near_duplicate_pages:
+            print(f"♻️  Skipped {near_duplicate_pages} near-duplicate pages")
+        if self.cache is not None:
+            self.cache.flush()
+            print(f"🗃️  Extraction cache: {self.cache.hits} pages reused, {self.cache.misses} extracted")
+    
+    def iter_new_pairs(self, pages: Iterable[Tuple[str, Dict]]) -> Iterator[QARecord]:
+        """
+        Yield each pair that starts a new near-duplicate cluster, as soon as its page
+        is processed. pages may be any (domain, page) stream, e.g. a live crawl queue.
+        """
+        for _, pairs in self._iter_page_pairs(pages):
+            yield from pairs or ()
+    
+    def iter_domain_pairs(self, pages: Iterable[Tuple[str, Dict]]) -> Iterator[Tuple[str, List[QARecord]]]:
+        """
+        (domain, best pair of each cluster its pages started, one per (source_url, question)) as
+        soon as the stream moves past the domain; pages must come grouped by domain, as the
+        sequential crawl emits them. Those clusters are then frozen, so no later page replaces
+        a pair that may already be imported: unlike iter_qa_pairs, a better near-duplicate from
+        a later domain is dropped.
+        """
+        first_cluster = len(self.clusters)
+        for domain, pairs in self._iter_page_pairs(pages):
+            if pairs is None:
+                final = self.clusters.representatives(first_cluster)
+                self.clusters.freeze()
+                first_cluster = len(self.clusters)
+                yield domain, final
+    
+    def iter_qa_pairs(self, crawl_file: str) -> Iterator[QARecord]:
+        """
+        Stream pages from a .jsonl (or legacy .json) crawl file and yield the best pair of each
+        cluster, one per (source_url, question)
+        """
+        first_cluster = len(self.clusters)
+        for _ in self.iter_new_pairs(iter_crawl_pages(crawl_file)):
+            pass
+        # A cluster's representative can still change until the last page, so pairs are yielded at the end
+        yield from self.clusters.representatives(first_cluster)
+    
+    def process_crawl_results(self, crawl_file: str) -> List[QARecord]:
+        """Process deep crawl results"""
+        return list(self.iter_qa_pairs(crawl_file))
+
+_worker_extractor = None
+
+def _page_extraction(item: tuple) -> tuple:
+    """Process-pool task: (domain, url, cache key, page_extraction, seconds); a cache hit passes through with seconds None"""
+    global _worker_extractor
+    domain, page, key, cached = item
+    if cached is not None:
+        return domain, page['url'], key, cached, None
+    if _worker_extractor is None:  # One per process: compiled rules and ranker memo are reused
+        _worker_extractor = DeepCrawlQAExtractor()
+    start = time.perf_counter()
+    extraction = _worker_extractor.page_extraction(page['content'])
+    return domain, page['url'], key, extraction, time.perf_counter() - start
 
 if __name__ == "__main__":
-    extractor = DeepCrawlQAExtractor()
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 1
+    extractor = DeepCrawlQAExtractor(workers=workers, cache=ExtractionCache(EXTRACTION_VERSION))
     qa_pairs = extractor.process_crawl_results('deep_crawl_results.json')
+    extractor.cache.close()
     
     print(f"\n{'='*60}")
     print(f"TOTAL Q&A EXTRACTED: {len(qa_pairs)}")
@@ -125,6 +268,6 @@ if __name__ == "__main__":
     
     # Save
     with open('deep_crawl_qa.json', 'w') as f:
-        json.dump(qa_pairs, f, indent=2)
+        json.dump(qa_pairs, f, indent=2, default=to_json)
     
     print(f"\n✅ Saved {len(qa_pairs)} Q&A pairs to deep_crawl_qa.json")
@@ -6,22 +6,30 @@ Converts raw text into structured question-answer format
 
 import json
 import re
-import hashlib
-from typing import List, Dict, Tuple
+import sys
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from near_duplicates import QAPairClusters
+from page_store import PageStore
+from parallel_extract import ordered_pool_map
+from qa_record import QARecord, load_records, to_json
+from qa_rules import SCRAPED_RULES, QARuleEngine
+from sentence_ranking import SentenceRanker
+from telemetry import metrics
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+MAX_SENTENCES_PER_SOURCE = 20
 
 class QAExtractor:
-    def __init__(self, input_file="scraped_content.json", output_file="qa_pairs.json"):
+    def __init__(self, input_file="scraped_content.json", output_file="qa_pairs.json", workers=1, store=None):
         self.input_file = input_file
         self.output_file = output_file
+        self.workers = workers  # >1 shards extraction across processes
+        self.store = store  # PageStore for sources saved with only their content hash
         self.qa_pairs = []
         
-        # Insurance-related keywords for context filtering
-        self.keywords = [
-            'insurance', 'coverage', 'policy', 'premium', 'claim', 'deductible',
-            'liability', 'hull', 'yacht', 'boat', 'marine', 'vessel', 'protection',
-            'damage', 'loss', 'risk', 'protect', 'insure', 'broker', 'underwriter'
-        ]
+        self.rules = QARuleEngine(SCRAPED_RULES)
+        self.ranker = SentenceRanker()  # TF-IDF relevance against the insurance term profile
     
     def load_scraped_content(self) -> List[Dict]:
         """Load scraped content from JSON"""
@@ -32,105 +40,106 @@ class QAExtractor:
             print(f"Error: {self.input_file} not found. Run scraper.py first.")
             return []
     
+    def previous_pairs(self) -> Optional[Dict[str, List[QARecord]]]:
+        """The last run's output, by source URL (None without one): unchanged sources reuse their pairs"""
+        try:
+            pairs = load_records(self.output_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        by_url = {}
+        for pair in pairs:
+            by_url.setdefault(pair['source_url'], []).append(pair)
+        return by_url
+    
+    def source_text(self, source: Dict) -> str:
+        """Inline content, or the page store blob for the source's hash"""
+        if 'content' in source:
+            return source['content']
+        if self.store is None:
+            raise ValueError(f"{source['url']} has no inline content; pass the scraper's PageStore")
+        return self.store.get(source['hash'])
+    
     def extract_sentences(self, text: str) -> List[str]:
         """Split text into sentences"""
         # Split by common sentence endings
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = SENTENCE_SPLIT.split(text)
         return [s.strip() for s in sentences if len(s.strip()) > 20 and len(s.strip()) < 500]
     
-    def is_relevant(self, text: str) -> bool:
-        """Check if text is relevant to yacht insurance"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.keywords)
-    
     def generate_questions(self, sentence: str) -> List[str]:
         """Generate potential questions from a sentence"""
-        questions = []
-        
-        # Pattern 1: "X is/means/refers to Y" → "What is X?"
-        match = re.search(r'([\w\s]+)\s+(?:is|means|refers to|represents)\s+(.+)', sentence)
-        if match:
-            term = match.group(1).strip()
-            if len(term.split()) <= 3:
-                questions.append(f"What is {term}?")
-                questions.append(f"What does {term} mean in yacht insurance?")
-        
-        # Pattern 2: "Yacht insurance covers/includes X" → "What does yacht insurance cover?"
-        match = re.search(r'([A-Za-z\s]+)\s+(?:covers|includes|provides)\s+(.+)', sentence)
-        if match:
-            entity = match.group(1).strip()
-            if 'insurance' in entity.lower():
-                questions.append(f"What does {entity} cover?")
-        
-        # Pattern 3: "You should/must X" → "Should I X?"
-        match = re.search(r'You\s+(?:should|must|need to)\s+(.+)', sentence)
-        if match:
-            action = match.group(1).strip()
-            questions.append(f"Should I {action}?")
-        
-        # Pattern 4: "The cost/price of X is Y" → "How much does X cost?"
-        match = re.search(r'(?:cost|price|expense)\s+(?:of|for)\s+([A-Za-z\s]+)\s+is\s+(.+)', sentence)
-        if match:
-            item = match.group(1).strip()
-            questions.append(f"How much does {item} cost?")
-        
-        # Pattern 5: General question from keywords
-        if 'deductible' in sentence.lower():
-            questions.append("What is a deductible?")
-        if 'premium' in sentence.lower():
-            questions.append("What is an insurance premium?")
-        if 'liability' in sentence.lower():
-            questions.append("What is liability coverage?")
-        
-        return [q for q in questions if 5 <= len(q.split()) <= 15]
+        return self.rules.questions(sentence)
+    
+    def top_sentences(self, texts: List[str]) -> List[List[str]]:
+        """Per text, its MAX_SENTENCES_PER_SOURCE most relevant sentences in text order; one TF-IDF batch for all"""
+        return self.ranker.top_k([self.extract_sentences(text) for text in texts], MAX_SENTENCES_PER_SOURCE)
     
-    def process_content(self) -> List[Dict]:
+    def source_candidates(self, text: str) -> List[Tuple[str, str]]:
+        """(question, answer) candidates for one source, in order"""
+        return self.sentence_candidates(self.top_sentences([text])[0])
+    
+    def sentence_candidates(self, sentences: List[str]) -> List[Tuple[str, str]]:
+        """(question, answer) candidates for a source's selected sentences, in order"""
+        candidates = []
+        for sentence in sentences:
+            for question in self.generate_questions(sentence):
+                # Create answer from surrounding context
+                answer = sentence.strip()
+                if answer.endswith('.'):
+                    answer = answer[:-1]
+                
+                # Remove question mark and similar sentences
+                answer = answer.replace('?', '')
+                
+                candidates.append((question, answer[:200]))  # Limit answer length
+        return candidates
+    
+    def process_content(self) -> List[QARecord]:
         """Extract Q&A from all scraped content"""
         print(f"\n📝 Processing {len(self.qa_pairs)} sources for Q&A extraction...\n")
         
         content = self.load_scraped_content()
+        # Unchanged sources keep the pairs the last run wrote for them (the output is rewritten
+        # in full, so they must not be dropped); only their extraction is skipped
+        previous = self.previous_pairs()
+        
+        def unchanged(source: Dict) -> bool:
+            return previous is not None and not source.get('fresh', True)
+        
+        # Sentences of every source are ranked in one batch (IDF over the whole scrape, so a fresh
+        # source's selection does not depend on which others changed), then candidate generation
+        # is sharded across processes; results come back in source order
+        ranked = self.top_sentences([self.source_text(source) for source in content])
+        selected = [sentences for source, sentences in zip(content, ranked) if not unchanged(source)]
+        extracted = iter(list(ordered_pool_map(_sentence_candidates, selected, self.workers,
+                                               initializer=_init_worker)))
         qa_pairs = []
         
         for source in content:
-            print(f"Processing: {source['domain']}")
+            if unchanged(source):
+                reused = previous.get(source['url'], [])
+                print(f"Unchanged: {source['domain']} ({len(reused)} Q&A pairs reused)")
+                qa_pairs.extend(reused)
+                continue
             
-            sentences = self.extract_sentences(source['content'])
-            relevant_sentences = [s for s in sentences if self.is_relevant(s)]
+            candidates = next(extracted)
+            print(f"Processing: {source['domain']}")
             
-            for sentence in relevant_sentences[:20]:  # Limit per source
-                questions = self.generate_questions(sentence)
+            for question, answer in candidates:
+                qa_pair = QARecord(question, answer, source['url'], source['domain'], 0.7,
+                                   ('coverage', 'requirements', 'definitions'), datetime.now().isoformat())
                 
-                for question in questions:
-                    # Create answer from surrounding context
-                    answer = sentence.strip()
-                    if answer.endswith('.'):
-                        answer = answer[:-1]
-                    
-                    # Remove question mark and similar sentences
-                    answer = answer.replace('?', '')
-                    
-                    qa_pair = {
-                        'question': question,
-                        'answer': answer[:200],  # Limit answer length
-                        'source_url': source['url'],
-                        'domain': source['domain'],
-                        'confidence': 0.7,
-                        'tags': ['coverage', 'requirements', 'definitions'],
-                        'created_at': datetime.now().isoformat()
-                    }
-                    
-                    qa_pairs.append(qa_pair)
+                qa_pairs.append(qa_pair)
             
-            print(f"  ✓ Extracted {len(questions)} Q&A pairs")
+            print(f"  ✓ Extracted {len(candidates)} Q&A pairs")
         
-        # Deduplicate by question
-        seen_questions = set()
-        unique_pairs = []
+        # Collapse near-duplicate (question, answer) pairs, keeping the best of each cluster
+        # and of each (source_url, question), the import route's unique key
+        clusters = QAPairClusters()
         for pair in qa_pairs:
-            q_hash = hashlib.md5(pair['question'].lower().encode()).hexdigest()
-            if q_hash not in seen_questions:
-                seen_questions.add(q_hash)
-                unique_pairs.append(pair)
+            clusters.add(pair)
+        unique_pairs = clusters.representatives()
+        for pair in unique_pairs:
+            metrics.inc('extract_pairs_total', domain=pair['domain'])
         
         self.qa_pairs = unique_pairs
         return unique_pairs
@@ -138,7 +147,7 @@ class QAExtractor:
     def save_to_file(self) -> None:
         """Save Q&A pairs to JSON"""
         with open(self.output_file, 'w') as f:
-            json.dump(self.qa_pairs, f, indent=2)
+            json.dump(self.qa_pairs, f, indent=2, default=to_json)
         print(f"\n✅ Saved {len(self.qa_pairs)} unique Q&A pairs to {self.output_file}")
     
     def save_to_csv(self, csv_file="qa_import.csv") -> None:
@@ -150,14 +159,27 @@ class QAExtractor:
             writer.writeheader()
             for pair in self.qa_pairs:
                 # Only include fields in fieldnames
-                row = {k: pair.get(k, '') for k in fieldnames}
+                data = pair.to_dict()
+                row = {k: data.get(k, '') for k in fieldnames}
                 if isinstance(row['tags'], list):
                     row['tags'] = ';'.join(row['tags'])
                 writer.writerow(row)
         print(f"✅ Saved to CSV: {csv_file}")
 
+_worker_extractor = None
+
+def _init_worker() -> None:
+    """Pool initializer: one extractor (compiled rules) per worker process"""
+    global _worker_extractor
+    _worker_extractor = QAExtractor()
+
+def _sentence_candidates(sentences: List[str]) -> List[Tuple[str, str]]:
+    """Process-pool task: candidate pairs for one source's selected sentences"""
+    return _worker_extractor.sentence_candidates(sentences)
+
 if __name__ == "__main__":
-    extractor = QAExtractor()
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 1
+    extractor = QAExtractor(workers=workers, store=PageStore())
     extractor.process_content()
     extractor.save_to_file()
     extractor.save_to_csv()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Persistent memo of per-page extraction work
+Keyed by (hash of the page text, extractor version): an unchanged page costs one lookup
+instead of sentence splitting, rule regexes and MinHash signatures. A new version (any rule
+edited) drops every older entry when the cache is opened.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from http_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_CACHE = os.path.join(DEFAULT_CACHE_DIR, "extraction_cache.sqlite")
+COMMIT_EVERY = 200  # Puts per transaction
+MAX_AGE_DAYS = 30  # Entries no page has hit for this long are pruned on close
+
+
+class ExtractionCache:
+    def __init__(self, version: str, path=DEFAULT_CACHE):
+        self.version = version
+        self.path = path
+        self.lock = threading.Lock()  # The streaming pipeline extracts on its own thread
+        self.hits = self.misses = 0
+        self.used = set()  # Hashes hit this run: their used_on date is refreshed on flush
+        self.uncommitted = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions (content_hash TEXT, version TEXT, value BLOB, used_on TEXT, "
+            "PRIMARY KEY (content_hash, version)) WITHOUT ROWID"
+        )
+        with self.db:
+            stale = self.db.execute("DELETE FROM extractions WHERE version != ?", (version,)).rowcount
+        if stale:
+            print(f"♻️  Extraction rules changed: dropped {stale} cached pages")
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute("SELECT value FROM extractions WHERE content_hash = ? AND version = ?",
+                                  (content_hash, self.version)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.used.add(content_hash)
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, content_hash: str, value: dict) -> None:
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode(), 6)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                            (content_hash, self.version, blob, datetime.now().date().isoformat()))
+            self.uncommitted += 1
+            if self.uncommitted >= COMMIT_EVERY:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def flush(self) -> None:
+        """Commit new entries and mark this run's hits as used today"""
+        today = datetime.now().date().isoformat()
+        with self.lock:
+            self.db.executemany("UPDATE extractions SET used_on = ? WHERE content_hash = ? AND version = ?",
+                                [(today, content_hash, self.version) for content_hash in self.used])
+            self.db.commit()
+            self.used = set()
+            self.uncommitted = 0
+
+    def prune(self, max_age_days=MAX_AGE_DAYS) -> int:
+        """Drop entries of pages not seen for max_age_days (gone from the crawl or edited since)"""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).date().isoformat()
+        with self.lock, self.db:
+            return self.db.execute("DELETE FROM extractions WHERE used_on < ?", (cutoff,)).rowcount
+
+    def stats(self) -> dict:
+        with self.lock:
+            count, stored = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM extractions").fetchone()
+        return {'pages': count, 'stored_bytes': stored, 'hits': self.hits, 'misses': self.misses,
+                'file_bytes': os.path.getsize(self.path)}
+
+    def close(self) -> None:
+        self.flush()
+        self.prune()
+        with self.lock:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    from extract_from_deep_crawl import EXTRACTION_VERSION
+    cache = ExtractionCache(EXTRACTION_VERSION, sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE)
+    stats = cache.stats()
+    print(f"🗃️  {cache.path} (version {EXTRACTION_VERSION})")
+    print(f"   {stats['pages']:,} pages cached, {stats['stored_bytes'] / 1e6:.1f} MB compressed, "
+          f"{stats['file_bytes'] / 1e6:.1f} MB on disk")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Per-host request control for the crawlers
+Token bucket whose rate adapts to latency and errors (AIMD), Retry-After and Crawl-delay,
+a latency-based timeout, and a circuit breaker persisted between hourly cycles
+"""
+
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from bounded_fetch import DownloadRejected
+from http_cache import DEFAULT_CACHE_DIR
+from telemetry import metrics
+
+FAILURE_STATUSES = {403, 408, 429, 500, 502, 503, 504}  # Down, overloaded or blocking us
+MAX_RETRY_AFTER = 3600.0
+
+
+class HostUnavailable(requests.RequestException):
+    """The host's circuit breaker is open: no request was made"""
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP date), capped at an hour"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Reservation-style token bucket: acquire() returns how long the caller must wait for its slot"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def acquire(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1  # Negative tokens are slots already promised to earlier callers
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostControl:
+    """One host: adaptive rate, timeout, Retry-After pause and circuit breaker"""
+
+    def __init__(self, delay: float, min_rate=1 / 60, failure_threshold=3, cooldown=900.0, max_cooldown=6 * 3600.0,
+                 slow_latency=3.0, min_timeout=3.0, max_timeout=10.0):
+        self.delay = delay  # Politeness floor: never faster than one request per `delay` seconds
+        self.crawl_delay = 0.0
+        self.min_rate = min_rate
+        self.bucket = TokenBucket(self.max_rate())
+        self.slow_latency = slow_latency
+        self.min_timeout, self.max_timeout = min_timeout, max_timeout
+        self.latency = None  # EWMA of successful response times
+        self.paused_until = 0.0  # Retry-After, wall clock
+        # Circuit breaker: closed → open after failure_threshold consecutive failures → half-open
+        # (one probe) once retry_at passes → closed on success, open with doubled cooldown on failure
+        self.state = 'closed'
+        self.failures = 0
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.retry_at = 0.0
+        self.probing = False
+
+    def max_rate(self) -> float:
+        interval = max(self.delay, self.crawl_delay)
+        return 1 / interval if interval > 0 else 1000.0
+
+    def set_crawl_delay(self, seconds: float) -> None:
+        self.crawl_delay = seconds
+        self.bucket.rate = min(self.bucket.rate, self.max_rate())
+
+    def timeout(self) -> float:
+        """A few times the usual latency, so a hung host costs seconds, not the full 10"""
+        if self.latency is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, 4 * self.latency + 1))
+
+    def acquire(self) -> float:
+        """Seconds to wait before this host's next request; raises HostUnavailable while the breaker is open"""
+        now = time.time()
+        if self.state == 'open':
+            if now < self.retry_at:
+                raise HostUnavailable(f"circuit open for {self.retry_at - now:.0f}s more")
+            self.state, self.probing = 'half_open', False
+        if self.state == 'half_open':
+            if self.probing:
+                raise HostUnavailable("circuit half-open: probe in flight")
+            self.probing = True
+        return max(self.bucket.acquire(), self.paused_until - now)
+
+    def record_success(self, latency: float) -> None:
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        self.failures = 0
+        if self.state != 'closed':
+            self.state, self.cooldown, self.probing = 'closed', self.base_cooldown, False
+        if latency > self.slow_latency:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        else:
+            self.bucket.rate = min(self.max_rate(), self.bucket.rate + 0.1 * self.max_rate())
+
+    def record_failure(self, retry_after: Optional[float] = None) -> bool:
+        """Back off; returns True if this failure opened the breaker"""
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.time() + retry_after)
+        self.failures += 1
+        if self.state == 'half_open':
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+        elif self.failures < self.failure_threshold:
+            return False
+        self.state, self.probing = 'open', False
+        self.retry_at = time.time() + max(self.cooldown, retry_after or 0)
+        return True
+
+    def to_dict(self) -> dict:
+        return {'state': self.state, 'failures': self.failures, 'cooldown': self.cooldown,
+                'retry_at': self.retry_at, 'latency': self.latency}
+
+    def restore(self, saved: dict) -> None:
+        self.state = saved.get('state', 'closed')
+        if self.state == 'half_open':
+            self.state = 'open'  # The previous run's probe never finished: probe again
+        self.failures = saved.get('failures', 0)
+        self.cooldown = saved.get('cooldown', self.base_cooldown)
+        self.retry_at = saved.get('retry_at', 0.0)
+        self.latency = saved.get('latency')
+
+
+class HostController:
+    """Per-host HostControl registry; breaker state and latency persist between cycles"""
+
+    def __init__(self, delay=1.0, path=os.path.join(DEFAULT_CACHE_DIR, "host_state.json"), **options):
+        self.delay = delay
+        self.path = path
+        self.options = options
+        self.hosts: Dict[str, HostControl] = {}
+        self.saved: Dict[str, dict] = {}
+        self.lock = threading.Lock()  # The async engine reports from worker threads
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                self.saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.saved = {}
+
+    def save(self) -> None:
+        with self.lock:
+            self.saved.update({host: control.to_dict() for host, control in self.hosts.items()})
+            data = json.dumps(self.saved)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def host(self, url: str) -> HostControl:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            control = HostControl(self.delay, **self.options)
+            if host in self.saved:
+                control.restore(self.saved[host])
+            self.hosts[host] = control
+        return self.hosts[host]
+
+    def set_crawl_delay(self, url: str, seconds: float) -> None:
+        with self.lock:
+            self.host(url).set_crawl_delay(seconds)
+
+    def acquire(self, url: str) -> float:
+        with self.lock:
+            try:
+                return self.host(url).acquire()
+            except HostUnavailable:
+                metrics.inc('crawl_requests_rejected_total', host=urlparse(url).netloc)
+                raise
+
+    def blocked(self, url: str) -> bool:
+        """Breaker open and not yet due for a probe: don't start crawling this host"""
+        with self.lock:
+            control = self.host(url)
+            return control.state == 'open' and time.time() < control.retry_at
+
+    def timeout(self, url: str) -> float:
+        with self.lock:
+            return self.host(url).timeout()
+
+    def get(self, session: requests.Session, url: str, headers: dict, fetch) -> requests.Response:
+        """fetch(session, url, headers, timeout) under this host's timeout, reporting the outcome (no waiting here)"""
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            response = fetch(session, url, headers, self.timeout(url))
+        except DownloadRejected:
+            with self.lock:  # The host answered fine; we just didn't want the body
+                self.host(url).record_success(time.perf_counter() - start)
+            raise
+        except requests.RequestException:
+            self._failure(host, url, None)
+            raise
+        if response.status_code in FAILURE_STATUSES:
+            self._failure(host, url, retry_after_seconds(response.headers.get('Retry-After')))
+        else:
+            with self.lock:
+                self.host(url).record_success(time.perf_counter() - start)
+        return response
+
+    def _failure(self, host: str, url: str, retry_after: Optional[float]) -> None:
+        with self.lock:
+            control = self.host(url)
+            opened = control.record_failure(retry_after)
+        if opened:
+            metrics.inc('crawl_breaker_open_total', host=host)
+            print(f"  ⛔ {host}: circuit open after {control.failures} failures, probing again in "
+                  f"{control.retry_at - time.time():.0f}s")
+            self.save()
+
+
+if __name__ == "__main__":
+    controller = HostController()
+    if not controller.saved:
+        print("No host state yet")
+    for host, saved in sorted(controller.saved.items()):
+        retry = max(0, saved['retry_at'] - time.time())
+        latency = f"{saved['latency']:.2f}s" if saved.get('latency') is not None else '-'
+        print(f"{host:<40} {saved['state']:<10} failures={saved['failures']:<3} latency={latency:<8}"
+              + (f" retry in {retry:.0f}s" if saved['state'] != 'closed' else ''))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Pluggable HTML parsing for the scraper and crawler
+selectolax or lxml when installed, BeautifulSoup's html.parser as the fallback
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        # selectolax < 1.0 only ships the Modest backend
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+BACKENDS = ['selectolax', 'lxml', 'html.parser']
+STRIP_TAGS = ['script', 'style']
+MAIN_SELECTOR = 'main, [role=main]'
+# selectolax: above this size, walk text nodes and stop at max_lines; below it one text() call is faster
+WALK_TEXT_BYTES = 256 * 1024
+# With max_lines, a larger page is parsed a prefix at a time (each PREFIX_GROWTH times longer) until it has enough text
+PREFIX_BYTES = 256 * 1024
+PREFIX_GROWTH = 4
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append('selectolax')
+    if lxml is not None:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def default_backend() -> str:
+    """HTML_PARSER env var if set and installed, otherwise the fastest available"""
+    requested = os.getenv('HTML_PARSER')
+    if requested in available_backends():
+        return requested
+    return available_backends()[0]
+
+
+def _clean_lines(texts: Iterable[str], max_lines: Optional[int]) -> List[str]:
+    """Non-blank stripped lines of the text nodes, in order; stops reading nodes once max_lines are collected"""
+    lines = []
+    for text in texts:
+        for line in text.split('\n'):
+            line = line.strip()
+            if line:
+                lines.append(line)
+                if max_lines and len(lines) >= max_lines:
+                    return lines
+    return lines
+
+
+def _selectolax_texts(regions, walk: bool) -> Iterable[str]:
+    for region in regions:
+        if not walk:
+            yield region.text(separator='\n', strip=True)
+            continue
+        for node in region.traverse(include_text=True):
+            if node.tag == '-text':
+                yield node.text_content
+
+
+def _selectolax_article_ancestor(node) -> bool:
+    parent = node.parent
+    while parent is not None:
+        if parent.tag == 'article':
+            return True
+        parent = parent.parent
+    return False
+
+
+def _parse_selectolax(html: bytes, base_url: str, max_lines: Optional[int], main_content=False) -> Dict:
+    tree = SelectolaxParser(html)
+    links = [urljoin(base_url, a.attributes['href']) for a in tree.css('a[href]') if a.attributes.get('href') is not None]
+
+    title_node = tree.css_first('title')
+    h1_node = tree.css_first('h1')
+    tree.strip_tags(STRIP_TAGS)
+
+    regions = []
+    if main_content:
+        main = tree.css_first(MAIN_SELECTOR)
+        regions = [main] if main is not None else [a for a in tree.css('article') if not _selectolax_article_ancestor(a)]
+    found_main = bool(regions)
+    if not regions:
+        regions = [tree.root] if tree.root is not None else []
+    return {
+        'title': title_node.text() if title_node is not None else None,
+        'h1': h1_node.text(strip=True) if h1_node is not None else None,
+        'lines': _clean_lines(_selectolax_texts(regions, walk=len(html) > WALK_TEXT_BYTES), max_lines),
+        'links': links,
+        'main': found_main
+    }
+
+
+def _parse_lxml(html: bytes, base_url: str, max_lines: Optional[int], main_content=False) -> Dict:
+    if isinstance(html, bytes):
+        # lxml assumes latin-1 for bytes without a <meta charset>
+        try:
+            html = html.decode('utf-8')
+        except UnicodeDecodeError:
+            html = UnicodeDammit(html, is_html=True).unicode_markup
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except Exception:
+        # Empty or non-HTML bodies
+        return {'title': None, 'h1': None, 'lines': [], 'links': [], 'main': False}
+
+    links = [urljoin(base_url, href) for href in doc.xpath('//a/@href')]
+
+    title = doc.find('.//title')
+    h1 = doc.find('.//h1')
+    for el in doc.xpath('//script|//style'):
+        el.drop_tree()
+
+    regions = []
+    if main_content:
+        regions = (doc.xpath('(//main|//*[@role="main"])[1]')
+                   or doc.xpath('//article[not(ancestor::article)]'))
+    texts = (t for region in regions or [doc] for t in region.itertext())
+    return {
+        'title': title.text if title is not None else None,
+        'h1': h1.text_content().strip() if h1 is not None else None,
+        'lines': _clean_lines(texts, max_lines),
+        'links': links,
+        'main': bool(regions)
+    }
+
+
+def _parse_html_parser(html: bytes, base_url: str, max_lines: Optional[int], main_content=False) -> Dict:
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [urljoin(base_url, a.get('href')) for a in soup.find_all('a', href=True)]
+
+    # Remove script and style
+    for script in soup(STRIP_TAGS):
+        script.decompose()
+
+    h1 = soup.find('h1')
+    regions = []
+    if main_content:
+        main = soup.select_one(MAIN_SELECTOR)
+        regions = [main] if main else [a for a in soup.find_all('article') if not a.find_parent('article')]
+    texts = (t for region in regions or [soup] for t in region.stripped_strings)
+    return {
+        'title': soup.title.string if soup.title else None,
+        'h1': h1.get_text(strip=True) if h1 else None,
+        'lines': _clean_lines(texts, max_lines),
+        'links': links,
+        'main': bool(regions)
+    }
+
+
+PARSERS = {
+    'selectolax': _parse_selectolax,
+    'lxml': _parse_lxml,
+    'html.parser': _parse_html_parser,
+}
+
+
+def parse_html(html: bytes, base_url: str, backend: Optional[str] = None, max_lines: Optional[int] = None,
+               main_content: bool = False) -> Dict:
+    """
+    Single parse pass shared by scrape_url, scrape_page and link discovery.
+    Returns title, first h1, cleaned text lines and absolute link URLs.
+    With main_content, text comes from <main>/[role=main], else the outermost
+    <article> elements, else the whole page.
+    With max_lines, parsing stops once a prefix of the page (cut before a tag) holds
+    more than max_lines lines of text: the lines are the same as from the whole page,
+    but title, h1 and links then come from that prefix only.
+    """
+    backend = backend or default_backend()
+    if backend not in available_backends():
+        raise ValueError(f"HTML parser backend '{backend}' is not installed")
+    parse = PARSERS[backend]
+    size = PREFIX_BYTES
+    while max_lines and size < len(html):
+        cut = html.rfind(b'<' if isinstance(html, bytes) else '<', 0, size)
+        if cut > 0:
+            parsed = parse(html[:cut], base_url, max_lines + 1, main_content)
+            # One line more than needed: the last line of a prefix may be cut short
+            if len(parsed['lines']) > max_lines and (parsed.pop('main') or not main_content):
+                parsed['lines'] = parsed['lines'][:max_lines]
+                return parsed
+        size *= PREFIX_GROWTH
+    parsed = parse(html, base_url, max_lines, main_content)
+    del parsed['main']
+    return parsed
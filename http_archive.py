@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+HTTP record/replay archive for deterministic, offline crawls
+Record mode stores every response (status, headers, zlib body) in a SQLite file keyed by URL;
+replay mode serves the same fetches from it with no network and no politeness delay
+"""
+
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from http_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_ARCHIVE = os.path.join(DEFAULT_CACHE_DIR, "http_archive.sqlite")
+
+# The stored body is already decoded, so these no longer describe it
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+class HttpArchive:
+    def __init__(self, path=DEFAULT_ARCHIVE, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"mode must be 'record' or 'replay', not {mode!r}")
+        if mode == 'replay' and not os.path.exists(path):
+            raise FileNotFoundError(f"No HTTP archive at {path}; record one first")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()  # Crawls may run on a worker thread (streaming mode)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, status INTEGER, reason TEXT, "
+            "headers TEXT, body BLOB, fetched_at TEXT)"
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM responses WHERE url = ?", (url,)).fetchone() is not None
+
+    def store(self, url: str, status: int, reason: str, headers, body: bytes) -> None:
+        """Keep the latest response per URL"""
+        kept = {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS}
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (url, status, reason, json.dumps(kept), zlib.compress(body, 6), datetime.now().isoformat())
+            )
+            self.db.commit()
+
+    def lookup(self, url: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, reason, headers, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body = row
+        return {'status': status, 'reason': reason, 'headers': json.loads(headers), 'body': zlib.decompress(body)}
+
+    def stats(self) -> dict:
+        with self.lock:
+            count, stored = self.db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+            raw = sum(len(zlib.decompress(body)) for body, in self.db.execute("SELECT body FROM responses"))
+        return {'responses': count, 'body_bytes': raw, 'stored_bytes': stored,
+                'file_bytes': os.path.getsize(self.path)}
+
+    def mount(self, session: requests.Session) -> None:
+        """Route the session's http(s) traffic through the archive"""
+        adapter = ArchiveAdapter(self)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+class ArchiveAdapter(BaseAdapter):
+    """Transport adapter: record passes through to the network, replay never touches it.
+    Redirects are stored hop by hop, so requests follows them the same way on replay."""
+
+    def __init__(self, archive: HttpArchive):
+        super().__init__()
+        self.archive = archive
+        self.network = HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        if not self.archive.replaying:
+            # Recording reads whole bodies, streamed or not; bounded_fetch still limits what the crawler keeps
+            response = self.network.send(request, **kwargs)
+            self.archive.store(request.url, response.status_code, response.reason, response.headers,
+                               response.content)
+            return response
+
+        entry = self.archive.lookup(request.url)
+        if entry is None:
+            raise requests.ConnectionError(f"{request.url} is not in the HTTP archive", request=request)
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(entry['body'])
+        response._content = entry['body']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.network.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ARCHIVE
+    stats = HttpArchive(path).stats()
+    ratio = stats['stored_bytes'] / stats['body_bytes'] if stats['body_bytes'] else 0
+    print(f"📦 {path}")
+    print(f"   Responses: {stats['responses']:,}")
+    print(f"   Bodies: {stats['body_bytes'] / 1e6:.1f} MB, stored {stats['stored_bytes'] / 1e6:.1f} MB ({ratio:.0%})")
+    print(f"   File size: {stats['file_bytes'] / 1e6:.1f} MB")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP validator store for incremental recrawls
+Keeps ETag, Last-Modified and content hashes per URL between hourly cycles; with a PageStore,
+the page text a 304 reuses is kept there by content hash instead of inline
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = ".crawl_cache"
+
+
+class ValidatorStore:
+    def __init__(self, path=os.path.join(DEFAULT_CACHE_DIR, "validators.json"), store=None):
+        self.path = path
+        self.store = store  # Optional PageStore holding each page's text under its content_hash
+        self.entries: Dict[str, dict] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load validators from the previous cycle"""
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def save(self) -> None:
+        """Write validators atomically so a crash never leaves a torn file"""
+        if self.store is not None:
+            for entry in self.entries.values():  # Entries written before there was a store
+                if 'content' in entry.get('page', {}):
+                    self._store_text(entry)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.entries.get(url)
+
+    def has_page(self, url: str) -> bool:
+        """True if a 304 for this URL can be answered from the stored page (its text included)"""
+        entry = self.entries.get(url)
+        if not entry or 'page' not in entry:
+            return False
+        if 'content' in entry['page']:
+            return True
+        return self.store is not None and entry.get('content_hash') in self.store
+
+    def page(self, url: str) -> dict:
+        """The page stored with a URL's validators, its text loaded from the page store"""
+        entry = self.entries[url]
+        if 'content' in entry['page']:
+            return entry['page']
+        return dict(entry['page'], content=self.store.get(entry['content_hash']))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a URL whose page can be reused on a 304"""
+        if not self.has_page(url):
+            return {}
+        entry = self.entries[url]
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url: str, response_headers, body_hash: str, content_hash: str, page: dict) -> None:
+        """Remember validators and the parsed page for the next cycle"""
+        entry = self.entries[url] = {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'body_hash': body_hash,
+            'content_hash': content_hash,
+            'page': page,
+            'checked_at': datetime.now().isoformat()
+        }
+        if self.store is not None:
+            self._store_text(entry)
+
+    def _store_text(self, entry: dict) -> None:
+        """Move the page text into the page store, keeping only its content_hash"""
+        page = dict(entry['page'])
+        entry['content_hash'] = self.store.put(page.pop('content'))
+        entry['page'] = page
+
+    def touch(self, url: str) -> None:
+        """Mark a URL as re-validated without changes"""
+        if url in self.entries:
+            self.entries[url]['checked_at'] = datetime.now().isoformat()
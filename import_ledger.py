@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Local ledger of Q&A pairs the bulk-import endpoint has confirmed
+Lets each cycle send only new or changed pairs instead of the whole corpus
+"""
+
+import hashlib
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from http_cache import DEFAULT_CACHE_DIR
+
+
+def pair_hash(pair: Dict) -> str:
+    """Stable content hash of question + answer + source_url"""
+    key = '\x1f'.join((pair['question'], pair['answer'], pair['source_url']))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ImportLedger:
+    def __init__(self, path=os.path.join(DEFAULT_CACHE_DIR, "import_ledger.txt")):
+        self.path = path
+        self.hashes = set()
+        self.load()
+
+    def load(self) -> None:
+        """Append-only file, one hash per line; survives restarts and crashes"""
+        try:
+            with open(self.path, 'r') as f:
+                self.hashes = {line.strip() for line in f if len(line.strip()) == 64}
+        except FileNotFoundError:
+            self.hashes = set()
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, pair: Dict) -> bool:
+        return pair_hash(pair) in self.hashes
+
+    def filter_new(self, pairs: Iterable[Dict]) -> Tuple[List[Dict], int]:
+        """(pairs not yet confirmed by the server, number skipped)"""
+        new, skipped = [], 0
+        for pair in pairs:
+            if pair_hash(pair) in self.hashes:
+                skipped += 1
+            else:
+                new.append(pair)
+        return new, skipped
+
+    def record(self, pairs: Iterable[Dict]) -> None:
+        """Remember server-confirmed pairs"""
+        new_hashes = [h for h in map(pair_hash, pairs) if h not in self.hashes]
+        if not new_hashes:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(''.join(h + '\n' for h in new_hashes))
+            f.flush()
+            os.fsync(f.fileno())
+        self.hashes.update(new_hashes)
+
+    def record_batch(self, result: Dict) -> None:
+        """BulkImporter on_batch callback: remember the batch's entries only if the server confirmed them"""
+        if 'error' not in result:
+            self.record(result['entries'])
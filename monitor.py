@@ -6,14 +6,17 @@ Shows pipeline status, logs, and statistics
 
 import json
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
+from telemetry import parse_prometheus
 
 class OrchestrationMonitor:
-    def __init__(self):
+    def __init__(self, prometheus_file=None):
         self.project_dir = "/Users/celeste7/MYI2"
         self.log_file = f"{self.project_dir}/orchestration.log"
         self.stats_file = f"{self.project_dir}/orchestration_stats.json"
+        self.prometheus_file = prometheus_file or f"{self.project_dir}/metrics/pipeline.prom"
     
     def get_latest_log_entries(self, n=20):
         """Get last N log entries"""
@@ -33,6 +36,57 @@ class OrchestrationMonitor:
         with open(self.stats_file, 'r') as f:
             return json.load(f)
     
+    def get_metrics(self):
+        """Samples of the last run's Prometheus file, grouped by metric name"""
+        if not os.path.exists(self.prometheus_file):
+            return None
+        
+        with open(self.prometheus_file, 'r') as f:
+            samples = parse_prometheus(f.read())
+        
+        grouped = {}
+        for name, labels, value in samples:
+            grouped.setdefault(name, []).append((labels, value))
+        return grouped
+    
+    def display_performance(self, metrics):
+        """Where the last run spent its time"""
+        def total(name, **match):
+            return sum(v for labels, v in metrics.get(name, [])
+                       if all(labels.get(k) == str(val) for k, val in match.items()))
+        
+        def quantile(name, q, **match):
+            return total(name, quantile=q, **match)
+        
+        for labels, seconds in metrics.get('stage_seconds_sum', []):
+            print(f"  Stage {labels['stage']:<10} {seconds:8.1f}s")
+        
+        hosts = sorted({labels['host'] for labels, _ in metrics.get('crawl_request_seconds_count', [])},
+                       key=lambda host: -total('crawl_request_seconds_sum', host=host))
+        if hosts:
+            print(f"\n  {'Host':<32}{'reqs':>6}{'p50':>8}{'p90':>8}{'MB':>8}  statuses")
+        for host in hosts[:10]:
+            statuses = ', '.join(f"{labels['status']}×{value:.0f}" for labels, value in metrics['crawl_requests_total']
+                                 if labels['host'] == host)
+            print(f"  {host[:31]:<32}{total('crawl_request_seconds_count', host=host):>6.0f}"
+                  f"{quantile('crawl_request_seconds', '0.5', host=host):>7.2f}s"
+                  f"{quantile('crawl_request_seconds', '0.9', host=host):>7.2f}s"
+                  f"{total('crawl_bytes_total', host=host) / 1e6:>8.1f}  {statuses}")
+        
+        parse_count = total('parse_seconds_count')
+        if parse_count:
+            print(f"\n  Parse: {parse_count:.0f} pages, {total('parse_seconds_sum') / parse_count * 1000:.1f} ms/page")
+        extract_seconds = total('extract_page_seconds_sum')
+        if extract_seconds:
+            print(f"  Extract: {total('extract_sentences_total') / extract_seconds:,.0f} sentences/s, "
+                  f"{total('extract_pairs_total'):.0f} pairs")
+            by_domain = sorted(metrics.get('extract_pairs_total', []), key=lambda item: -item[1])
+            print("  Pairs per domain: " + ', '.join(f"{labels['domain']} {value:.0f}" for labels, value in by_domain[:8]))
+        if total('import_batch_seconds_count'):
+            print(f"  Import batches: {total('import_batch_seconds_count'):.0f}, latency "
+                  f"p50 {quantile('import_batch_seconds', '0.5'):.2f}s / p90 {quantile('import_batch_seconds', '0.9'):.2f}s"
+                  f" / p99 {quantile('import_batch_seconds', '0.99'):.2f}s")
+    
     def get_database_count(self):
         """Check approximate database entry count"""
         try:
@@ -80,6 +134,13 @@ class OrchestrationMonitor:
         else:
             print("  No execution data yet (first run will create stats)")
         
+        # Performance breakdown (orchestrate.py --prometheus metrics/pipeline.prom)
+        metrics = self.get_metrics()
+        if metrics:
+            print("\n⏱️  LAST RUN PERFORMANCE:")
+            print("─" * 80)
+            self.display_performance(metrics)
+        
         # Cron Jobs
         print("\n⏰ SCHEDULED CRON JOBS:")
         print("─" * 80)
@@ -118,5 +179,5 @@ class OrchestrationMonitor:
         print("\n")
 
 if __name__ == "__main__":
-    monitor = OrchestrationMonitor()
+    monitor = OrchestrationMonitor(sys.argv[1] if len(sys.argv) > 1 else None)
     monitor.display_dashboard()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection with MinHash signatures and LSH banding
+Signatures are stable across processes and runs (no salted hash()), so they can be stored;
+lookups only compare against items sharing an LSH bucket, never the whole corpus
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+from itertools import repeat
+from operator import xor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+WORD = re.compile(r'\w+')
+
+
+def normalize_question(question: str) -> str:
+    """Case/punctuation-insensitive form of a question, used as the LSH group"""
+    return ' '.join(WORD.findall(question.lower()))
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, shingle_size=3, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Each "permutation" XORs the 64-bit shingle hashes with a fixed random mask:
+        # a bijection, so the minimum stays a valid MinHash, and map() keeps it in C
+        rng = random.Random(seed)
+        self.masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> set:
+        """Word n-grams of the lowercased text"""
+        words = WORD.findall(text.lower())
+        k = self.shingle_size
+        if len(words) <= k:
+            return {' '.join(words)}
+        return {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big')
+                  for s in self.shingles(text)]
+        return tuple(min(map(xor, hashes, repeat(mask))) >> 32 for mask in self.masks)
+
+
+def similarity(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return sum(x == y for x, y in zip(sig1, sig2)) / len(sig1)
+
+
+def fingerprint(signature: Tuple[int, ...]) -> str:
+    """Hex form of a signature, for storage"""
+    return struct.pack(f'>{len(signature)}I', *signature).hex()
+
+
+def from_fingerprint(value: str) -> Tuple[int, ...]:
+    data = bytes.fromhex(value)
+    return struct.unpack(f'>{len(data) // 4}I', data)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures. With 64 permutations in 8 bands of 8 rows,
+    pairs above ~0.77 similarity share a bucket with high probability; candidates
+    are then checked against the threshold. Items only match within the same group.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures = {}  # key -> (group, signature)
+        self.buckets = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...], group: str):
+        for band in range(self.bands):
+            yield group, band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def query(self, signature: Tuple[int, ...], group: str = '') -> Optional[Hashable]:
+        """Most similar indexed key at or above the threshold, or None"""
+        best, best_score = None, self.threshold
+        checked = set()
+        for band_key in self._band_keys(signature, group):
+            for key in self.buckets.get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                score = similarity(signature, self.signatures[key][1])
+                if score >= best_score:
+                    best, best_score = key, score
+        return best
+
+    def add(self, key: Hashable, signature: Tuple[int, ...], group: str = '') -> None:
+        self.signatures[key] = (group, signature)
+        for band_key in self._band_keys(signature, group):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def save(self, path: str) -> None:
+        data = {
+            'threshold': self.threshold, 'num_perm': self.num_perm, 'bands': self.bands,
+            'entries': [[key, group, fingerprint(sig)] for key, (group, sig) in self.signatures.items()]
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NearDuplicateIndex':
+        with open(path, 'r') as f:
+            data = json.load(f)
+        index = cls(data['threshold'], data['num_perm'], data['bands'])
+        for key, group, value in data['entries']:
+            index.add(key, from_fingerprint(value), group)
+        return index
+
+
+def qa_pair_score(pair: Dict) -> tuple:
+    """Higher is better: most confident, then the most complete answer"""
+    return pair.get('confidence', 0), len(pair['answer'])
+
+
+def source_question_key(pair: Dict) -> tuple:
+    """The bulk-import route's unique key: one row per (source_url, question)"""
+    return pair['source_url'], normalize_question(pair['question'])
+
+
+def unique_by_source_question(pairs: List[Dict], score: Callable[[Dict], tuple] = qa_pair_score) -> List[Dict]:
+    """
+    The best-scoring pair of each (source_url, question), in first-seen order. One page often
+    answers a question with several unrelated sentences; sent together, they would fail the
+    whole insert chunk on the route's unique constraint.
+    """
+    best = {}
+    for pair in pairs:
+        key = source_question_key(pair)
+        if key not in best or score(pair) > score(best[key]):
+            best[key] = pair
+    return list(best.values())
+
+
+class QAPairClusters:
+    """
+    Clusters Q&A pairs whose questions normalize to the same text and whose
+    answers are near-duplicates; keeps the best-scoring pair of each cluster.
+    Clusters before freeze() keep their best pair from then on.
+    """
+
+    def __init__(self, threshold=0.8, hasher: Optional[MinHasher] = None,
+                 score: Callable[[Dict], tuple] = qa_pair_score):
+        self.hasher = hasher or MinHasher()
+        self.index = NearDuplicateIndex(threshold, self.hasher.num_perm)
+        self.score = score
+        self.best = []  # cluster id -> representative pair
+        self.sizes = []
+        self.frozen = 0  # Clusters below this id are final: later near-duplicates only add to their size
+
+    def __len__(self) -> int:
+        return len(self.best)
+
+    def add(self, pair: Dict, signature: Optional[Tuple[int, ...]] = None) -> bool:
+        """Add a pair; True if it started a new cluster"""
+        group = normalize_question(pair['question'])
+        signature = signature or self.hasher.signature(pair['answer'])
+        cluster = self.index.query(signature, group)
+        if cluster is None:
+            self.index.add(len(self.best), signature, group)
+            self.best.append(pair)
+            self.sizes.append(1)
+            return True
+        self.sizes[cluster] += 1
+        if cluster >= self.frozen and self.score(pair) > self.score(self.best[cluster]):
+            self.best[cluster] = pair
+        return False
+
+    def freeze(self) -> None:
+        """Make every cluster so far final, e.g. once its best pair has been imported"""
+        self.frozen = len(self.best)
+
+    def representatives(self, first_cluster=0) -> List[Dict]:
+        """
+        Best pair of every cluster (from first_cluster on), in cluster creation order, with
+        at most one pair per (source_url, question)
+        """
+        return unique_by_source_question(self.best[first_cluster:], self.score)
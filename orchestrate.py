@@ -6,19 +6,29 @@ Fully automated pipeline with error handling and logging
 """
 
 import json
-import subprocess
+import signal
 import sys
 import time
 from datetime import datetime
-import requests
 import os
 from dotenv import load_dotenv
+from bulk_importer import BulkImporter
+from deep_crawl_all import CRAWL_FILE, DOMAINS, crawl_all
+from import_ledger import ImportLedger
+from pipeline_runner import PipelineRunner
+from qa_record import load_records, to_json
+from qa_search import QASearchIndex
+from streaming_pipeline import StreamingPipeline
+from telemetry import METRICS_DIR, metrics
 
 # Load environment variables from .env.local
 load_dotenv(dotenv_path="client/.env.local")
 
 class YachtInsuranceOrchestrator:
-    def __init__(self):
+    def __init__(self, stream=False, prometheus_file=None, sitemaps=False):
+        self.stream = stream  # Overlap crawl, extraction and import instead of running them in sequence
+        self.sitemaps = sitemaps  # Seed crawls from robots.txt/sitemaps, fetching only changed URLs
+        self.prometheus_file = prometheus_file  # Optional text exposition file for monitor.py / node_exporter
         # Use SUPABASE_SERVICE_ROLE_KEY for authentication (replaces deprecated SCRAPER_API_KEY)
         self.api_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         if not self.api_key:
@@ -44,42 +54,37 @@ class YachtInsuranceOrchestrator:
         with open(self.log_file, 'a') as f:
             f.write(log_msg + "\n")
     
-    def step_1_scrape(self):
-        """Step 1: Run deep web crawler"""
+    def step_1_scrape(self, checkpoint):
+        """Step 1: Run deep web crawler in-process, resuming after the last finished domain"""
         self.log("=" * 80)
         self.log("STEP 1: DEEP CRAWLING WEB SOURCES", "START")
         self.log("=" * 80)
 
         try:
-            result = subprocess.run(
-                ["python3", "deep_crawl_all.py"],
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minutes for deep crawl
-            )
-
-            if result.returncode == 0:
-                self.log("✅ Deep crawling completed successfully")
-                # Parse output to get page count
-                if "TOTAL PAGES SCRAPED:" in result.stdout:
-                    for line in result.stdout.split('\n'):
-                        if "TOTAL PAGES SCRAPED:" in line:
-                            parts = line.split(":")[-1].strip()
-                            self.stats["scrape_sources"] = int(parts) if parts.isdigit() else 0
-                self.log(f"   Pages crawled: {self.stats['scrape_sources']}")
-                return True
-            else:
-                self.log(f"❌ Deep crawling failed: {result.stderr}", "ERROR")
-                return False
+            domains_done = checkpoint.get("domains_done", [])
+            if domains_done:
+                self.log(f"   Resuming: {len(domains_done)} domains already crawled")
+
+            def on_domain(summary):
+                domains_done.append(summary["domain"])
+                checkpoint.update(domains_done=domains_done)
+
+            totals = crawl_all(DOMAINS, CRAWL_FILE, resume_domains=domains_done, on_domain=on_domain,
+                               sitemaps=self.sitemaps)
+
+            self.log("✅ Deep crawling completed successfully")
+            self.stats["scrape_sources"] = totals["pages"]
+            self.stats["pages_fresh"] = totals["fresh"]
+            self.stats["pages_reused"] = totals["pages"] - totals["fresh"]
+            self.log(f"   Pages crawled: {self.stats['scrape_sources']}")
+            self.log(f"   Fresh: {self.stats['pages_fresh']}, reused (unchanged): {self.stats['pages_reused']}")
+            return True
 
-        except subprocess.TimeoutExpired:
-            self.log("❌ Deep crawling timeout (>600s)", "ERROR")
-            return False
         except Exception as e:
             self.log(f"❌ Deep crawling error: {str(e)}", "ERROR")
             return False
     
-    def step_2_extract(self):
+    def step_2_extract(self, checkpoint):
         """Step 2: Extract Q&A pairs from deep crawl results"""
         self.log("")
         self.log("=" * 80)
@@ -88,23 +93,35 @@ class YachtInsuranceOrchestrator:
 
         try:
             # Use the DeepCrawlQAExtractor directly
-            from extract_from_deep_crawl import DeepCrawlQAExtractor
+            from extract_from_deep_crawl import EXTRACTION_VERSION, DeepCrawlQAExtractor
+            from extraction_cache import ExtractionCache
+            from parallel_extract import default_workers
+            from boilerplate import BoilerplateStore
+            from page_store import PageStore
 
             self.log("   Initializing deep crawl Q&A extractor...")
-            extractor = DeepCrawlQAExtractor()
+            extractor = DeepCrawlQAExtractor(workers=default_workers(), boilerplate=BoilerplateStore(),
+                                             store=PageStore(), cache=ExtractionCache(EXTRACTION_VERSION))
 
             self.log("   Processing crawl results...")
-            qa_pairs = extractor.process_crawl_results('all_domains_crawl.json')
+            try:
+                qa_pairs = extractor.process_crawl_results(CRAWL_FILE)
+            finally:
+                extractor.cache.close()
 
             self.log(f"✅ Q&A extraction completed successfully")
             self.stats["qa_extracted"] = len(qa_pairs)
             self.log(f"   Q&A pairs extracted: {self.stats['qa_extracted']}")
 
-            # Save to file for import step
-            with open('all_domains_qa.json', 'w') as f:
-                json.dump(qa_pairs, f, indent=2)
+            # Save to file for import step; atomic, so a resumed run never imports a torn file
+            with open('all_domains_qa.json.tmp', 'w') as f:
+                json.dump(qa_pairs, f, indent=2, default=to_json)
+            os.replace('all_domains_qa.json.tmp', 'all_domains_qa.json')
 
             self.log("   Saved to all_domains_qa.json")
+
+            added = QASearchIndex().add(qa_pairs)
+            self.log(f"   Search index: {added} new pairs")
             return True
 
         except FileNotFoundError as e:
@@ -114,8 +131,8 @@ class YachtInsuranceOrchestrator:
             self.log(f"❌ Extraction error: {str(e)}", "ERROR")
             return False
     
-    def step_3_import(self):
-        """Step 3: Import to database via API in batches"""
+    def step_3_import(self, checkpoint):
+        """Step 3: Import to database via API in batches; the import ledger is the per-batch checkpoint"""
         self.log("")
         self.log("=" * 80)
         self.log("STEP 3: IMPORTING TO DATABASE", "START")
@@ -123,68 +140,39 @@ class YachtInsuranceOrchestrator:
 
         try:
             # Load Q&A pairs
-            with open("all_domains_qa.json", "r") as f:
-                qa_entries = json.load(f)
+            qa_entries = load_records("all_domains_qa.json")
 
             if not qa_entries:
                 self.log("⚠️  No Q&A entries to import", "WARN")
                 return True
 
+            self.log(f"   Total entries extracted: {len(qa_entries)}")
+
+            # Only send pairs the server has not already confirmed
+            ledger = ImportLedger()
+            qa_entries, skipped = ledger.filter_new(qa_entries)
+            self.stats["skipped_locally"] = skipped
+            self.log(f"   Skipped locally (already imported): {skipped}")
             self.log(f"   Total entries to import: {len(qa_entries)}")
 
-            # Import in batches of 100
-            batch_size = 100
-            total_imported = 0
-            total_duplicates = 0
-            batch_num = 1
-
-            headers = {
-                "x-api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
-
-            for i in range(0, len(qa_entries), batch_size):
-                batch = qa_entries[i:i+batch_size]
-                payload = {
-                    "entries": batch,
-                    "dryRun": False
-                }
-
-                try:
-                    response = requests.post(
-                        self.api_url,
-                        json=payload,
-                        headers=headers,
-                        timeout=60
-                    )
-
-                    if response.status_code == 200:
-                        result = response.json()
-                        imported = result.get('imported', 0)
-                        duplicates = result.get('duplicates', 0)
-                        total_imported += imported
-                        total_duplicates += duplicates
-                        self.log(f"   [Batch {batch_num}] ({i+1}-{min(i+batch_size, len(qa_entries))}) ✅ {imported} imported, {duplicates} duplicates")
-                    else:
-                        self.log(f"   [Batch {batch_num}] ❌ Status {response.status_code}")
-                        # Print error response for debugging
-                        try:
-                            error_detail = response.json()
-                            self.log(f"       Error: {error_detail.get('error', response.text[:100])}")
-                        except:
-                            self.log(f"       Response: {response.text[:100]}")
-                        if "duplicate key" not in response.text:
-                            self.stats["failed"] += len(batch)
-
-                except Exception as e:
-                    self.log(f"   [Batch {batch_num}] ❌ Error: {str(e)}")
-
-                batch_num += 1
-
-            self.stats["imported"] = total_imported
-            self.log(f"\n✅ Import completed: {total_imported} new entries imported")
-            if total_duplicates > 0:
-                self.log(f"   ({total_duplicates} duplicates skipped)")
+            if not qa_entries:
+                self.log("✅ Nothing new to import")
+                return True
+
+            # Pooled, concurrent batches with retry/backoff; permanent failures go to the dead-letter file
+            importer = BulkImporter(self.api_url, self.api_key, log=self.log)
+            result = importer.import_entries(qa_entries, on_batch=ledger.record_batch)
+
+            self.stats["imported"] = result["imported"]
+            self.stats["failed"] = result["failed"]
+            self.log(f"\n✅ Import completed: {result['imported']} new entries imported")
+            if result["duplicates"] > 0:
+                self.log(f"   ({result['duplicates']} duplicates skipped)")
+            if result["retries"] > 0:
+                self.log(f"   ({result['retries']} retried requests)")
+            if result["dead_lettered"] > 0:
+                self.log(f"   ⚠️  {result['failed']} entries in {result['dead_lettered']} batches written to "
+                         f"{importer.dead_letter_file}", "WARN")
             return True
 
         except FileNotFoundError:
@@ -194,6 +182,72 @@ class YachtInsuranceOrchestrator:
             self.log(f"❌ Import error: {str(e)}", "ERROR")
             return False
     
+    def step_stream(self, checkpoint):
+        """Crawl, extract and import concurrently through bounded queues"""
+        self.log("=" * 80)
+        self.log("STREAMING: CRAWL → EXTRACT → IMPORT", "START")
+        self.log("=" * 80)
+
+        from extract_from_deep_crawl import EXTRACTION_VERSION, DeepCrawlQAExtractor
+        from extraction_cache import ExtractionCache
+        from parallel_extract import default_workers
+        from boilerplate import BoilerplateStore
+
+        domains_done = checkpoint.get("domains_done", [])
+        if domains_done:
+            self.log(f"   Resuming: {len(domains_done)} domains already crawled and imported")
+
+        def on_domain(summary):
+            # Called by the pipeline once the importer confirmed every pair of the domain
+            domains_done.append(summary["domain"])
+            checkpoint.update(domains_done=domains_done)
+
+        def produce(emit_page, stop):
+            totals = crawl_all(DOMAINS, CRAWL_FILE, resume_domains=domains_done, on_domain=pipeline.crawled_domain,
+                               on_page=emit_page, stop=stop, sitemaps=self.sitemaps)
+            self.stats["scrape_sources"] = totals["pages"]
+            self.stats["pages_fresh"] = totals["fresh"]
+            self.stats["pages_reused"] = totals["pages"] - totals["fresh"]
+
+        # Pages are stripped with the previous crawl's boilerplate counts: this crawl's are not final yet
+        extractor = DeepCrawlQAExtractor(workers=default_workers(), boilerplate=BoilerplateStore(),
+                                         cache=ExtractionCache(EXTRACTION_VERSION))
+        importer = BulkImporter(self.api_url, self.api_key, log=self.log)
+        pipeline = StreamingPipeline(extractor, importer, ImportLedger(), log=self.log,
+                                     search_index=QASearchIndex(), on_domain=on_domain)
+
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: pipeline.stop())
+        try:
+            result = pipeline.run(produce)
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            extractor.cache.close()
+
+        self.stats["qa_extracted"] = result["pairs"]
+        self.stats["skipped_locally"] = result["skipped_locally"]
+        self.stats["imported"] = result.get("imported", 0)
+        self.stats["failed"] = result.get("failed", 0)
+        if result["first_import_seconds"] is not None:
+            self.log(f"   First batch confirmed after {result['first_import_seconds']:.1f}s")
+        self.log(f"   Pages: {result['pages']}, new pairs: {result['pairs']}, "
+                 f"imported: {self.stats['imported']}, failed: {self.stats['failed']}")
+
+        for stage, error in pipeline.errors:
+            self.log(f"❌ Streaming {stage} error: {str(error)}", "ERROR")
+        if pipeline.stop_event.is_set():
+            # Stopped or failed: the manifest keeps this run open so the next one resumes it
+            self.log("⚠️  Streaming run stopped early; queued work was drained", "WARN")
+            return False
+        return True
+
+    def save_metrics(self, run_id):
+        """Per-run metrics JSON (plus the Prometheus file when enabled)"""
+        path = os.path.join(METRICS_DIR, f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        metrics.write_json(path, {"run_id": run_id, "stats": self.stats})
+        self.log(f"   Metrics written to {path}")
+        if self.prometheus_file:
+            metrics.write_prometheus(self.prometheus_file)
+
     def run_pipeline(self):
         """Execute full pipeline"""
         self.log("\n")
@@ -204,18 +258,24 @@ class YachtInsuranceOrchestrator:
         self.log("╚" + "=" * 78 + "╝")
         
         start_time = time.time()
+        metrics.reset()
         
-        # Execute pipeline steps
-        if not self.step_1_scrape():
-            self.log("\n❌ PIPELINE FAILED AT STEP 1", "ERROR")
-            return False
-        
-        if not self.step_2_extract():
-            self.log("\n❌ PIPELINE FAILED AT STEP 2", "ERROR")
-            return False
-        
-        if not self.step_3_import():
-            self.log("\n❌ PIPELINE FAILED AT STEP 3", "ERROR")
+        # Execute pipeline stages; a failed or killed run resumes where it stopped
+        if self.stream:
+            stages = [("stream", self.step_stream)]
+        else:
+            stages = [
+                ("crawl", self.step_1_scrape),
+                ("extract", self.step_2_extract),
+                ("import", self.step_3_import),
+            ]
+        runner = PipelineRunner(stages, stats=self.stats, log=self.log)
+        try:
+            ok = runner.run()
+        finally:
+            self.save_metrics(runner.manifest["run_id"])
+        if not ok:
+            self.log(f"\n❌ PIPELINE FAILED AT STAGE '{runner.failed_stage}'", "ERROR")
             return False
         
         # Success
@@ -230,9 +290,11 @@ class YachtInsuranceOrchestrator:
         # Summary
         self.log("")
         self.log("SUMMARY:")
-        self.log(f"  ✅ Sources scraped: {self.stats['scrape_sources']}")
+        self.log(f"  ✅ Sources scraped: {self.stats['scrape_sources']} "
+                 f"({self.stats.get('pages_fresh', 0)} fresh, {self.stats.get('pages_reused', 0)} reused)")
         self.log(f"  ✅ Q&A pairs extracted: {self.stats['qa_extracted']}")
         self.log(f"  ✅ Entries imported: {self.stats['imported']}")
+        self.log(f"  ♻️  Skipped locally (already imported): {self.stats.get('skipped_locally', 0)}")
         self.log(f"  ⏱️  Total execution time: {elapsed:.1f} seconds")
         self.log(f"  📊 Entries/minute: {(self.stats['imported'] / (elapsed / 60)):.0f}")
         
@@ -245,6 +307,8 @@ class YachtInsuranceOrchestrator:
         return True
 
 if __name__ == "__main__":
-    orchestrator = YachtInsuranceOrchestrator()
+    prometheus_file = sys.argv[sys.argv.index('--prometheus') + 1] if '--prometheus' in sys.argv else None
+    orchestrator = YachtInsuranceOrchestrator(stream='--stream' in sys.argv, prometheus_file=prometheus_file,
+                                              sitemaps='--sitemaps' in sys.argv)
     success = orchestrator.run_pipeline()
     sys.exit(0 if success else 1)
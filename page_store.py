@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, compressed page store
+Page text is stored once per content hash (the md5 the crawler and scraper already compute),
+zstd- or gzip-compressed in sharded blob files, with an index of URL → latest hash → crawl times
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from http_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_PAGE_DIR = os.path.join(DEFAULT_CACHE_DIR, "pages")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+class PageStore:
+    def __init__(self, root=DEFAULT_PAGE_DIR, codec=None):
+        self.root = root
+        # New blobs use zstd when installed; existing blobs are read by their extension either way
+        self.codec = codec or ('zst' if zstandard is not None else 'gz')
+        if self.codec == 'zst' and zstandard is None:
+            raise ValueError("zstd page blobs need the zstandard package")
+        self.index_path = os.path.join(root, "index.json")
+        self.index: Dict[str, dict] = {}  # url -> {'hash': latest, 'versions': {hash: {first, last, crawls}}}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def save(self) -> None:
+        """Write the index atomically; blobs are already on disk"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{codec}")
+
+    def _find(self, digest: str) -> Optional[str]:
+        for codec in ('zst', 'gz'):
+            path = self._blob_path(digest, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def __contains__(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+    def put(self, content: str) -> str:
+        """Store page text once; returns its content hash"""
+        digest = content_hash(content)
+        if self._find(digest):
+            return digest
+
+        data = content.encode()
+        if self.codec == 'zst':
+            blob = zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            blob = gzip.compress(data, compresslevel=6, mtime=0)
+        path = self._blob_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Page text for a content hash"""
+        path = self._find(digest)
+        if path is None:
+            raise KeyError(f"No page blob for {digest} in {self.root}")
+        with open(path, 'rb') as f:
+            blob = f.read()
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError(f"{path} is zstd-compressed; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(blob).decode()
+        return gzip.decompress(blob).decode()
+
+    def record(self, url: str, content: str, crawled_at: Optional[str] = None) -> str:
+        """Store a crawled page and note the crawl in the URL index; returns the content hash"""
+        digest = self.put(content)
+        crawled_at = crawled_at or datetime.now().isoformat()
+        entry = self.index.setdefault(url, {'hash': digest, 'versions': {}})
+        entry['hash'] = digest
+        version = entry['versions'].setdefault(digest, {'first': crawled_at, 'last': crawled_at, 'crawls': 0})
+        version['last'] = crawled_at
+        version['crawls'] += 1
+        return digest
+
+    def latest(self, url: str) -> Optional[str]:
+        entry = self.index.get(url)
+        return entry['hash'] if entry else None
+
+    def stats(self) -> dict:
+        blobs = stored = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(('.zst', '.gz')):
+                    blobs += 1
+                    stored += os.path.getsize(os.path.join(directory, name))
+        crawls = sum(v['crawls'] for entry in self.index.values() for v in entry['versions'].values())
+        return {'urls': len(self.index), 'crawls': crawls, 'blobs': blobs, 'stored_bytes': stored}
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PAGE_DIR
+    stats = PageStore(root).stats()
+    print(f"📦 {root}")
+    print(f"   URLs: {stats['urls']:,} ({stats['crawls']:,} crawls)")
+    print(f"   Blobs: {stats['blobs']:,}, {stats['stored_bytes'] / 1e6:.1f} MB")
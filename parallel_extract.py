@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Process-pool helper for Q&A extraction
+Shards pages across worker processes and yields results in input order
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def ordered_pool_map(fn: Callable, items: Iterable, workers: Optional[int] = None,
+                     chunk_size=8, window=4, initializer: Optional[Callable] = None) -> Iterator:
+    """
+    Like map(fn, items) but across processes. Results come back in input
+    order so callers can dedup exactly as the serial path does. At most
+    workers * window chunks are in flight, so a streamed input is never
+    loaded into memory in full. initializer() runs once per worker process
+    (in this process on the serial path) before its first task.
+    """
+    workers = workers or default_workers()
+    if workers <= 1:
+        if initializer:
+            initializer()
+        yield from map(fn, items)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        pending = deque()
+        chunk = []
+
+        def drain(limit: int) -> Iterator:
+            while len(pending) > limit:
+                yield from pending.popleft().result()
+
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                pending.append(pool.submit(_run_chunk, fn, chunk))
+                chunk = []
+                yield from drain(workers * window)
+        if chunk:
+            pending.append(pool.submit(_run_chunk, fn, chunk))
+        yield from drain(0)
+
+
+def _run_chunk(fn: Callable, chunk: list) -> list:
+    return [fn(item) for item in chunk]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+In-process stage runner with a checkpoint manifest
+Each stage is a callable taking its Checkpoint and returning True on success.
+A run that fails or is killed resumes at the first unfinished stage, and each stage
+can resume from its own checkpoint (last finished domain, confirmed batches, ...)
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from http_cache import DEFAULT_CACHE_DIR
+from telemetry import metrics
+
+
+class Checkpoint:
+    """A stage's progress, written to the manifest on every update"""
+
+    def __init__(self, runner: 'PipelineRunner', stage: str):
+        self.runner = runner
+        self.stage = stage
+
+    @property
+    def data(self) -> Dict:
+        return self.runner.manifest['stages'][self.stage]['checkpoint']
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def update(self, **values) -> None:
+        self.data.update(values)
+        self.runner.save_manifest()
+
+
+class PipelineRunner:
+    def __init__(self, stages: List[Tuple[str, Callable[[Checkpoint], bool]]],
+                 manifest_path=os.path.join(DEFAULT_CACHE_DIR, "pipeline_manifest.json"),
+                 stats: Dict = None, log=print):
+        self.stages = stages
+        self.manifest_path = manifest_path
+        self.stats = stats if stats is not None else {}  # Saved with the manifest, restored on resume
+        self.log = log
+        self.failed_stage = None
+        self.manifest = self.load_manifest()
+
+    def new_manifest(self) -> Dict:
+        return {
+            'run_id': uuid.uuid4().hex[:12],
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'stages': {},
+            'stats': {}
+        }
+
+    def load_manifest(self) -> Dict:
+        """The unfinished run to resume, or a new one"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self.new_manifest()
+        if manifest.get('status') == 'done':
+            return self.new_manifest()
+        self.stats.update(manifest.get('stats', {}))
+        return manifest
+
+    def save_manifest(self) -> None:
+        """Atomic write, so a crash never leaves a torn manifest"""
+        self.manifest['stats'] = self.stats
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.manifest['stages'])
+
+    def run(self) -> bool:
+        """Run the stages in order, skipping those an interrupted run already finished"""
+        if self.resumed:
+            self.log(f"♻️  Resuming run {self.manifest['run_id']} from {self.manifest['started_at']}")
+
+        for name, stage in self.stages:
+            entry = self.manifest['stages'].setdefault(name, {'status': 'pending', 'checkpoint': {}})
+            if entry['status'] == 'done':
+                self.log(f"⏭️  Stage '{name}' already completed at {entry['finished_at']}")
+                continue
+
+            entry['status'] = 'running'
+            entry['started_at'] = datetime.now().isoformat()
+            self.save_manifest()
+            try:
+                with metrics.timer('stage_seconds', stage=name):
+                    ok = stage(Checkpoint(self, name))
+            except BaseException:
+                entry['status'] = 'failed'
+                self.failed_stage = name
+                self.save_manifest()
+                raise
+            entry['status'] = 'done' if ok else 'failed'
+            entry['finished_at'] = datetime.now().isoformat()
+            self.save_manifest()
+            if not ok:
+                self.failed_stage = name
+                return False
+
+        self.manifest['status'] = 'done'
+        self.manifest['finished_at'] = datetime.now().isoformat()
+        self.save_manifest()
+        return True
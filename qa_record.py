@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory Q&A pair
+A slotted record instead of a dict per pair: domain, source URL and tag strings are interned
+and every distinct tag list is one shared tuple, so 100k pairs from a few hundred pages hold
+each of them once. Reads like the pair dict (pair['question'], pair.get('tags')) and
+serializes back to exactly the same JSON object.
+"""
+
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FIELDS = ('question', 'answer', 'source_url', 'domain', 'confidence', 'tags', 'created_at')
+REQUIRED_FIELDS = FIELDS[:3]
+
+_tag_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def shared_tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    """The one tuple instance for this tag list (tags interned)"""
+    key = tuple(tags)
+    shared = _tag_sets.get(key)
+    if shared is None:
+        shared = tuple(map(sys.intern, key))
+        _tag_sets[shared] = shared
+    return shared
+
+
+def shared_layout(keys: Iterable[str]) -> Tuple[str, ...]:
+    """The one tuple instance for this key order"""
+    key = tuple(keys)
+    return _layouts.setdefault(key, key)
+
+
+class QARecord:
+    __slots__ = FIELDS + ('layout', 'extra')
+
+    def __init__(self, question: str, answer: str, source_url: str, domain: Optional[str] = None,
+                 confidence: Optional[float] = None, tags: Optional[Iterable[str]] = None,
+                 created_at: Optional[str] = None):
+        for field, value in zip(REQUIRED_FIELDS, (question, answer, source_url)):
+            if not isinstance(value, str):
+                raise ValueError(f"Q&A pair needs a string '{field}', got {value!r}")
+        self.question = question
+        self.answer = answer
+        self.source_url = sys.intern(source_url)
+        self.domain = sys.intern(domain) if domain is not None else None
+        self.confidence = confidence
+        self.tags = shared_tags(tags) if tags is not None else None
+        self.created_at = created_at
+        # Keys in JSON order (shared); optional fields passed as None are absent
+        self.layout = shared_layout(REQUIRED_FIELDS + tuple(
+            field for field, value in zip(FIELDS[3:], (domain, confidence, tags, created_at)) if value is not None))
+        self.extra: Optional[Dict[str, Any]] = None  # Keys outside FIELDS, and tags that are not a list
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QARecord':
+        """A pair from its JSON object; key order, null fields and unknown keys are kept as they were"""
+        for field in REQUIRED_FIELDS:
+            if data.get(field) is None:
+                raise ValueError(f"Q&A pair is missing '{field}': {data!r:.200}")
+        tags = data.get('tags')
+        record = cls(data['question'], data['answer'], data['source_url'], data.get('domain'),
+                     data.get('confidence'), tags if isinstance(tags, list) else None, data.get('created_at'))
+        extra = {key: value for key, value in data.items()
+                 if key not in FIELDS or (key == 'tags' and not isinstance(value, (list, type(None))))}
+        record.layout = shared_layout(data)
+        record.extra = extra or None
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The pair's JSON object: its keys in their original order, tags as a list"""
+        data = {}
+        for key in self.layout:
+            if self.extra and key in self.extra:
+                data[key] = self.extra[key]
+            elif key == 'tags' and self.tags is not None:
+                data[key] = list(self.tags)
+            else:
+                data[key] = getattr(self, key)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        """Like the pair dict: a null field reads as None, an absent one raises KeyError"""
+        if key not in self.layout:
+            raise KeyError(key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, QARecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # Mutable, like the dict it replaces
+
+    def __repr__(self) -> str:
+        return f"QARecord({self.to_dict()!r})"
+
+
+def as_dict(pair) -> Dict[str, Any]:
+    """A pair's JSON object, whether it is a QARecord or already a dict"""
+    return pair.to_dict() if isinstance(pair, QARecord) else pair
+
+
+def to_json(obj) -> Dict[str, Any]:
+    """json.dump(..., default=to_json): records are converted one at a time while writing"""
+    if isinstance(obj, QARecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _record_hook(data: Dict[str, Any]):
+    """Objects with a question and an answer are pairs (a missing source_url is a ValueError)"""
+    return QARecord.from_dict(data) if 'question' in data and 'answer' in data else data
+
+
+def load_records(path: str) -> List:
+    """A Q&A JSON file as records; each object is converted as soon as it is parsed"""
+    with open(path, 'r') as f:
+        return json.load(f, object_hook=_record_hook)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else 'all_domains_qa.json'
+    with open(path, 'r') as f:
+        original = json.load(f)
+    records = load_records(path)
+    lossless = json.dumps(records, default=to_json) == json.dumps(original)
+    print(f"📦 {path}: {len(records):,} pairs, {len(_tag_sets)} distinct tag lists, "
+          f"round trip {'lossless ✅' if lossless else 'CHANGED ❌'}")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Compiled rule engine for Q&A question generation
+Rules are declared as data; extract_qa.py and extract_from_deep_crawl.py share one engine.
+Every keyword test of a rule set runs as a single combined regex pass per sentence.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List, Set
+
+# Rule kinds:
+#   regex          pattern matched with re.search; question template uses stripped groups {1}, {2}...
+#                  optional: 'max_words': (group, n), 'group_contains': (group, text), 'keywords': [...]
+#                  ('keywords' additionally requires any of them in the lowercased sentence)
+#                  'requires' is a cheap regex that must match for 'pattern' to be able to match;
+#                  it only skips the (backtracking-heavy) full search, never changes the result
+#   first_keyword  first keyword (in list order) found in the lowercased sentence -> template {keyword}
+#   each_keyword   every keyword found -> its own question
+#   prefix         sentence starts with one of 'prefixes' -> sentence.rstrip('?') + '?'
+
+DEEP_CRAWL_RULES = {
+    'rules': [
+        # Pattern 1: "X is/means Y"
+        {'kind': 'regex', 'pattern': r'(.+?)\s+(?:is|means?|refers to|defined as)\s+(.+)',
+         'requires': r'\s(?:is|means?|refers to|defined as)\s',
+         'ignorecase': True, 'questions': ['What is {1}?']},
+        # Pattern 2: "Insurance/coverage covers X"
+        {'kind': 'regex', 'pattern': r'(Insurance|Coverage|Policy|Yacht|Boat|Marine).+?covers?(.+)',
+         'keywords': ['cover'],
+         'ignorecase': True, 'questions': ['What does coverage include?']},
+        # Pattern 3: "You should/must X"
+        {'kind': 'regex', 'pattern': r'(?:You should|You must|Required|Important|Essential).+',
+         'ignorecase': True, 'questions': ['What are the requirements?']},
+        # Pattern 4: Numbers with keywords
+        {'kind': 'regex', 'pattern': r'\$\d+|£\d+|€\d+|\d+%',
+         'keywords': ['cost', 'premium', 'price', 'fee', 'deductible'],
+         'questions': ['What is the cost?']},
+        # Pattern 5: Insurance-specific keywords
+        {'kind': 'first_keyword',
+         'keywords': ['liability', 'deductible', 'premium', 'claim', 'coverage', 'policy', 'insured', 'exclude', 'condition'],
+         'question': 'What about {keyword}?'},
+        # Pattern 6: How/Why questions
+        {'kind': 'prefix', 'prefixes': ['How', 'Why', 'When', 'Where', 'What']},
+    ],
+}
+
+SCRAPED_RULES = {
+    'rules': [
+        # Pattern 1: "X is/means/refers to Y" → "What is X?"
+        {'kind': 'regex', 'pattern': r'([\w\s]+)\s+(?:is|means|refers to|represents)\s+(.+)',
+         'requires': r'\s(?:is|means|refers to|represents)\s',
+         'max_words': (1, 3),
+         'questions': ['What is {1}?', 'What does {1} mean in yacht insurance?']},
+        # Pattern 2: "Yacht insurance covers/includes X" → "What does yacht insurance cover?"
+        {'kind': 'regex', 'pattern': r'([A-Za-z\s]+)\s+(?:covers|includes|provides)\s+(.+)',
+         'requires': r'\s(?:covers|includes|provides)\s',
+         'keywords': ['insurance'],
+         'group_contains': (1, 'insurance'),
+         'questions': ['What does {1} cover?']},
+        # Pattern 3: "You should/must X" → "Should I X?"
+        {'kind': 'regex', 'pattern': r'You\s+(?:should|must|need to)\s+(.+)',
+         'questions': ['Should I {1}?']},
+        # Pattern 4: "The cost/price of X is Y" → "How much does X cost?"
+        {'kind': 'regex', 'pattern': r'(?:cost|price|expense)\s+(?:of|for)\s+([A-Za-z\s]+)\s+is\s+(.+)',
+         'questions': ['How much does {1} cost?']},
+        # Pattern 5: General question from keywords
+        {'kind': 'each_keyword', 'questions': {
+            'deductible': 'What is a deductible?',
+            'premium': 'What is an insurance premium?',
+            'liability': 'What is liability coverage?',
+        }},
+    ],
+    'question_words': (5, 15),
+}
+
+TEMPLATE_FIELD = re.compile(r'\{(\d+)\}')
+# Bump when QARuleEngine's matching or SentenceRanker's scoring logic changes; data is hashed by rules_version()
+ENGINE_REVISION = 1
+
+RELEVANCE_KEYWORDS = [
+    'insurance', 'coverage', 'policy', 'premium', 'claim', 'deductible',
+    'liability', 'hull', 'yacht', 'boat', 'marine', 'vessel', 'protection',
+    'damage', 'loss', 'risk', 'protect', 'insure', 'broker', 'underwriter'
+]
+
+# Insurance-domain term profile for TF-IDF sentence ranking (sentence_ranking.py).
+# A word matches every profile term it starts with: 'claim' scores 'claims', 'insure' scores 'insurer'
+DOMAIN_PROFILE = {
+    **{keyword: 1.0 for keyword in RELEVANCE_KEYWORDS},
+    **{term: 2.0 for term in ['insurance', 'insure', 'coverage', 'policy', 'premium', 'deductible',
+                              'liability', 'claim', 'underwriter', 'hull', 'exclusion', 'endorsement']},
+    **{term: 1.0 for term in ['cover', 'cost', 'price', 'salvage', 'survey', 'theft', 'storm', 'hurricane',
+                              'navigation', 'agreed', 'valuation', 'uninsured', 'towing', 'wreck']},
+}
+
+
+def rules_version(*parts) -> str:
+    """Short hash of rule data (and anything else passed): editing any rule gives a new version"""
+    data = json.dumps([ENGINE_REVISION, *parts], sort_keys=True, default=sorted)
+    return hashlib.md5(data.encode()).hexdigest()[:12]
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword occurring in a (lowercased) text with one regex pass.
+    A lookahead alternation reports the longest keyword starting at each
+    position; shorter keywords that are prefixes of it are implied, so the
+    result equals {k for k in keywords if k in text}.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords))
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))') if ordered else None
+        self.any_pattern = re.compile('|'.join(map(re.escape, ordered))) if ordered else None
+        self.implied = {k: [p for p in self.keywords if p != k and k.startswith(p)] for k in self.keywords}
+
+    def find(self, text: str) -> Set[str]:
+        if self.pattern is None:
+            return set()
+        found = set()
+        for match in self.pattern.finditer(text):
+            keyword = match.group(1)
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.implied[keyword])
+        return found
+
+    def any(self, text: str) -> bool:
+        return self.any_pattern is not None and self.any_pattern.search(text) is not None
+
+
+class QARuleEngine:
+    def __init__(self, ruleset: Dict):
+        self.ruleset = ruleset
+        self.question_words = ruleset.get('question_words')
+        self.rules = []
+        keywords = []
+
+        for rule in ruleset['rules']:
+            compiled = dict(rule)
+            if rule['kind'] == 'regex':
+                flags = re.IGNORECASE if rule.get('ignorecase') else 0
+                compiled['regex'] = re.compile(rule['pattern'], flags)
+                compiled['requires'] = re.compile(rule['requires'], flags) if 'requires' in rule else None
+                keywords.extend(rule.get('keywords', []))
+            elif rule['kind'] == 'first_keyword':
+                keywords.extend(rule['keywords'])
+            elif rule['kind'] == 'each_keyword':
+                keywords.extend(rule['questions'])
+            elif rule['kind'] == 'prefix':
+                compiled['prefixes'] = tuple(rule['prefixes'])
+            else:
+                raise ValueError(f"Unknown rule kind: {rule['kind']}")
+            self.rules.append(compiled)
+
+        # One matcher over the keywords of every rule
+        self.matcher = KeywordMatcher(keywords)
+        self.needs_keywords = bool(keywords)
+
+    @staticmethod
+    def _render(template: str, groups: List[str]) -> str:
+        return TEMPLATE_FIELD.sub(lambda m: groups[int(m.group(1))], template)
+
+    def questions(self, sentence: str) -> List[str]:
+        """Questions generated for a sentence, in rule order"""
+        found = self.matcher.find(sentence.lower()) if self.needs_keywords else set()
+        questions = []
+
+        for rule in self.rules:
+            kind = rule['kind']
+            if kind == 'regex':
+                # Cheap necessary conditions first
+                if 'keywords' in rule and not any(k in found for k in rule['keywords']):
+                    continue
+                if rule['requires'] and not rule['requires'].search(sentence):
+                    continue
+                match = rule['regex'].search(sentence)
+                if not match:
+                    continue
+                groups = [match.group(0)] + [(g or '').strip() for g in match.groups()]
+                if 'max_words' in rule:
+                    group, limit = rule['max_words']
+                    if len(groups[group].split()) > limit:
+                        continue
+                if 'group_contains' in rule:
+                    group, text = rule['group_contains']
+                    if text not in groups[group].lower():
+                        continue
+                questions.extend(self._render(q, groups) for q in rule['questions'])
+            elif kind == 'first_keyword':
+                for keyword in rule['keywords']:
+                    if keyword in found:
+                        questions.append(rule['question'].format(keyword=keyword))
+                        break
+            elif kind == 'each_keyword':
+                questions.extend(q for k, q in rule['questions'].items() if k in found)
+            elif kind == 'prefix':
+                if sentence.startswith(rule['prefixes']):
+                    questions.append(sentence.rstrip('?') + '?')
+
+        if self.question_words:
+            low, high = self.question_words
+            questions = [q for q in questions if low <= len(q.split()) <= high]
+        return questions
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Local full-text search over extracted Q&A pairs
+SQLite FTS5 index (porter-stemmed, questions weighted over answers) updated incrementally
+by the extraction stage; ranked search by text with optional domain and tag filters
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from http_cache import DEFAULT_CACHE_DIR
+from import_ledger import pair_hash
+
+DEFAULT_INDEX = os.path.join(DEFAULT_CACHE_DIR, "qa_search.sqlite")
+TERM = re.compile(r'\w+')
+# Question words match nearly every pair: they cost posting-list scans and add nothing to the ranking
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how', 'i', 'if',
+    'in', 'is', 'it', 'my', 'of', 'on', 'or', 'should', 'that', 'the', 'this', 'to', 'what', 'when',
+    'where', 'which', 'who', 'why', 'will', 'with', 'you', 'your',
+}
+QUESTION_WEIGHT, ANSWER_WEIGHT = 4.0, 1.0  # bm25 column weights
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    id INTEGER PRIMARY KEY, hash TEXT UNIQUE, question TEXT, answer TEXT, source_url TEXT,
+    domain TEXT, confidence REAL, tags TEXT, added_at TEXT
+);
+CREATE INDEX IF NOT EXISTS pairs_domain ON pairs (domain);
+CREATE TABLE IF NOT EXISTS pair_tags (tag TEXT, pair_id INTEGER, PRIMARY KEY (tag, pair_id)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS pairs_fts USING fts5 (
+    question, answer, content='pairs', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+
+def match_expression(text: str) -> Optional[str]:
+    """Free text → FTS5 query: any of the terms, bm25 ranks pairs matching more of them first"""
+    terms = TERM.findall(text.lower())
+    terms = [t for t in terms if t not in STOPWORDS] or terms
+    return ' OR '.join(f'"{term}"' for term in dict.fromkeys(terms)) if terms else None
+
+
+class QASearchIndex:
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = threading.Lock()  # The streaming pipeline adds pairs from its extract thread
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+
+    def add(self, pairs: Iterable[Dict]) -> int:
+        """Index pairs not seen before (same question + answer + source_url); returns how many were added"""
+        added = 0
+        now = datetime.now().isoformat()
+        with self.lock, self.db:
+            for pair in pairs:
+                tags = pair.get('tags') or []
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO pairs (hash, question, answer, source_url, domain, confidence, tags, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (pair_hash(pair), pair['question'], pair['answer'], pair['source_url'], pair.get('domain'),
+                     pair.get('confidence'), json.dumps(tags), now)
+                )
+                if not cursor.rowcount:
+                    continue
+                pair_id = cursor.lastrowid
+                self.db.execute("INSERT INTO pairs_fts (rowid, question, answer) VALUES (?, ?, ?)",
+                                (pair_id, pair['question'], pair['answer']))
+                self.db.executemany("INSERT OR IGNORE INTO pair_tags VALUES (?, ?)",
+                                    [(tag, pair_id) for tag in tags])
+                added += 1
+        return added
+
+    def search(self, text: str = '', domain: Optional[str] = None, tag: Optional[str] = None,
+               limit: int = 10) -> List[Dict]:
+        """Best-matching pairs for free text (highest score first), optionally within a domain and/or tag"""
+        match = match_expression(text)
+        filters, params = [], []
+        # Unary + keeps SQLite from handing these to FTS5 as rowid lookups (one MATCH per row)
+        if domain:
+            filters.append("+rowid IN (SELECT id FROM pairs WHERE domain = ?)")
+            params.append(domain)
+        if tag:
+            filters.append("+rowid IN (SELECT pair_id FROM pair_tags WHERE tag = ?)")
+            params.append(tag)
+        where = ''.join(f" AND {f}" for f in filters)
+
+        if match:
+            # Rank and cut to `limit` inside FTS5, then fetch only those rows
+            sql = ("SELECT pairs.*, -ranked.rank AS score FROM ("
+                   "SELECT rowid AS id, rank FROM pairs_fts WHERE pairs_fts MATCH ? "
+                   f"AND rank MATCH 'bm25({QUESTION_WEIGHT}, {ANSWER_WEIGHT})'{where} "
+                   "ORDER BY rank LIMIT ?) AS ranked JOIN pairs USING (id) ORDER BY ranked.rank")
+            params = [match] + params + [limit]
+        else:
+            # No text: filter only, most confident first
+            sql = f"SELECT pairs.*, 0.0 AS score FROM pairs WHERE 1{where} ORDER BY confidence DESC, id LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            cursor = self.db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            rows = cursor.fetchall()
+        results = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            results.append({
+                'question': record['question'], 'answer': record['answer'], 'source_url': record['source_url'],
+                'domain': record['domain'], 'confidence': record['confidence'],
+                'tags': json.loads(record['tags']), 'score': round(record['score'], 3),
+            })
+        return results
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search extracted Q&A pairs")
+    parser.add_argument('query', nargs='*', help="Question text")
+    parser.add_argument('--domain')
+    parser.add_argument('--tag')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--index', default=DEFAULT_INDEX)
+    parser.add_argument('--add', action='append', metavar='QA_JSON',
+                        help="Index a Q&A JSON file first (repeat for several)")
+    args = parser.parse_args()
+
+    index = QASearchIndex(args.index)
+    for qa_file in args.add or []:
+        with open(qa_file, 'r') as f:
+            print(f"📥 {qa_file}: {index.add(json.load(f))} new pairs indexed")
+    if not args.query and not (args.domain or args.tag):
+        print(f"📚 {len(index):,} pairs in {args.index}")
+    else:
+        results = index.search(' '.join(args.query), domain=args.domain, tag=args.tag, limit=args.limit)
+        for i, result in enumerate(results, 1):
+            print(f"\n{i}. [{result['score']:.2f}] Q: {result['question']}")
+            print(f"   A: {result['answer'][:160]}")
+            print(f"   {result['domain']} — {result['source_url']}")
+        if not results:
+            print("No matching Q&A pairs")
@@ -9,55 +9,73 @@ import time
 from datetime import datetime
 from typing import List, Dict
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import hashlib
+import os
+import sys
+from http_cache import ValidatorStore, DEFAULT_CACHE_DIR
+from bounded_fetch import bounded_get
+from html_parsing import parse_html, default_backend
+from http_archive import HttpArchive
+from page_store import PageStore
 
 class YachtInsuranceScraper:
-    def __init__(self, output_file="scraped_content.json"):
+    def __init__(self, output_file="scraped_content.json", validators=None, parser=None, archive=None, store=None):
         self.output_file = output_file
+        self.validators = validators  # Optional ValidatorStore for conditional GETs
+        self.store = store  # Optional PageStore: text is kept there by hash, not in output_file
+        self.parser = parser or default_backend()  # HTML parsing backend
         self.content = []
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        self.delay = 2  # Rate limiting (ethical)
+        if archive is not None:  # Optional HttpArchive: record every response, or replay them offline
+            archive.mount(self.session)
+            if archive.replaying:
+                self.delay = 0
         
     def scrape_url(self, url: str) -> Dict:
         """Scrape single URL and extract text content"""
         try:
             print(f"Scraping: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            headers = self.validators.conditional_headers(url) if self.validators else {}
+            response = bounded_get(self.session, url, headers)  # HTML only, at most MAX_BYTES
             
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
+            # Not modified since last cycle: reuse stored record, skip parsing
+            entry = self.validators.get(url) if self.validators else None
+            if entry and self.validators.has_page(url):
+                body_hash = None if response.status_code == 304 else hashlib.md5(response.content).hexdigest()
+                if response.status_code == 304 or body_hash == entry.get('body_hash'):
+                    self.validators.touch(url)
+                    return dict(self.validators.page(url), timestamp=datetime.now().isoformat(), fresh=False)
             
-            # Extract title
-            title = soup.find('h1')
-            title_text = title.get_text(strip=True) if title else "Unknown"
+            response.raise_for_status()
             
-            # Extract main content
-            text = soup.get_text(separator='\n', strip=True)
+            parsed = parse_html(response.content, url, backend=self.parser, max_lines=1000)
             
-            # Clean up text
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            clean_text = '\n'.join(lines[:1000])  # Limit to first 1000 lines
+            title_text = parsed['h1'] or "Unknown"
+            clean_text = '\n'.join(parsed['lines'])  # Limited to first 1000 lines
             
             domain = urlparse(url).netloc
             content_hash = hashlib.md5(clean_text.encode()).hexdigest()
             
-            return {
+            record = {
                 'url': url,
                 'domain': domain,
                 'title': title_text,
                 'content': clean_text,
                 'hash': content_hash,
                 'timestamp': datetime.now().isoformat(),
-                'word_count': len(clean_text.split())
+                'word_count': len(clean_text.split()),
+                'fresh': not (entry and entry.get('content_hash') == content_hash)
             }
+            
+            if self.validators:
+                self.validators.update(url, response.headers, hashlib.md5(response.content).hexdigest(),
+                                       content_hash, dict(record, fresh=True))
+            return record
         except Exception as e:
             print(f"  ✗ Error: {str(e)}")
             return None
@@ -72,15 +90,26 @@ class YachtInsuranceScraper:
                 self.content.append(result)
                 print(f"  ✓ Saved ({i}/{len(urls)})")
             
-            time.sleep(2)  # Rate limiting (ethical)
+            time.sleep(self.delay)
         
         self.save_to_file()
+        if self.validators:
+            self.validators.save()
+        
+        fresh = sum(1 for c in self.content if c['fresh'])
         print(f"\n✅ Scraping complete: {len(self.content)} sources saved to {self.output_file}")
+        print(f"   {fresh} fresh, {len(self.content) - fresh} reused (unchanged)")
     
     def save_to_file(self) -> None:
-        """Save scraped content to JSON"""
+        """Save scraped content to JSON (without the text when it is in the page store)"""
+        records = self.content
+        if self.store is not None:
+            for record in records:
+                self.store.record(record['url'], record['content'], record['timestamp'])
+            self.store.save()
+            records = [{k: v for k, v in record.items() if k != 'content'} for record in records]
         with open(self.output_file, 'w') as f:
-            json.dump(self.content, f, indent=2)
+            json.dump(records, f, indent=2)
 
 if __name__ == "__main__":
     # Yacht insurance sources to scrape - KNOWN WORKING SOURCES ONLY
@@ -103,5 +132,15 @@ if __name__ == "__main__":
         "https://www.seatalk.com/",
     ]
     
-    scraper = YachtInsuranceScraper()
+    # --record saves every response to the HTTP archive, --replay scrapes from it offline
+    archive = None
+    if '--record' in sys.argv or '--replay' in sys.argv:
+        archive = HttpArchive(os.path.join(DEFAULT_CACHE_DIR, "scraper_archive.sqlite"),
+                              mode='record' if '--record' in sys.argv else 'replay')
+    
+    # Archived runs fetch full bodies: conditional GETs would record or replay 304s
+    store = PageStore()
+    validators = None if archive is not None else ValidatorStore(os.path.join(DEFAULT_CACHE_DIR, "scraper_validators.json"),
+                                                                 store=store)
+    scraper = YachtInsuranceScraper(validators=validators, archive=archive, store=store)
     scraper.scrape_sources(sources)
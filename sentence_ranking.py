@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Batched TF-IDF relevance ranking of candidate sentences
+Scores a whole batch of sentences against the insurance-domain term profile (cosine of
+TF-IDF vectors, IDF taken over the batch) and keeps the top k per group (source or page).
+NumPy does the sparse arithmetic when installed; the pure-Python path gives the same scores.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from qa_rules import DOMAIN_PROFILE
+
+TERM = re.compile(r'[a-z]+')
+SCORE_DIGITS = 9  # Both backends round to this, so float noise never reorders near-ties
+
+
+def available_backends() -> List[str]:
+    return (['numpy'] if np is not None else []) + ['python']
+
+
+class SentenceRanker:
+    def __init__(self, profile: Dict[str, float] = DOMAIN_PROFILE, backend: Optional[str] = None):
+        self.profile = profile
+        self.backend = backend or available_backends()[0]
+        if self.backend not in available_backends():
+            raise ValueError(f"Sentence ranking backend '{self.backend}' is not available")
+        self.term_lengths = sorted({len(term) for term in profile})
+        self.term_weights: Dict[str, float] = {}  # Word -> weight of the profile terms it starts with
+
+    def term_weight(self, word: str) -> float:
+        weight = self.term_weights.get(word)
+        if weight is None:
+            prefixes = (word[:n] for n in self.term_lengths if n <= len(word))
+            weight = max((self.profile.get(prefix, 0.0) for prefix in prefixes), default=0.0)
+            self.term_weights[word] = weight
+        return weight
+
+    def scores(self, sentences: List[str]) -> List[float]:
+        """
+        Relevance of each sentence: cosine between its TF-IDF vector and the profile's (up to the
+        profile's norm, which is the same for every sentence). IDF is smoothed, over this batch.
+        0.0 for sentences without any profile term.
+        """
+        tokens = [TERM.findall(sentence.lower()) for sentence in sentences]
+        if self.backend == 'numpy':
+            scores = self._scores_numpy(tokens)
+        else:
+            scores = self._scores_python(tokens)
+        return [round(score, SCORE_DIGITS) for score in scores]
+
+    def _scores_python(self, tokens: List[List[str]]) -> List[float]:
+        counts = [Counter(words) for words in tokens]
+        df = Counter(word for count in counts for word in count)
+        n = len(tokens)
+        idf = {word: math.log((1 + n) / (1 + freq)) + 1 for word, freq in df.items()}
+        scores = []
+        for count in counts:
+            dot = norm = 0.0
+            for word, tf in count.items():
+                weight = tf * idf[word]
+                norm += weight * weight
+                dot += weight * idf[word] * self.term_weight(word)
+            scores.append(dot / math.sqrt(norm) if dot else 0.0)
+        return scores
+
+    def _scores_numpy(self, tokens: List[List[str]]) -> List[float]:
+        n = len(tokens)
+        vocabulary: Dict[str, int] = {}
+        term_ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for words in tokens for word in words),
+                               dtype=np.int64)
+        if not len(term_ids):
+            return [0.0] * n
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=n)
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        # Sparse (sentence, term) -> tf as unique keys with counts
+        keys, tf = np.unique(rows * len(vocabulary) + term_ids, return_counts=True)
+        rows, terms = np.divmod(keys, len(vocabulary))
+        df = np.bincount(terms, minlength=len(vocabulary))
+        idf = np.log((1 + n) / (1 + df)) + 1
+        profile = np.fromiter((self.term_weight(word) for word in vocabulary), dtype=np.float64,
+                              count=len(vocabulary)) * idf
+        weights = tf * idf[terms]
+        dot = np.bincount(rows, weights * profile[terms], minlength=n)
+        norm = np.sqrt(np.bincount(rows, weights * weights, minlength=n))
+        return np.divide(dot, norm, out=np.zeros(n), where=dot > 0).tolist()
+
+    def top_k(self, groups: List[List[str]], k: Optional[int]) -> List[List[str]]:
+        """
+        Score every group's sentences in one batch; per group, its k best sentences with a
+        nonzero score (all of them when k is None), kept in their original order
+        """
+        scores = iter(self.scores([sentence for group in groups for sentence in group]))
+        selected = []
+        for group in groups:
+            group_scores = [next(scores) for _ in group]
+            ranked = sorted((i for i, score in enumerate(group_scores) if score > 0), key=lambda i: -group_scores[i])
+            keep = sorted(ranked[:k])
+            selected.append([group[i] for i in keep])
+        return selected
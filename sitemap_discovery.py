@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+robots.txt and sitemap driven URL discovery
+Follows Sitemap: lines (or /sitemap.xml), sitemap indexes and gzipped sitemaps, and keeps each
+URL's <lastmod> between cycles so incremental crawls only fetch what changed
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import requests
+
+from bounded_fetch import DownloadRejected
+from crawl_frontier import canonicalize_url, same_site, url_priority
+from host_control import HostUnavailable
+from http_cache import DEFAULT_CACHE_DIR
+
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # sitemaps.org limit, uncompressed
+FETCH_BYTES = MAX_SITEMAP_BYTES  # Bounded read of robots.txt and sitemaps; a longer body is rejected
+
+
+def decode_sitemap(body: bytes) -> bytes:
+    """
+    Gunzip .xml.gz sitemaps (servers rarely mark them Content-Encoding: gzip); plain or
+    gzipped, a body over 50 MB is rejected
+    """
+    if body[:2] == b'\x1f\x8b' and len(body) <= MAX_SITEMAP_BYTES:
+        with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+            body = f.read(MAX_SITEMAP_BYTES + 1)
+    if len(body) > MAX_SITEMAP_BYTES:
+        raise ValueError("sitemap over 50 MB uncompressed")
+    return body
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[str]:
+    """W3C datetime (date, or date and time with offset) as a sortable UTC ISO string"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_sitemap(body: bytes) -> Tuple[str, List[Tuple[str, Optional[str]]]]:
+    """('urlset' or 'sitemapindex', [(loc, lastmod), ...]); namespace-agnostic"""
+    root = ElementTree.fromstring(decode_sitemap(body))
+    entries = []
+    for item in root:
+        fields = {child.tag.rsplit('}', 1)[-1]: (child.text or '').strip() for child in item}
+        if fields.get('loc'):
+            entries.append((fields['loc'], parse_lastmod(fields.get('lastmod'))))
+    return root.tag.rsplit('}', 1)[-1], entries
+
+
+def parse_robots(text: str) -> RobotFileParser:
+    robots = RobotFileParser()
+    robots.parse(text.splitlines())
+    return robots
+
+
+class SitemapState:
+    """Last crawled <lastmod> per URL and domain, persisted between cycles ('' = no lastmod given)"""
+
+    def __init__(self, path=os.path.join(DEFAULT_CACHE_DIR, "sitemaps.json")):
+        self.path = path
+        self.domains: Dict[str, Dict[str, str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                self.domains = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.domains = {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.domains, f)
+        os.replace(tmp_path, self.path)
+
+    def changed(self, domain: str, url: str, lastmod: Optional[str]) -> bool:
+        """New URL, or one whose lastmod moved past the version we crawled"""
+        seen = self.domains.get(domain, {})
+        if url not in seen:
+            return True
+        return bool(lastmod) and lastmod > seen[url]
+
+    def record(self, domain: str, url: str, lastmod: Optional[str]) -> None:
+        self.domains.setdefault(domain, {})[url] = lastmod or ''
+
+
+class SitemapDiscovery:
+    def __init__(self, state: SitemapState, user_agent='*', max_sitemaps=10, max_urls=500):
+        self.state = state
+        self.user_agent = user_agent
+        self.max_sitemaps = max_sitemaps  # Sitemap fetches per domain and cycle
+        self.max_urls = max_urls
+        self.pending: Dict[str, Dict[str, Optional[str]]] = {}  # domain -> {url: lastmod} until crawled
+
+    def robots(self, start_url: str, get: Callable[[str], requests.Response]) -> RobotFileParser:
+        """
+        robots.txt rules; a missing or unreachable file allows everything. An open circuit
+        (HostUnavailable) is raised: no request was made, so nothing is known about the rules.
+        """
+        try:
+            response = get(urljoin(start_url, '/robots.txt'))
+        except HostUnavailable:
+            raise
+        except (requests.RequestException, DownloadRejected):
+            return parse_robots('')
+        if response.status_code in (401, 403):
+            robots = parse_robots('')
+            robots.disallow_all = True
+            return robots
+        return parse_robots(response.text if response.ok else '')
+
+    def discover(self, domain: str, start_url: str, get: Callable[[str], requests.Response]) -> dict:
+        """
+        Read robots.txt and walk the domain's sitemaps with get(url).
+        Returns {'robots', 'crawl_delay', 'found' (a sitemap parsed), 'listed' (URLs in the
+        sitemaps), 'urls' (new or changed, best first)}. Nothing is marked as seen until
+        crawled(domain, url) is called, so URLs cut by the page budget come back next cycle.
+        Raises HostUnavailable if the host's circuit is (or goes) open.
+        """
+        robots = self.robots(start_url, get)
+        queue = robots.site_maps() or [urljoin(start_url, '/sitemap.xml')]
+        queued = set(queue)
+        found, fetched, listed = False, 0, 0
+        changed: Dict[str, Optional[str]] = {}
+
+        while queue and fetched < self.max_sitemaps:
+            sitemap_url = queue.pop(0)
+            fetched += 1
+            try:
+                response = get(sitemap_url)
+                if not response.ok:
+                    continue
+                kind, entries = parse_sitemap(response.content)
+            except HostUnavailable:
+                raise
+            except (requests.RequestException, DownloadRejected, ElementTree.ParseError, ValueError, OSError,
+                    EOFError) as e:
+                print(f"  ⚠️  Sitemap {sitemap_url}: {str(e)}")
+                continue
+            found = True
+
+            if kind == 'sitemapindex':
+                # Most recently modified child sitemaps first: that is where new articles are
+                for loc, _ in sorted(entries, key=lambda entry: entry[1] or '', reverse=True):
+                    if loc not in queued and same_site(loc, domain):
+                        queued.add(loc)
+                        queue.append(loc)
+                continue
+
+            for loc, lastmod in entries:
+                if not same_site(loc, domain) or not robots.can_fetch(self.user_agent, loc):
+                    continue
+                listed += 1
+                url = canonicalize_url(loc)
+                if self.state.changed(domain, url, lastmod):
+                    changed[url] = lastmod
+
+        self.pending[domain] = changed
+        return {
+            'robots': robots,
+            'crawl_delay': robots.crawl_delay(self.user_agent),
+            'found': found,
+            'listed': listed,
+            'urls': self.rank(changed, start_url)[:self.max_urls],
+        }
+
+    @staticmethod
+    def rank(urls: Dict[str, Optional[str]], start_url: str) -> List[str]:
+        """Under the start URL's section first, then article-like, then newest"""
+        section = urlparse(start_url).path.rstrip('/') + '/'
+        newest_first = sorted(urls, key=lambda url: urls[url] or '', reverse=True)
+        return sorted(newest_first, key=lambda url: (not urlparse(url).path.startswith(section),
+                                                     url_priority(url)))
+
+    def crawled(self, domain: str, url: str) -> None:
+        """Remember the lastmod of a sitemap URL once it has been fetched"""
+        pending = self.pending.get(domain, {})
+        if url in pending:
+            self.state.record(domain, url, pending.pop(url))
+
+    def save(self) -> None:
+        self.state.save()
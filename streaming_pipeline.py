@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Streaming crawl → extract → import
+Pages flow from the crawler through bounded queues into extraction and on into the
+batching importer, so the first pairs reach the database while the crawl is still running.
+A domain's pairs are queued once the crawl has moved past it and its near-duplicate
+clusters are final. Full queues block the stage upstream (backpressure); stop() lets
+queued work drain.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator
+
+DONE = object()  # End-of-stream marker
+INDEX_BATCH = 500  # Pairs per search index transaction
+
+
+def iter_queue(q: queue.Queue) -> Iterator:
+    """Items of a queue until the end-of-stream marker"""
+    while True:
+        item = q.get()
+        if item is DONE:
+            return
+        yield item
+
+
+def discard_until_done(q: queue.Queue) -> None:
+    """Unblock an upstream stage after its consumer failed"""
+    for _ in iter_queue(q):
+        pass
+
+
+class StreamingPipeline:
+    def __init__(self, extractor, importer, ledger=None, page_queue_size=64, pair_queue_size=1000, log=print,
+                 search_index=None, on_domain=None):
+        self.extractor = extractor  # DeepCrawlQAExtractor
+        self.importer = importer  # BulkImporter
+        self.ledger = ledger  # Optional ImportLedger: skip pairs the server already confirmed
+        self.search_index = search_index  # Optional QASearchIndex, fed every extracted pair
+        self.on_domain = on_domain  # on_domain(summary) once a crawled domain's pairs are all confirmed
+        self.pages = queue.Queue(maxsize=page_queue_size)
+        self.pairs = queue.Queue(maxsize=pair_queue_size)
+        self.log = log
+        self.stop_event = threading.Event()
+        self.errors = []
+        self.stats = {"pages": 0, "pairs": 0, "skipped_locally": 0, "first_import_seconds": None}
+        self.started = None
+        self.lock = threading.Lock()
+        self.page_counts = {}  # Pages emitted per domain
+        self.domains = {}  # Per domain: crawl summary, extraction done, pairs not yet confirmed
+
+    def stop(self) -> None:
+        """Graceful shutdown: the crawler stops early, everything already queued is still imported"""
+        self.stop_event.set()
+
+    def emit_page(self, domain: str, page: Dict) -> None:
+        """Crawler callback; blocks while extraction is behind"""
+        self.stats["pages"] += 1
+        self.page_counts[domain] = self.page_counts.get(domain, 0) + 1
+        self.pages.put((domain, page))
+
+    def crawled_domain(self, summary: Dict) -> None:
+        """
+        Crawler on_domain callback. The summary is passed on to on_domain only once the
+        importer has confirmed every pair extracted from the domain, so a checkpoint taken
+        there never covers pairs still queued (or dead-lettered).
+        """
+        with self.lock:
+            progress = self._progress(summary["domain"])
+            progress["summary"] = summary
+            if not self.page_counts.get(summary["domain"]):
+                progress["extracted"] = True  # No pages reached extraction
+            self._report(summary["domain"])
+
+    def _progress(self, domain: str) -> Dict:
+        return self.domains.setdefault(domain, {"summary": None, "extracted": False, "pending": 0,
+                                                "reported": False})
+
+    def _report(self, domain: str) -> None:
+        """Call on_domain once the domain is crawled, extracted and fully imported (lock held)"""
+        progress = self.domains[domain]
+        if progress["summary"] and progress["extracted"] and not progress["pending"] and not progress["reported"]:
+            progress["reported"] = True
+            if self.on_domain:
+                self.on_domain(progress["summary"])
+
+    def _crawl(self, produce: Callable) -> None:
+        try:
+            produce(self.emit_page, self.stop_event)
+        except Exception as e:
+            self.errors.append(("crawl", e))
+            self.stop()
+        finally:
+            self.pages.put(DONE)
+
+    def _extract(self) -> None:
+        unindexed = []
+        try:
+            # Each domain's final best pairs, never one that a later page supersedes
+            for domain, pairs in self.extractor.iter_domain_pairs(iter_queue(self.pages)):
+                new_pairs = []
+                for pair in pairs:
+                    if self.search_index is not None:
+                        unindexed.append(pair)
+                        if len(unindexed) >= INDEX_BATCH:
+                            self.search_index.add(unindexed)
+                            unindexed = []
+                    if self.ledger is not None and pair in self.ledger:
+                        self.stats["skipped_locally"] += 1
+                        continue
+                    new_pairs.append(pair)
+                # Counted before queueing: a pair may be confirmed as soon as it is queued
+                with self.lock:
+                    self._progress(domain)["pending"] += len(new_pairs)
+                for pair in new_pairs:
+                    self.stats["pairs"] += 1
+                    self.pairs.put(pair)
+                with self.lock:
+                    self._progress(domain)["extracted"] = True
+                    self._report(domain)
+        except Exception as e:
+            self.errors.append(("extract", e))
+            self.stop()
+            discard_until_done(self.pages)
+        finally:
+            self.pairs.put(DONE)
+            if unindexed:
+                self.search_index.add(unindexed)
+
+    def _on_batch(self, result: Dict) -> None:
+        if self.stats["first_import_seconds"] is None and result["entries"]:
+            self.stats["first_import_seconds"] = time.time() - self.started
+        if self.ledger is not None:
+            self.ledger.record_batch(result)
+        if "error" in result:
+            return  # Its domains stay pending, so a resumed run crawls them again
+        with self.lock:
+            for pair in result["entries"]:
+                self._progress(pair["domain"])["pending"] -= 1
+            for domain in {pair["domain"] for pair in result["entries"]}:
+                self._report(domain)
+
+    def _import(self) -> None:
+        try:
+            self.stats.update(self.importer.import_entries(iter_queue(self.pairs), on_batch=self._on_batch))
+        except Exception as e:
+            self.errors.append(("import", e))
+            self.stop()
+            discard_until_done(self.pairs)
+
+    def run(self, produce: Callable) -> Dict:
+        """
+        produce(emit_page, stop_event) runs the crawl, calling emit_page(domain, page) per page
+        and returning early once stop_event is set. Returns the combined stats.
+        """
+        self.started = time.time()
+        threads = [threading.Thread(target=self._crawl, args=(produce,), name="crawl"),
+                   threading.Thread(target=self._extract, name="extract"),
+                   threading.Thread(target=self._import, name="import")]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.log("⏹️  Stopping: draining queued pages and pairs (Ctrl-C again to abort)")
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+        self.stats["elapsed_seconds"] = time.time() - self.started
+        return self.stats
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Local stub of /api/v1/bulk-import for offline importer tests
+Simulates per-entry latency, transient 503s, 429 rate limiting, 413 payload limits and, like
+the real route, 200 responses whose failed insert chunk stored none of its rows: new entries
+are inserted in chunks of INSERT_BATCH, and a chunk holding two entries with the same
+(source_url, question) fails on the unique constraint
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INSERT_BATCH = 500  # Rows per insert statement in the route
+
+
+class StubState:
+    def __init__(self, latency=0.05, per_entry_latency=0.001, fail_rate=0.0,
+                 max_concurrent=8, max_payload_bytes=2_000_000, insert_error_rate=0.0, seed=0):
+        self.latency = latency
+        self.per_entry_latency = per_entry_latency
+        self.fail_rate = fail_rate
+        self.max_concurrent = max_concurrent
+        self.max_payload_bytes = max_payload_bytes
+        self.insert_error_rate = insert_error_rate  # 200 with 'errors': the batch's new entries are not stored
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.seen = set()
+        self.counts = {'requests': 0, 'ok': 0, '429': 0, '413': 0, '503': 0, 'insert_errors': 0}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+
+def make_handler(state: StubState):
+    class BulkImportHandler(BaseHTTPRequestHandler):
+        def reply(self, status: int, body: dict, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw = self.rfile.read(length)
+            state.count('requests')
+
+            if length > state.max_payload_bytes:
+                state.count('413')
+                return self.reply(413, {'error': 'Payload too large'})
+
+            with state.lock:
+                if state.active >= state.max_concurrent:
+                    state.counts['429'] += 1
+                    rate_limited = True
+                else:
+                    state.active += 1
+                    rate_limited = False
+                fail = state.random.random() < state.fail_rate
+                insert_error = state.insert_error_rate > 0 and state.random.random() < state.insert_error_rate
+            if rate_limited:
+                return self.reply(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+
+            try:
+                entries = json.loads(raw)['entries']
+                time.sleep(state.latency + state.per_entry_latency * len(entries))
+                if fail:
+                    state.count('503')
+                    return self.reply(503, {'error': 'Service unavailable'})
+
+                inserted = updated = 0
+                errors = []
+                with state.lock:
+                    # Like the route: rows already stored are updates, the rest are inserted chunk by chunk
+                    keys = [(entry['source_url'], entry['question']) for entry in entries]
+                    new_keys = [key for key in keys if key not in state.seen]
+                    updated = len(keys) - len(new_keys)
+                    for i in range(0, len(new_keys), INSERT_BATCH):
+                        chunk = new_keys[i:i + INSERT_BATCH]
+                        if insert_error:
+                            errors.append(f'Insert batch {i}: simulated insert failure')
+                        elif len(set(chunk)) < len(chunk):
+                            errors.append(f'Insert batch {i}: duplicate key value violates unique constraint')
+                        else:
+                            state.seen.update(chunk)
+                            inserted += len(chunk)
+                body = {'status': 'success', 'inserted': inserted, 'updated': updated, 'total': len(entries)}
+                if errors:
+                    state.count('insert_errors')
+                    body['errors'] = errors
+                else:
+                    state.count('ok')
+                self.reply(200, body)
+            finally:
+                with state.lock:
+                    state.active -= 1
+
+        def log_message(self, format, *args):
+            pass
+
+    return BulkImportHandler
+
+
+@contextmanager
+def serve_stub(**options):
+    """Start the stub server; yields (url, state)"""
+    state = StubState(**options)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v1/bulk-import", state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from bulk_importer import BulkImporter
+    from qa_record import load_records
+
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent import against the stub")
+    parser.add_argument('--qa-file', default='all_domains_qa.json')
+    parser.add_argument('--fail-rate', type=float, default=0.1)
+    parser.add_argument('--insert-error-rate', type=float, default=0.0)
+    parser.add_argument('--in-flight', type=int, default=4)
+    args = parser.parse_args()
+
+    entries = load_records(args.qa_file)
+
+    quiet = lambda message: None
+    for label, in_flight, adaptive in [('sequential', 1, False), ('concurrent', args.in_flight, True)]:
+        with serve_stub(fail_rate=args.fail_rate, insert_error_rate=args.insert_error_rate) as (url, state), tempfile.TemporaryDirectory() as tmp:
+            importer = BulkImporter(
+                url, 'stub-key', max_in_flight=in_flight, backoff_base=0.05,
+                max_batch_size=500 if adaptive else 100, target_latency=2.0,
+                dead_letter_file=os.path.join(tmp, 'dead_letter.jsonl'), log=quiet
+            )
+            start = time.time()
+            stats = importer.import_entries(entries)
+            elapsed = time.time() - start
+        print(f"{label:<12} {elapsed:6.2f}s  {len(entries) / elapsed:7.0f} entries/s  "
+              f"imported={stats['imported']} failed={stats['failed']} retries={stats['retries']} "
+              f"server={state.counts}")
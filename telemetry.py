@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Run telemetry for the crawl → extract → import pipeline
+Counters and latency summaries with labels, written per run as JSON and optionally
+as a Prometheus text exposition file (rendered by monitor.py)
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+METRICS_DIR = "metrics"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters: Dict[Tuple[str, tuple], float] = {}
+            self.samples: Dict[Tuple[str, tuple], List[float]] = {}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple[str, tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """One sample of a summary (latency, size, ...)"""
+        key = self._key(name, labels)
+        with self.lock:
+            self.samples.setdefault(key, []).append(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict:
+        """Counters plus count/sum/min/max/percentiles of every summary"""
+        with self.lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            summaries = []
+            for (name, labels), values in sorted(self.samples.items()):
+                ordered = sorted(values)
+                summary = {'name': name, 'labels': dict(labels), 'count': len(ordered),
+                           'sum': sum(ordered), 'min': ordered[0], 'max': ordered[-1]}
+                summary.update({f'p{int(q * 100)}': percentile(ordered, q) for q in QUANTILES})
+                summaries.append(summary)
+        return {'started_at': self.started, 'duration_seconds': time.time() - self.started,
+                'counters': counters, 'summaries': summaries}
+
+    def write_json(self, path: str, extra: Dict = None) -> None:
+        data = self.snapshot()
+        data.update(extra or {})
+        _atomic_write(path, json.dumps(data, indent=2))
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (counters and summaries)"""
+        snapshot = self.snapshot()
+        lines, typed = [], set()
+
+        def type_line(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for counter in snapshot['counters']:
+            type_line(counter['name'], 'counter')
+            lines.append(f"{counter['name']}{_labels(counter['labels'])} {counter['value']}")
+        for summary in snapshot['summaries']:
+            name, labels = summary['name'], summary['labels']
+            type_line(name, 'summary')
+            for q in QUANTILES:
+                lines.append(f"{name}{_labels(dict(labels, quantile=str(q)))} {summary[f'p{int(q * 100)}']}")
+            lines.append(f"{name}_sum{_labels(labels)} {summary['sum']}")
+            lines.append(f"{name}_count{_labels(labels)} {summary['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        _atomic_write(path, self.prometheus_text())
+
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ''
+
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in sorted(labels.items())) + '}'
+
+
+def _atomic_write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+PROM_LINE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+PROM_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+PROM_ESCAPE = re.compile(r'\\(.)')
+
+
+def parse_prometheus(text: str) -> List[Tuple[str, Dict[str, str], float]]:
+    """(name, labels, value) samples of a text exposition file"""
+    samples = []
+    for line in text.splitlines():
+        match = PROM_LINE.match(line.strip())
+        if not match or line.startswith('#'):
+            continue
+        name, labels, value = match.groups()
+        labels = {k: PROM_ESCAPE.sub(lambda m: '\n' if m.group(1) == 'n' else m.group(1), v)
+                  for k, v in PROM_LABEL.findall(labels or '')}
+        samples.append((name, labels, float(value)))
+    return samples
+
+
+# Process-wide registry; each pipeline run resets it
+metrics = Metrics()
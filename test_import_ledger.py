@@ -0,0 +1,77 @@
+"""
+The import ledger must only hold pairs the bulk-import endpoint actually stored:
+a pair recorded by mistake is filtered out of every later run and never imported
+"""
+
+import json
+
+from bulk_importer import BulkImporter
+from import_ledger import ImportLedger
+from stub_import_server import serve_stub
+
+PAIRS = [{'question': f"What does clause {i} cover?", 'answer': f"Clause {i} covers hull damage",
+          'source_url': f"https://example.com/policy/{i}", 'domain': 'example.com', 'confidence': 0.75,
+          'tags': ['insurance', 'marine', 'example']} for i in range(25)]
+
+
+def run_import(tmp_path, **stub_options):
+    ledger = ImportLedger(str(tmp_path / 'ledger.txt'))
+    with serve_stub(latency=0, per_entry_latency=0, **stub_options) as (url, state):
+        importer = BulkImporter(url, 'test-key', batch_size=10, max_retries=2, backoff_base=0.01,
+                                dead_letter_file=str(tmp_path / 'dead_letter.jsonl'), log=lambda message: None)
+        stats = importer.import_entries(PAIRS, on_batch=ledger.record_batch)
+    return ledger, stats
+
+
+def test_200_with_errors_leaves_ledger_empty(tmp_path):
+    ledger, stats = run_import(tmp_path, insert_error_rate=1.0)
+
+    assert len(ledger) == 0
+    assert len(ImportLedger(str(tmp_path / 'ledger.txt'))) == 0
+    assert stats['imported'] == 0 and stats['failed'] == len(PAIRS)
+    with open(tmp_path / 'dead_letter.jsonl') as f:
+        dead = [entry for line in f for entry in json.loads(line)['entries']]
+    assert sorted(dead, key=lambda pair: pair['source_url']) == sorted(PAIRS, key=lambda pair: pair['source_url'])
+
+
+def test_confirmed_batches_are_recorded(tmp_path):
+    ledger, stats = run_import(tmp_path)
+
+    assert stats['imported'] == len(PAIRS)
+    assert len(ledger) == len(PAIRS)
+    assert ledger.filter_new(PAIRS) == ([], len(PAIRS))
+
+
+def test_batch_with_duplicate_import_keys_is_not_recorded(tmp_path):
+    ledger = ImportLedger(str(tmp_path / 'ledger.txt'))
+    pairs = [dict(PAIRS[0], answer=answer) for answer in ("Clause 0 covers hull damage", "Clause 0 excludes wear")]
+    with serve_stub(latency=0, per_entry_latency=0) as (url, state):
+        importer = BulkImporter(url, 'test-key', max_retries=1, backoff_base=0.01,
+                                dead_letter_file=str(tmp_path / 'dead_letter.jsonl'), log=lambda message: None)
+        stats = importer.import_entries(pairs, on_batch=ledger.record_batch)
+
+    # Like the route, the insert chunk fails on the (source_url, question) unique constraint
+    assert state.counts['insert_errors'] == 2 and not state.seen
+    assert stats['failed'] == len(pairs) and len(ledger) == 0
+
+
+class PairsExtractor:
+    """Stands in for DeepCrawlQAExtractor: every domain yields the fixed pairs"""
+
+    def iter_domain_pairs(self, pages):
+        for domain, _ in pages:
+            yield domain, PAIRS
+
+
+def test_streaming_run_leaves_ledger_empty_on_200_with_errors(tmp_path):
+    from streaming_pipeline import StreamingPipeline
+
+    ledger = ImportLedger(str(tmp_path / 'ledger.txt'))
+    with serve_stub(latency=0, per_entry_latency=0, insert_error_rate=1.0) as (url, state):
+        importer = BulkImporter(url, 'test-key', batch_size=10, max_retries=1, backoff_base=0.01,
+                                dead_letter_file=str(tmp_path / 'dead_letter.jsonl'), log=lambda message: None)
+        pipeline = StreamingPipeline(PairsExtractor(), importer, ledger, log=lambda message: None)
+        stats = pipeline.run(lambda emit_page, stop: emit_page('example.com', {'url': 'https://example.com/'}))
+
+    assert stats['pairs'] == len(PAIRS) and stats['failed'] == len(PAIRS)
+    assert len(ledger) == 0
@@ -0,0 +1,52 @@
+"""
+Extraction output must be importable as one batch: the bulk-import route keys rows on
+(source_url, question), and two new pairs with the same key fail their whole insert chunk
+"""
+
+import contextlib
+import io
+from collections import Counter
+
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from near_duplicates import QAPairClusters, source_question_key
+
+CRAWL_FILE = 'all_domains_crawl.json'
+
+
+def pair(question, answer, url='https://example.com/liability', confidence=0.75):
+    return {'question': question, 'answer': answer, 'source_url': url, 'confidence': confidence}
+
+
+def test_one_pair_per_source_question_keeps_the_best_answer():
+    clusters = QAPairClusters()
+    for candidate in [pair("What about liability?", "Liability cover pays third party claims"),
+                      pair("What about liability?", "Crew injuries fall under a separate clause entirely, see below"),
+                      pair("What about liability?", "Hull and machinery cover excludes liability", 'https://example.com/other'),
+                      pair("what about LIABILITY", "Salvage charges are never part of liability limits")]:
+        clusters.add(candidate)
+
+    assert len(clusters) == 4  # Unrelated answers are separate clusters
+    assert clusters.representatives() == [
+        pair("What about liability?", "Crew injuries fall under a separate clause entirely, see below"),
+        pair("What about liability?", "Hull and machinery cover excludes liability", 'https://example.com/other'),
+    ]
+
+
+def test_frozen_cluster_keeps_its_best_pair():
+    first = pair("What does hull cover include?", "Hull cover pays for damage to the vessel and its machinery")
+    better = dict(first, source_url='https://example.com/hull', confidence=0.9)
+    clusters = QAPairClusters()
+    clusters.add(first)
+    clusters.freeze()  # e.g. the streaming pipeline has imported it
+
+    assert not clusters.add(better)
+    assert clusters.representatives() == [first] and clusters.sizes == [2]
+
+
+def test_extracted_pairs_have_unique_import_keys():
+    with contextlib.redirect_stdout(io.StringIO()):
+        pairs = DeepCrawlQAExtractor().process_crawl_results(CRAWL_FILE)
+
+    assert pairs
+    assert not [key for key, count in Counter(map(source_question_key, pairs)).items() if count > 1]
+    assert len({(pair['source_url'], pair['question']) for pair in pairs}) == len(pairs)
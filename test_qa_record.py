@@ -0,0 +1,47 @@
+"""
+QARecord must serialize back to exactly the JSON object it was loaded from
+"""
+
+import json
+
+import pytest
+
+from qa_record import QARecord, load_records, to_json
+
+PAIR = {'question': 'What does hull cover cover?', 'answer': 'Hull cover pays for damage to the vessel',
+        'source_url': 'https://example.com/hull', 'domain': 'example.com', 'confidence': 0.75,
+        'tags': ['insurance', 'marine', 'example']}
+
+
+@pytest.mark.parametrize('data', [
+    PAIR,
+    dict(PAIR, domain=None),  # Null optional field keeps its position
+    {'tags': None, **PAIR, 'confidence': None, 'created_at': '2026-01-12T15:53:26.822671'},
+    dict(reversed(list(PAIR.items()))),
+    dict(PAIR, tags='insurance;marine', source_type='guide'),
+    {k: v for k, v in PAIR.items() if k not in ('domain', 'tags')},
+])
+def test_round_trip_keeps_keys_values_and_order(data):
+    record = QARecord.from_dict(data)
+    assert json.dumps(record, default=to_json) == json.dumps(data)
+    for key, value in data.items():
+        assert record[key] == (tuple(value) if isinstance(value, list) else value)  # Tags read as the shared tuple
+    assert record.get('missing', 'default') == 'default'
+
+
+@pytest.mark.parametrize('field', ['question', 'answer', 'source_url'])
+def test_missing_or_null_core_field_is_a_value_error(tmp_path, field):
+    with pytest.raises(ValueError, match=field):
+        QARecord.from_dict(dict(PAIR, **{field: None}))
+    path = tmp_path / 'qa.json'
+    path.write_text(json.dumps([{k: v for k, v in PAIR.items() if k != field}]))
+    if field == 'source_url':  # Without a question or an answer, an object is not a pair at all
+        with pytest.raises(ValueError, match=field):
+            load_records(str(path))
+
+
+def test_extractor_records_match_the_old_dict_shape():
+    record = QARecord(PAIR['question'], PAIR['answer'], PAIR['source_url'], PAIR['domain'], 0.75,
+                      ('insurance', 'marine', 'example'))
+    assert list(record.to_dict().items()) == list(PAIR.items())
+    assert record.tags is QARecord.from_dict(PAIR).tags
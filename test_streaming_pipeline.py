@@ -0,0 +1,76 @@
+"""
+A streamed run imports each domain's final best pairs once the crawl has moved past the
+domain: the same pairs the batch path imports on this corpus, and never a pair that a later
+page supersedes. A domain is reported for checkpointing only once all its pairs are confirmed.
+"""
+
+import contextlib
+import io
+
+from bulk_importer import BulkImporter
+from crawl_jsonl import iter_crawl_pages
+from extract_from_deep_crawl import DeepCrawlQAExtractor
+from import_ledger import ImportLedger, pair_hash
+from streaming_pipeline import StreamingPipeline
+from stub_import_server import serve_stub
+
+CRAWL_FILE = 'all_domains_crawl.json'
+
+
+def keys(pairs):
+    return {(pair['source_url'], pair['question']) for pair in pairs}
+
+
+def run_stream(tmp_path, pages, ledger, **stub_options):
+    """Stream pages through the stub, reporting each domain's crawl summary after its last page"""
+    checkpointed = []
+    with serve_stub(latency=0, per_entry_latency=0, **stub_options) as (url, state), \
+            contextlib.redirect_stdout(io.StringIO()):
+        importer = BulkImporter(url, 'test-key', max_retries=1, backoff_base=0.01,
+                                dead_letter_file=str(tmp_path / 'dead_letter.jsonl'), log=lambda message: None)
+        pipeline = StreamingPipeline(DeepCrawlQAExtractor(), importer, ledger, log=lambda message: None,
+                                     on_domain=lambda summary: checkpointed.append((summary['domain'], set(ledger.hashes))))
+
+        def produce(emit_page, stop):
+            for i, (domain, page) in enumerate(pages):
+                emit_page(domain, page)
+                if i + 1 == len(pages) or pages[i + 1][0] != domain:
+                    pipeline.crawled_domain({'domain': domain})
+
+        stats = pipeline.run(produce)
+    return stats, pipeline, state, checkpointed
+
+
+def test_streamed_imports_match_batch_representatives(tmp_path):
+    pages = list(iter_crawl_pages(CRAWL_FILE))
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = DeepCrawlQAExtractor().process_crawl_results(CRAWL_FILE)
+
+    ledger = ImportLedger(str(tmp_path / 'ledger.txt'))
+    stats, pipeline, state, _ = run_stream(tmp_path, pages, ledger)
+    extractor = pipeline.extractor
+
+    assert not pipeline.errors
+    assert stats['pairs'] == stats['imported'] == len(batch) and stats['failed'] == 0
+    assert state.seen == keys(batch)
+    assert ledger.hashes == set(map(pair_hash, batch))
+    # Frozen clusters: what was imported is still every cluster's best pair at the end
+    assert ledger.hashes == set(map(pair_hash, extractor.clusters.representatives()))
+
+
+
+def test_domain_is_checkpointed_only_after_its_pairs_are_confirmed(tmp_path):
+    pages = list(iter_crawl_pages(CRAWL_FILE))
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = DeepCrawlQAExtractor().process_crawl_results(CRAWL_FILE)
+
+    ledger = ImportLedger(str(tmp_path / 'ledger.txt'))
+    _, _, _, checkpointed = run_stream(tmp_path, pages, ledger)
+    assert sorted(domain for domain, _ in checkpointed) == sorted({domain for domain, _ in pages})
+    for domain, confirmed in checkpointed:
+        assert {pair_hash(pair) for pair in batch if pair['domain'] == domain} <= confirmed
+
+    # Nothing confirmed: no domain may be marked done, so a resumed run crawls them all again
+    _, _, _, checkpointed = run_stream(tmp_path, pages, ImportLedger(str(tmp_path / 'failed.txt')),
+                                       insert_error_rate=1.0)
+    assert checkpointed == []